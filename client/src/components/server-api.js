@@ -45,14 +45,21 @@ const getFeatureTypes = (datasetId) => axios.get(
   `/api/datasets/${datasetId}/feature_types`, config,
 );
 
+const getDatasetStatus = (datasetId) => axios.get(
+  `/api/datasets/${datasetId}/status`, config,
+);
+
 const getFeatureTypeGraph = ({
   datasetId,
   featureTypeName,
   offset = 0,
+  cursor = null,
   limit,
   filterQuery = '',
 }) => {
-  const queryStr = `offset=${offset}&limit=${limit}&key=${filterQuery}`;
+  // the cursors of the next/previous pages are preferred over their offsets
+  const pageStr = cursor !== null ? `cursor=${cursor}` : `offset=${offset}`;
+  const queryStr = `${pageStr}&limit=${limit}&key=${filterQuery}`;
 
   return axios.get(
     `/api/datasets/${datasetId}/feature_types/${featureTypeName}/graph?${queryStr}`, config,
@@ -69,6 +76,7 @@ export {
   getDatasets,
   uploadDataset,
   getFeatureTypes,
+  getDatasetStatus,
   getFeatureTypeGraph,
   getFeatureGraph,
   getDownloadSkeletonURL,
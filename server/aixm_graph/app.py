@@ -30,20 +30,24 @@ Source Initiative: http://opensource.org/licenses/BSD-3-Clause
 Details on EUROCONTROL: http://www.eurocontrol.int
 """
 import logging.config
+import os
 
 from flask import Flask
 from flask_cors import CORS
 from pkg_resources import resource_filename
 
+from aixm_graph import cache, jobs
 from aixm_graph.datasets.features import AIXMFeatureClassRegistry
 from aixm_graph.utils import load_config
 from aixm_graph.endpoints import aixm_graph_blueprint
+from aixm_graph.uploads import ParsingUploadRequest
 
 __author__ = "EUROCONTROL (SWIM)"
 
 
 def create_app(config_file: str) -> Flask:
     app = Flask(__name__)
+    app.request_class = ParsingUploadRequest
 
     app.register_blueprint(aixm_graph_blueprint)
     app_config = load_config(filename=config_file)
@@ -57,6 +61,23 @@ def create_app(config_file: str) -> Flask:
 
     AIXMFeatureClassRegistry.load_feature_classes(app.config['FEATURES'])
 
+    # persist the datasets on disk in order to be reopened after a restart
+    store_folder = app.config['DATASET_STORE_FOLDER']
+    cache.init_store(os.path.join(app.instance_path, store_folder) if store_folder else None)
+
+    # the datasets are processed by background threads
+    jobs.init_executor(app.config['PROCESSING_WORKERS'])
+
+    # the skeletons are generated in the background once their datasets are processed
+    cache.init_skeletons(gzip=app.config['GZIP_SKELETONS'])
+
+    # the graph pages are cached in order to be served again without being rebuilt
+    cache.init_graph_pages(max_entries=app.config['GRAPH_CACHE_MAX_ENTRIES'],
+                           max_bytes=app.config['GRAPH_CACHE_MAX_BYTES'])
+
+    # the least recently used datasets are evicted from memory beyond this budget
+    cache.init_memory_budget(app.config['DATASETS_MEMORY_BUDGET'])
+
     return app
 
 
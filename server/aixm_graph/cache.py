@@ -32,39 +32,441 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import os
+import threading
+import time
 import uuid
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import List, Optional, Dict, Any, Callable, Set
 
+from aixm_graph import jobs
+from aixm_graph.datasets.compression import GZIP_EXTENSION, COMPRESSION_EXTENSIONS, \
+    compressed_filepath, compress_file
 from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.lru import LRUCache
+from aixm_graph.store import DatasetStore
 
 """Acts as in memory database holding the datasets' information to be used by the API"""
 CACHE = {
     'datasets': {}
 }
 
+"""Persists the datasets on disk (if configured) so that they can be reopened after a restart and
+   shared among several server processes
+"""
+STORE: Optional[DatasetStore] = None
+
+"""Whether a gzipped copy of each skeleton is kept in order to be served to the clients that
+   accept it
+"""
+GZIP_SKELETONS: bool = False
+
+"""Keeps the serialized graph pages of the datasets' feature types so that paging back and forth
+   or several clients browsing the same feature type do not rebuild the same graphs. It is
+   disabled until configured.
+"""
+GRAPH_PAGES: LRUCache = LRUCache(max_entries=0, max_bytes=0)
+
+"""The memory (in bytes) the processed datasets can use altogether before the least recently used
+   ones are evicted. If 0 the datasets are never evicted.
+"""
+MEMORY_BUDGET: int = 0
+
+"""The ids of the datasets in the order they were last used, the least recently used first"""
+_LAST_USED: OrderedDict = OrderedDict()
+_last_used_lock = threading.Lock()
+
+"""The ids of the datasets that are not evicted regardless of the memory budget (if the datasets
+   are not persisted, otherwise they are kept in the store so that all the workers respect them)
+"""
+PINNED: Set[str] = set()
+
+"""The ids of the datasets that have been evicted and not reloaded yet"""
+EVICTED: Set[str] = set()
+
+"""The ids of the datasets that have been deleted by this worker"""
+DELETED: Set[str] = set()
+
+"""Serializes the deletion of the datasets with persisting the outcome of their processing, so
+   that nothing is persisted for a dataset deleted while being processed
+"""
+_datasets_lock = threading.RLock()
+
+
+def init_store(folder: Optional[str]) -> None:
+    """
+
+    :param folder: if None the datasets are kept only in memory
+    """
+    global STORE
+    STORE = DatasetStore(folder) if folder else None
+
+
+def init_skeletons(gzip: bool) -> None:
+    """
+
+    :param gzip: whether to keep a gzipped copy of each skeleton
+    """
+    global GZIP_SKELETONS
+    GZIP_SKELETONS = gzip
+
+
+def init_graph_pages(max_entries: int, max_bytes: int) -> None:
+    """
+
+    :param max_entries: if 0 the graph pages are not cached
+    :param max_bytes: the total size of the cached graph pages
+    """
+    global GRAPH_PAGES
+    GRAPH_PAGES = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def init_memory_budget(budget: int) -> None:
+    """
 
-def create_dataset(filepath: str) -> AIXMDataSet:
+    :param budget: in bytes, if 0 the datasets are never evicted
     """
+    global MEMORY_BUDGET
+    MEMORY_BUDGET = budget
+
+
+def create_dataset(filepath: str, **kwargs) -> AIXMDataSet:
+    """
+
+    :param filepath:
+    :param kwargs: options passed to the dataset
+    :return:
+    """
+    return add_dataset(AIXMDataSet(filepath, **kwargs), **kwargs)
+
+
+def add_dataset(dataset: AIXMDataSet, **kwargs) -> AIXMDataSet:
+    """
+    Adds a dataset that has been already created, i.e. parsed while being uploaded
 
     :param dataset:
+    :param kwargs: the options the dataset was created with
     :return:
     """
     global CACHE
-    dataset = AIXMDataSet(filepath)
     dataset.id = uuid.uuid4().hex[:6]
 
+    if STORE is not None:
+        STORE.add_entry(dataset_id=dataset.id,
+                        filepath=dataset.filepath,
+                        content_hash=dataset.content_hash,
+                        options=kwargs)
+
     CACHE['datasets'][dataset.id] = dataset
+    DELETED.discard(dataset.id)
+    GRAPH_PAGES.invalidate(dataset.id)
+    _mark_used(dataset)
 
     return CACHE['datasets'][dataset.id]
 
 
+def _reopen_dataset(entry: Dict[str, Any]) -> AIXMDataSet:
+    """
+    Recreates a dataset from its store entry. Its processed state is loaded in the background from
+    its snapshot (if any) upon being first requested by id.
+
+    :param entry:
+    :return:
+    """
+    dataset = AIXMDataSet(entry['filepath'], **entry['options'])
+    dataset.id = entry['id']
+    dataset.content_hash = entry['content_hash']
+
+    CACHE['datasets'][dataset.id] = dataset
+    GRAPH_PAGES.invalidate(dataset.id)
+
+    return dataset
+
+
+def _load_snapshot(dataset: AIXMDataSet) -> bool:
+    """
+    The dataset is in the `load` phase while its snapshot is unpickled.
+
+    :param dataset:
+    :return: whether the processed state of the dataset was found and loaded
+    """
+    if STORE is None or not STORE.has_snapshot(dataset.content_hash):
+        return False
+
+    dataset.progress = ProcessingProgress(phase=ProcessingProgress.LOAD)
+
+    snapshot = STORE.load_snapshot(dataset.content_hash)
+    if snapshot is None:
+        dataset.progress = ProcessingProgress()
+        return False
+
+    dataset.load_snapshot(snapshot)
+    _mark_reloaded(dataset)
+
+    return True
+
+
+def process_dataset(dataset: AIXMDataSet) -> AIXMDataSet:
+    """
+    Loads the processed state of the dataset from its snapshot if it exists, otherwise processes
+    the dataset and saves its snapshot.
+
+    The whole operation is locked per dataset content so that when several workers get a request
+    for the same unprocessed dataset only the first one processes it while the rest wait and load
+    its snapshot.
+
+    Once processed, the memory budget is enforced, the cached graph pages of the dataset (if any)
+    are invalidated and the generation of its skeleton is scheduled. Neither its snapshot is saved
+    nor its skeleton is generated if it has been deleted in the meantime.
+
+    :param dataset:
+    :return:
+    """
+    with STORE.lock(dataset.content_hash) if STORE is not None else nullcontext():
+        if not _load_snapshot(dataset):
+            if STORE is not None:
+                dataset.progress_callback = _make_store_progress_callback(dataset.content_hash)
+
+            dataset.process()
+
+            with _datasets_lock:
+                if _is_deleted(dataset):
+                    return dataset
+
+                _mark_reloaded(dataset)
+
+                if STORE is not None:
+                    STORE.save_snapshot(dataset.content_hash, dataset.to_snapshot())
+
+    GRAPH_PAGES.invalidate(dataset.id)
+
+    with _datasets_lock:
+        # the skeleton of a reloaded dataset has been generated already, while the skeleton of an
+        # evicted one is generated via the dataset that replaced it
+        if dataset.skeleton_filepath is None \
+                and CACHE['datasets'].get(dataset.id, dataset) is dataset \
+                and not _is_deleted(dataset):
+            schedule_skeleton_generation(dataset)
+
+    return dataset
+
+
+def _is_deleted(dataset: AIXMDataSet) -> bool:
+    """
+
+    :param dataset:
+    :return: whether the dataset has been deleted, i.e. by another worker if the datasets are
+             persisted
+    """
+    return dataset.id in DELETED or (STORE is not None and STORE.get_entry(dataset.id) is None)
+
+
+def _make_store_progress_callback(content_hash: str,
+                                  interval: float = 1.) -> Callable[[ProcessingProgress], None]:
+    """
+    Creates a callback that saves the processing progress of a dataset in the store so that it can
+    be reported by the other workers too. While parsing, the progress is saved at most once per
+    interval.
+
+    :param content_hash:
+    :param interval: in seconds
+    :return:
+    """
+    last_saved_at = 0.
+
+    def callback(progress: ProcessingProgress) -> None:
+        nonlocal last_saved_at
+
+        now = time.monotonic()
+        if progress.phase != ProcessingProgress.PARSE or now - last_saved_at >= interval:
+            STORE.save_status(content_hash, progress.to_json())
+            last_saved_at = now
+
+    return callback
+
+
+def _processing_job_id(dataset: AIXMDataSet) -> str:
+    return f'process_{dataset.id}'
+
+
+def schedule_processing(dataset: AIXMDataSet) -> Future:
+    """
+    Submits the processing of the dataset as a background job (unless it is already submitted).
+
+    :param dataset:
+    :return:
+    """
+    return jobs.submit(_processing_job_id(dataset), process_dataset, dataset)
+
+
+def ensure_processed(dataset: AIXMDataSet) -> bool:
+    """
+    Schedules the processing of the dataset if it is not processed yet. If the processing has
+    failed its error is raised and the job is discarded so that it can be retried.
+
+    :param dataset:
+    :return: whether the dataset is processed
+    """
+    if dataset.feature_type_stats is not None:
+        return True
+
+    job = schedule_processing(dataset)
+
+    if not job.done():
+        return False
+
+    jobs.discard(_processing_job_id(dataset))
+    job.result()
+
+    return True
+
+
+def get_processing_progress(dataset: AIXMDataSet) -> ProcessingProgress:
+    """
+    If the dataset is not being processed by this worker, it might be processed by another one,
+    thus its progress is looked up in the store.
+
+    :param dataset:
+    :return:
+    """
+    if STORE is not None and dataset.progress.phase == ProcessingProgress.QUEUED:
+        status = STORE.load_status(dataset.content_hash)
+
+        if status is not None:
+            return ProcessingProgress.from_json(status)
+
+    return dataset.progress
+
+
+def generate_skeleton(dataset: AIXMDataSet, compression: Optional[str] = None) -> str:
+    """
+    Generates the skeleton of the dataset along with its gzipped copy (if enabled) or its copy
+    compressed with the given compression.
+
+    If the datasets are persisted, a skeleton found in its path has been generated by another
+    worker (or before a restart) since the skeleton is renamed in place once complete. The
+    operation is locked per dataset content so that the skeleton is generated only once.
+
+    :param dataset:
+    :param compression: one of `COMPRESSION_EXTENSIONS`
+    :return: the path of the skeleton or its compressed copy
+    """
+    lock_name = f'{dataset.content_hash}.skeleton'
+
+    with STORE.lock(lock_name) if STORE is not None else nullcontext():
+        skeleton_filepath = dataset.make_skeleton_path()
+
+        if STORE is not None and os.path.exists(skeleton_filepath):
+            dataset.skeleton_filepath = skeleton_filepath
+        else:
+            skeleton_filepath = dataset.generate_skeleton()
+
+        copy_compression = GZIP_EXTENSION if compression is None and GZIP_SKELETONS \
+            else compression
+
+        if copy_compression is not None \
+                and not os.path.exists(compressed_filepath(skeleton_filepath, copy_compression)):
+            compress_file(skeleton_filepath, copy_compression)
+
+    return skeleton_filepath if compression is None else \
+        compressed_filepath(skeleton_filepath, compression)
+
+
+def _skeleton_job_id(dataset: AIXMDataSet, compression: Optional[str] = None) -> str:
+    return f'skeleton_{dataset.id}{compression or ""}'
+
+
+def schedule_skeleton_generation(dataset: AIXMDataSet, compression: Optional[str] = None) -> Future:
+    """
+    Submits the generation of the skeleton of the dataset as a background job (unless it is
+    already submitted).
+
+    :param dataset:
+    :param compression:
+    :return:
+    """
+    return jobs.submit(_skeleton_job_id(dataset, compression),
+                       generate_skeleton, dataset, compression)
+
+
+def ensure_skeleton(dataset: AIXMDataSet, compression: Optional[str] = None) -> Optional[str]:
+    """
+    Schedules the generation of the skeleton of the processed dataset (or its compressed copy) if
+    it is not generated yet. If the generation has failed its error is raised and the job is
+    discarded so that it can be retried.
+
+    :param dataset:
+    :param compression: one of `COMPRESSION_EXTENSIONS`
+    :return: the path of the skeleton (or its compressed copy) if it is generated
+    """
+    if dataset.skeleton_filepath is not None:
+        if compression is None:
+            return dataset.skeleton_filepath
+
+        filepath = compressed_filepath(dataset.skeleton_filepath, compression)
+        if os.path.exists(filepath):
+            return filepath
+
+    job = schedule_skeleton_generation(dataset, compression)
+
+    if not job.done():
+        return None
+
+    jobs.discard(_skeleton_job_id(dataset, compression))
+
+    return job.result()
+
+
+def get_skeleton_status(dataset: AIXMDataSet) -> Optional[str]:
+    """
+
+    :param dataset:
+    :return: one of 'ready', 'failed', 'generating' or None if the generation is not scheduled
+    """
+    if dataset.skeleton_filepath is not None:
+        return 'ready'
+
+    job = jobs.get_job(_skeleton_job_id(dataset))
+
+    if job is None:
+        return None
+
+    if not job.done():
+        return 'generating'
+
+    return 'failed' if job.exception() is not None else 'ready'
+
+
 def get_dataset_by_id(dataset_id: str) -> AIXMDataSet:
     """
 
     :param dataset_id:
     :return:
     """
-    return CACHE['datasets'].get(dataset_id)
+    dataset = CACHE['datasets'].get(dataset_id)
+
+    if dataset is None and STORE is not None:
+        entry = STORE.get_entry(dataset_id)
+
+        if entry is not None:
+            dataset = _reopen_dataset(entry)
+
+    if dataset is None:
+        return None
+
+    _mark_used(dataset)
+
+    # a reopened or evicted dataset is reloaded in the background from its snapshot if any, so
+    # that unpickling a large snapshot does not hold up the request, otherwise an evicted dataset
+    # is processed again
+    if dataset.feature_type_stats is None and \
+            (dataset.id in EVICTED or STORE is not None and STORE.has_snapshot(dataset.content_hash)):
+        schedule_processing(dataset)
+
+    return dataset
 
 
 def get_dataset_by_name(name: str) -> AIXMDataSet:
@@ -73,7 +475,7 @@ def get_dataset_by_name(name: str) -> AIXMDataSet:
     :param name:
     :return:
     """
-    for _, dataset in CACHE['datasets'].items():
+    for dataset in get_datasets():
         if dataset.name == name:
             return dataset
 
@@ -83,4 +485,207 @@ def get_datasets() -> List[AIXMDataSet]:
 
     :return:
     """
+    if STORE is not None:
+        entries = STORE.get_entries()
+
+        for entry in entries:
+            if entry['id'] not in CACHE['datasets']:
+                _reopen_dataset(entry)
+
+        # the datasets deleted by other workers
+        for dataset_id in set(CACHE['datasets']) - {entry['id'] for entry in entries}:
+            _forget_dataset(CACHE['datasets'][dataset_id])
+
     return list(CACHE['datasets'].values())
+
+
+def _mark_used(dataset: AIXMDataSet) -> None:
+    with _last_used_lock:
+        _LAST_USED[dataset.id] = None
+        _LAST_USED.move_to_end(dataset.id)
+
+
+def _mark_reloaded(dataset: AIXMDataSet) -> None:
+    """
+    Enforces the memory budget now that the processed state of the dataset is set, without
+    evicting the dataset itself, unless it has been deleted or evicted in the meantime.
+
+    :param dataset:
+    """
+    if CACHE['datasets'].get(dataset.id) is not dataset:
+        return
+
+    EVICTED.discard(dataset.id)
+    _mark_used(dataset)
+    enforce_memory_budget(keep=dataset)
+
+
+def get_datasets_by_last_use() -> List[AIXMDataSet]:
+    """
+
+    :return: the datasets in cache that have been used, the least recently used first
+    """
+    with _last_used_lock:
+        least_recently_used = list(_LAST_USED)
+
+    return [CACHE['datasets'][dataset_id] for dataset_id in least_recently_used
+            if dataset_id in CACHE['datasets']]
+
+
+def is_reloading(dataset: AIXMDataSet) -> bool:
+    """
+
+    :param dataset:
+    :return: whether the dataset has been evicted and its processed state is not reloaded yet
+    """
+    return dataset.id in EVICTED and dataset.feature_type_stats is None
+
+
+def get_pinned_ids() -> Set[str]:
+    """
+
+    :return:
+    """
+    if STORE is not None:
+        return {entry['id'] for entry in STORE.get_entries() if entry.get('pinned')}
+
+    return set(PINNED)
+
+
+def pin_dataset(dataset: AIXMDataSet, pinned: bool = True) -> None:
+    """
+    A pinned dataset is never evicted, though it is still deleted on request.
+
+    :param dataset:
+    :param pinned:
+    """
+    if STORE is not None:
+        STORE.update_entry(dataset.id, pinned=pinned)
+    elif pinned:
+        PINNED.add(dataset.id)
+    else:
+        PINNED.discard(dataset.id)
+
+
+def get_memory_usage() -> int:
+    """
+
+    :return: the approximate memory in bytes used by the processed datasets
+    """
+    return sum(dataset.memory_size for dataset in list(CACHE['datasets'].values())
+               if dataset.feature_type_stats is not None)
+
+
+def enforce_memory_budget(keep: Optional[AIXMDataSet] = None) -> List[AIXMDataSet]:
+    """
+    Evicts the least recently used processed datasets, except for the pinned ones, until their
+    memory usage fits in the budget.
+
+    :param keep: a dataset that should not be evicted, i.e. the one that is about to be used
+    :return: the evicted datasets
+    """
+    if not MEMORY_BUDGET:
+        return []
+
+    usage = get_memory_usage()
+    if usage <= MEMORY_BUDGET:
+        return []
+
+    pinned_ids = get_pinned_ids()
+    evicted = []
+
+    for dataset in get_datasets_by_last_use():
+        if usage <= MEMORY_BUDGET:
+            break
+
+        if dataset is keep or dataset.id in pinned_ids or dataset.feature_type_stats is None:
+            continue
+
+        evict_dataset(dataset)
+        usage -= dataset.memory_size
+        evicted.append(dataset)
+
+    return evicted
+
+
+def evict_dataset(dataset: AIXMDataSet) -> AIXMDataSet:
+    """
+    Replaces the dataset in cache with an unprocessed copy of it so that its processed state is
+    freed as soon as it is not used by any request. The copy keeps the skeleton of the dataset and
+    is reloaded upon being requested by id (see `get_dataset_by_id`).
+
+    :param dataset:
+    :return: the unprocessed copy
+    """
+    evicted = AIXMDataSet(dataset.filepath, **dataset.options)
+    evicted.id = dataset.id
+    evicted.content_hash = dataset.content_hash
+    evicted.skeleton_filepath = dataset.skeleton_filepath
+
+    CACHE['datasets'][dataset.id] = evicted
+    EVICTED.add(dataset.id)
+    GRAPH_PAGES.invalidate(dataset.id)
+    jobs.discard(_processing_job_id(dataset))
+
+    return evicted
+
+
+def _forget_dataset(dataset: AIXMDataSet) -> None:
+    CACHE['datasets'].pop(dataset.id, None)
+
+    with _last_used_lock:
+        _LAST_USED.pop(dataset.id, None)
+
+    PINNED.discard(dataset.id)
+    EVICTED.discard(dataset.id)
+    GRAPH_PAGES.invalidate(dataset.id)
+
+    jobs.discard(_processing_job_id(dataset))
+    for compression in (None,) + COMPRESSION_EXTENSIONS:
+        jobs.discard(_skeleton_job_id(dataset, compression))
+
+
+def delete_dataset(dataset: AIXMDataSet, remove_files: bool = False) -> None:
+    """
+    Removes the dataset from cache, so that its memory is freed as soon as it is not used by any
+    request, along with its store entry. Its snapshot and files are removed too unless they are
+    shared with other datasets, i.e. uploads of the same content or file.
+
+    :param dataset:
+    :param remove_files: whether to remove the dataset file and its skeleton as well
+    """
+    with _datasets_lock:
+        _delete_dataset(dataset, remove_files)
+
+
+def _delete_dataset(dataset: AIXMDataSet, remove_files: bool) -> None:
+    _forget_dataset(dataset)
+    DELETED.add(dataset.id)
+
+    if STORE is not None:
+        STORE.remove_entry(dataset.id)
+
+    datasets = get_datasets()
+
+    if STORE is not None and all(other.content_hash != dataset.content_hash for other in datasets):
+        STORE.remove_snapshot(dataset.content_hash)
+
+    if not remove_files:
+        return
+
+    # the skeleton and the columns are shared by the datasets of the same content and name
+    filepaths = []
+    if all(other.filepath != dataset.filepath for other in datasets):
+        filepaths.append(dataset.filepath)
+
+    skeleton_filepath = dataset.make_skeleton_path()
+    if all(other.make_skeleton_path() != skeleton_filepath for other in datasets):
+        filepaths += [skeleton_filepath, dataset.make_columns_path()] + \
+                     [compressed_filepath(skeleton_filepath, compression)
+                      for compression in COMPRESSION_EXTENSIONS]
+
+    for filepath in filepaths:
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,309 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+__author__ = "EUROCONTROL (SWIM)"
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Sequence, Tuple, Optional, Type
+
+from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureTimeSlice, GMLProperty
+from aixm_graph.datasets.fields import Field, XLinkField
+
+"""Identifies the files written by `write_columns` along with the version of their layout"""
+MAGIC = b'AIXMCOL1'
+
+"""The typecode of each column. The fields of the time slices are stored in the same columns, each
+   time slice followed by its data fields and then its xlinks, so that a time slice only needs to
+   know where its own row is and how many fields and xlinks follow it.
+"""
+COLUMN_TYPES = {
+    'feature_ts_offsets': 'q',
+    'ts_field_rows': 'q',
+    'ts_data_fields_counts': 'i',
+    'ts_xlinks_counts': 'i',
+    'ts_versions': 'i',
+    'ts_gml_offsets': 'q',
+    'field_names': 'i',
+    'field_prefixes': 'i',
+    'field_texts': 'i',
+    'field_broken': 'b',
+    'field_attrib_offsets': 'q',
+    'attrib_keys': 'i',
+    'attrib_values': 'i',
+    'gml_ids': 'i',
+    'gml_names': 'i',
+    'gml_serializable': 'b',
+    'string_offsets': 'q',
+    'string_heap': 'B',
+}
+
+NO_STRING = -1
+
+
+class _ColumnsWriter:
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, array] = {name: array(typecode)
+                                          for name, typecode in COLUMN_TYPES.items()}
+        self.columns['feature_ts_offsets'].append(0)
+        self.columns['ts_gml_offsets'].append(0)
+        self.columns['field_attrib_offsets'].append(0)
+        self.columns['string_offsets'].append(0)
+
+        self._string_ids: Dict[str, int] = {}
+
+    def add_string(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+
+        string_id = self._string_ids.get(value)
+
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._string_ids)
+            self.columns['string_heap'].frombytes(value.encode('utf-8'))
+            self.columns['string_offsets'].append(len(self.columns['string_heap']))
+
+        return string_id
+
+    def add_field(self, field: Field) -> None:
+        columns = self.columns
+        columns['field_names'].append(self.add_string(field.name))
+        columns['field_prefixes'].append(self.add_string(field.prefix))
+        columns['field_texts'].append(self.add_string(field.text))
+        columns['field_broken'].append(getattr(field, 'is_broken', False))
+
+        for key, value in field._attrib:
+            columns['attrib_keys'].append(self.add_string(key))
+            columns['attrib_values'].append(self.add_string(value))
+        columns['field_attrib_offsets'].append(len(columns['attrib_keys']))
+
+    def add_time_slice(self, time_slice: AIXMFeatureTimeSlice) -> None:
+        columns = self.columns
+        columns['ts_field_rows'].append(len(columns['field_names']))
+        columns['ts_versions'].append(self.add_string(time_slice.version))
+
+        self.add_field(time_slice)
+
+        data_fields, xlinks = list(time_slice.data_fields), list(time_slice.xlinks)
+        columns['ts_data_fields_counts'].append(len(data_fields))
+        columns['ts_xlinks_counts'].append(len(xlinks))
+
+        for field in data_fields + xlinks:
+            self.add_field(field)
+
+        for gml_property in time_slice.gml_properties:
+            columns['gml_ids'].append(self.add_string(gml_property.id))
+            columns['gml_names'].append(self.add_string(gml_property.name))
+            columns['gml_serializable'].append(gml_property.serializable)
+        columns['ts_gml_offsets'].append(len(columns['gml_ids']))
+
+    def add_feature(self, feature: AIXMFeature) -> None:
+        for time_slice in feature.time_slices:
+            self.add_time_slice(time_slice)
+
+        self.columns['feature_ts_offsets'].append(len(self.columns['ts_field_rows']))
+
+
+def write_columns(path: str, features: Sequence[AIXMFeature]) -> str:
+    """
+    Writes the time slices of the features (along with their fields, xlinks and GML properties) in
+    a file of flat columns and a heap of the distinct strings they refer to. The file starts with a
+    header that locates each column and every column is aligned to 8 bytes, so that it can be
+    memory mapped and read in place (see `FeatureColumns`).
+
+    The file is written under a temporary name and renamed once complete, so that the processes
+    that have mapped a previous file in the same path keep reading it undisturbed.
+
+    :param path:
+    :param features: in the order of their position
+    :return: the path of the file
+    """
+    writer = _ColumnsWriter()
+    for feature in features:
+        writer.add_feature(feature)
+
+    header, offset = {}, 0
+    for name, column in writer.columns.items():
+        header[name] = (offset, len(column))
+        offset += -(-len(column) * column.itemsize // 8) * 8
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // 8) * 8
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<q', len(header_bytes)) + header_bytes)
+
+        for name, column in writer.columns.items():
+            f.seek(data_start + header[name][0])
+            column.tofile(f)
+
+        # the last column might need padding
+        f.truncate(data_start + offset)
+
+    os.replace(tmp_path, path)
+
+    return path
+
+
+class FeatureColumns:
+
+    def __init__(self, path: str) -> None:
+        """
+        Reads the time slices of the features from a file written by `write_columns` without
+        loading it, i.e. every column is a view over the memory mapped file, thus its pages are
+        loaded on access and shared via the page cache among the processes that map the same file.
+
+        The time slices are recreated on every access and are not kept by the features.
+
+        :param path:
+        """
+        self.path = path
+
+        """The strings that are repeated across the fields, i.e. names, prefixes and attribute keys,
+           per string id, so that they are decoded once
+        """
+        self._symbols: Dict[int, str] = {}
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a columns file')
+
+        header_size, = struct.unpack_from('<q', self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_size])
+        data_start = -(-(header_start + header_size) // 8) * 8
+
+        buffer = memoryview(self._mmap)
+        for name, (offset, length) in header.items():
+            typecode = COLUMN_TYPES[name]
+            start = data_start + offset
+            column = buffer[start:start + length * array(typecode).itemsize].cast(typecode)
+            setattr(self, name, column)
+
+    def __len__(self) -> int:
+        return len(self.feature_ts_offsets) - 1
+
+    def get_string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_STRING:
+            return None
+
+        return str(self.string_heap[self.string_offsets[string_id]:
+                                    self.string_offsets[string_id + 1]], 'utf-8')
+
+    def _get_symbol(self, string_id: int) -> Optional[str]:
+        symbol = self._symbols.get(string_id)
+
+        if symbol is None:
+            symbol = self.get_string(string_id)
+            if symbol is not None:
+                symbol = self._symbols[string_id] = sys.intern(symbol)
+
+        return symbol
+
+    def _get_field(self, field_class: Type[Field], row: int) -> Field:
+        field = field_class.__new__(field_class)
+        field.name = self._get_symbol(self.field_names[row])
+        field.prefix = self._get_symbol(self.field_prefixes[row])
+        field.text = self.get_string(self.field_texts[row])
+        field._attrib = tuple(
+            (self._get_symbol(self.attrib_keys[i]), self.get_string(self.attrib_values[i]))
+            for i in range(self.field_attrib_offsets[row], self.field_attrib_offsets[row + 1])
+        )
+
+        return field
+
+    def _get_xlink(self, row: int) -> XLinkField:
+        xlink = self._get_field(XLinkField, row)
+        xlink._href, xlink._title, xlink._broken = None, None, bool(self.field_broken[row])
+
+        return xlink
+
+    def _get_gml_property(self, index: int) -> GMLProperty:
+        gml_property = GMLProperty.__new__(GMLProperty)
+        gml_property.id = self.get_string(self.gml_ids[index])
+        gml_property.name = self._get_symbol(self.gml_names[index])
+        gml_property.serializable = bool(self.gml_serializable[index])
+
+        return gml_property
+
+    def _get_time_slice(self, ts_index: int) -> AIXMFeatureTimeSlice:
+        row = self.ts_field_rows[ts_index]
+        data_fields_count = self.ts_data_fields_counts[ts_index]
+        xlinks_count = self.ts_xlinks_counts[ts_index]
+
+        time_slice = self._get_field(AIXMFeatureTimeSlice, row)
+        time_slice.version = self._get_symbol(self.ts_versions[ts_index])
+
+        data_fields_start = row + 1
+        xlinks_start = data_fields_start + data_fields_count
+        time_slice._data_fields = [self._get_field(Field, data_row)
+                                   for data_row in range(data_fields_start, xlinks_start)]
+        time_slice._xlinks = [self._get_xlink(xlink_row)
+                              for xlink_row in range(xlinks_start, xlinks_start + xlinks_count)]
+        time_slice._gml_properties = [
+            self._get_gml_property(i)
+            for i in range(self.ts_gml_offsets[ts_index], self.ts_gml_offsets[ts_index + 1])
+        ]
+
+        return time_slice
+
+    def get_time_slices(self, position: int) -> List[AIXMFeatureTimeSlice]:
+        """
+
+        :param position: the position of the feature
+        :return:
+        """
+        return [self._get_time_slice(ts_index)
+                for ts_index in range(self.feature_ts_offsets[position],
+                                      self.feature_ts_offsets[position + 1])]
+
+    def get_time_slices_count(self, position: int) -> int:
+        """
+
+        :param position: the position of the feature
+        :return:
+        """
+        return self.feature_ts_offsets[position + 1] - self.feature_ts_offsets[position]
+
+    def __getstate__(self) -> Tuple[str]:
+        # the memory map is not pickled but mapped again
+        return self.path,
+
+    def __setstate__(self, state: Tuple[str]) -> None:
+        self.__init__(*state)
@@ -0,0 +1,233 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import Optional, BinaryIO, Iterator, Any
+
+GZIP_EXTENSION = '.gz'
+
+"""The extensions of the supported compressed dataset files along with the respective opener of
+   their decompressed content
+"""
+DECOMPRESSORS = {
+    GZIP_EXTENSION: lambda fileobj: gzip.GzipFile(fileobj=fileobj, mode='rb'),
+    '.bz2': lambda fileobj: bz2.BZ2File(fileobj, mode='rb'),
+    '.xz': lambda fileobj: lzma.LZMAFile(fileobj, mode='rb'),
+}
+
+"""The openers of compressed files for writing per compression extension"""
+COMPRESSORS = {
+    GZIP_EXTENSION: lambda filepath: gzip.open(filepath, 'wb', compresslevel=6),
+    '.bz2': lambda filepath: bz2.open(filepath, 'wb'),
+    '.xz': lambda filepath: lzma.open(filepath, 'wb'),
+}
+
+"""The decompressors of the content of compressed files fed in blocks, i.e. while being uploaded.
+   Zip archives cannot be decompressed this way since their directory is found at their end.
+"""
+INCREMENTAL_DECOMPRESSORS = {
+    GZIP_EXTENSION: lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+    '.bz2': bz2.BZ2Decompressor,
+    '.xz': lzma.LZMADecompressor,
+}
+
+ZIP_EXTENSION = '.zip'
+
+COMPRESSION_EXTENSIONS = tuple(DECOMPRESSORS) + (ZIP_EXTENSION,)
+
+MIMETYPES = {
+    GZIP_EXTENSION: 'application/gzip',
+    '.bz2': 'application/x-bzip2',
+    '.xz': 'application/x-xz',
+    ZIP_EXTENSION: 'application/zip',
+}
+
+
+def get_compression(filepath: str) -> Optional[str]:
+    """
+
+    :param filepath:
+    :return: the compression extension of the file (if any) i.e. `.gz`
+    """
+    _, ext = os.path.splitext(filepath)
+
+    return ext.lower() if ext.lower() in COMPRESSION_EXTENSIONS else None
+
+
+def strip_compression(filepath: str) -> str:
+    """
+    Example: `dataset.xml.gz` -> `dataset.xml`, `dataset.zip` -> `dataset.xml`
+
+    :param filepath:
+    :return: the path of the decompressed content of the file
+    """
+    compression = get_compression(filepath)
+
+    if compression is None:
+        return filepath
+
+    filepath = filepath[:-len(compression)]
+
+    return filepath if os.path.splitext(filepath)[1] else f'{filepath}.xml'
+
+
+class IncrementalDecompressor:
+
+    def __init__(self, compression: Optional[str]) -> None:
+        """
+        Decompresses the content of a file that is fed in consecutive blocks. Files made of several
+        concatenated streams are supported as well.
+
+        :param compression: one of `INCREMENTAL_DECOMPRESSORS` or None if the file is not compressed
+        """
+        if compression is not None and compression not in INCREMENTAL_DECOMPRESSORS:
+            raise ValueError(f'{compression} files cannot be decompressed incrementally')
+
+        self._factory = INCREMENTAL_DECOMPRESSORS.get(compression)
+        self._decompressor = self._factory() if self._factory is not None else None
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+
+        :param data: the next block of the file
+        :return: the decompressed content of the block
+        """
+        if self._decompressor is None:
+            return data
+
+        result = []
+        while data:
+            if self._decompressor.eof:
+                self._decompressor = self._factory()
+
+            result.append(self._decompressor.decompress(data))
+            data = self._decompressor.unused_data if self._decompressor.eof else b''
+
+        return b''.join(result)
+
+
+def _find_zip_member(zip_file: zipfile.ZipFile) -> zipfile.ZipInfo:
+    """
+    The dataset is the first XML file of the archive, or else its first file
+
+    :param zip_file:
+    :return:
+    """
+    members = [info for info in zip_file.infolist() if not info.is_dir()]
+
+    if not members:
+        raise ValueError('The zip archive contains no file')
+
+    return next((info for info in members if info.filename.lower().endswith('.xml')), members[0])
+
+
+@contextmanager
+def decompressed(fileobj: Any, filepath: str) -> Iterator[BinaryIO]:
+    """
+    Decompresses the content of the given file object on the fly while being read, according to
+    the compression of its file (if any).
+
+    :param fileobj: the binary file object of the file on disk
+    :param filepath:
+    :return: a binary file object over the decompressed content
+    """
+    compression = get_compression(filepath)
+
+    if compression is None:
+        yield fileobj
+    elif compression == ZIP_EXTENSION:
+        with zipfile.ZipFile(fileobj) as zip_file:
+            with zip_file.open(_find_zip_member(zip_file)) as member:
+                yield member
+    else:
+        with DECOMPRESSORS[compression](fileobj) as decompressed_fileobj:
+            yield decompressed_fileobj
+
+
+@contextmanager
+def open_dataset_file(filepath: str) -> Iterator[BinaryIO]:
+    """
+    Opens the dataset file for reading. In case it is compressed its content is decompressed on the
+    fly while being read.
+
+    :param filepath:
+    :return: a binary file object over the (decompressed) content of the file
+    """
+    with open(filepath, 'rb') as f, decompressed(f, filepath) as fileobj:
+        yield fileobj
+
+
+def compressed_filepath(filepath: str, compression: str) -> str:
+    """
+    Example: (`skeleton.xml`, `.gz`) -> `skeleton.xml.gz`, (`skeleton.xml`, `.zip`) -> `skeleton.zip`
+
+    :param filepath:
+    :param compression:
+    :return:
+    """
+    if compression == ZIP_EXTENSION:
+        return f'{os.path.splitext(filepath)[0]}{ZIP_EXTENSION}'
+
+    return f'{filepath}{compression}'
+
+
+def compress_file(filepath: str, compression: str) -> str:
+    """
+    Creates a compressed copy of a file next to it. The copy is written under a temporary name and
+    renamed once complete.
+
+    :param filepath:
+    :param compression: one of `COMPRESSION_EXTENSIONS`
+    :return: the path of the compressed copy
+    """
+    target_filepath = compressed_filepath(filepath, compression)
+    tmp_filepath = f'{target_filepath}.tmp'
+
+    if compression == ZIP_EXTENSION:
+        with zipfile.ZipFile(tmp_filepath, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.write(filepath, arcname=os.path.basename(filepath))
+    else:
+        with open(filepath, 'rb') as f, COMPRESSORS[compression](tmp_filepath) as compressed:
+            shutil.copyfileobj(f, compressed, length=1024 * 1024)
+
+    os.replace(tmp_filepath, target_filepath)
+
+    return target_filepath
@@ -31,18 +31,39 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 __author__ = "EUROCONTROL (SWIM)"
 
+import mmap
 import os
-from collections import defaultdict
-from functools import reduce
-from itertools import islice
-from typing import Optional, Dict, Union
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat, islice
+from multiprocessing import get_context
+from typing import Optional, Dict, List, Sequence, Any, Callable, Tuple, BinaryIO, Set, \
+    Iterator, Iterable, Generator, Union
 
 from lxml import etree
 
-from aixm_graph import EXTENSION_PREFIX, EXTENSION_NS, GML_NS
-from aixm_graph.datasets.features import AIXMFeatureFactory, AIXMFeature
-from aixm_graph.datasets.fields import XLinkField, Extension
-from aixm_graph.graph import Graph, Node, Edge
+from aixm_graph import EXTENSION_PREFIX, EXTENSION_NS, GML_NS, XLINK_NS
+from aixm_graph.datasets.columnar import write_columns, FeatureColumns
+from aixm_graph.datasets.compression import open_dataset_file, decompressed, get_compression, \
+    strip_compression
+from aixm_graph.datasets.features import AIXMFeatureFactory, AIXMFeature, \
+    AIXMFeatureClassRegistry, AIXMFeatureTimeSlice, GMLProperty
+from aixm_graph.datasets.parallel import find_member_offsets, read_prolog, split_into_chunks, \
+    parse_chunk, parse_fragment, members_are_delimited, MemberOffsetScanner, ScanningReader, \
+    feature_from_record
+from aixm_graph.datasets.fields import Extension, XLinkField
+from aixm_graph.datasets.lazy import MemberOutliner, MemberOutline, MemberTimeSlices
+from aixm_graph.datasets.skeleton import StreamingTreeWriter
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.datasets.text_index import TrigramIndex
+from aixm_graph.graph import Graph, Node, Edge, SerializedNode, GraphTraversal
+from aixm_graph.utils import file_content_hash, deep_getsizeof
 
 
 class AIXMDataSet:
@@ -50,11 +71,64 @@ class AIXMDataSet:
     basic_message_tag = 'AIXMBasicMessage'
     sequence_tag = 'hasMember'
 
-    def __init__(self, filepath: str) -> None:
+    """How many counts of filtered features are kept (see `count_features`)"""
+    max_kept_counts = 1024
+
+    """How many features are measured in order to estimate the memory size of all of them"""
+    memory_size_sample = 256
+
+    """How many outlined features keep their time slices once parsed (see `lazy`)"""
+    max_parsed_features = 4096
+
+    """The attributes that hold the outcome of `process` and can be saved in a snapshot"""
+    snapshot_attrs = (
+        '_feature_type_stats',
+        '_features_per_gml_id',
+        '_features_per_identifier',
+        '_features_per_gml_property_id',
+        '_features_per_type',
+        '_features_per_position',
+        '_gml_properties_per_id',
+        '_reverse_offsets',
+        '_reverse_sources',
+        '_forward_offsets',
+        '_forward_targets',
+        '_text_indices',
+        '_member_offsets',
+        '_member_per_position',
+        '_sequence_ns',
+        '_ns_map',
+        '_processed_at',
+        '_member_time_slices',
+    )
+
+    def __init__(self,
+                 filepath: str,
+                 text_index: bool = False,
+                 parse_workers: int = 0,
+                 precompute_graphs: bool = False,
+                 columnar: bool = False,
+                 lazy: bool = False) -> None:
         """
         Holds the dataset data from the parsing point and produces the graph and skeleton file.
 
         :param filepath:
+        :param text_index: whether to build an inverted index over the fields' text of each
+                           feature type during processing in order to speed up filtering by value
+        :param parse_workers: if more than one, the file is split in chunks of members which are
+                              parsed by this number of processes
+        :param precompute_graphs: whether to serialize the node and collect the adjacency of each
+                                  feature during processing so that the graphs are assembled from
+                                  them instead of being created on each request
+        :param columnar: whether to write the time slices of the features in a memory mapped file
+                         of columns during processing and read them from there on access, instead
+                         of keeping them in memory. The features themselves, their references and
+                         the indices of the dataset are still kept in memory
+        :param lazy: whether to outline the members of the file instead of parsing them, i.e. to
+                     extract only the type, ids and xlink references of the features, and to
+                     parse the time slices of each feature from its member on first access. The
+                     graphs are not precomputed and the text is not indexed since they need the
+                     time slices of all the features, neither are they written in columns.
         """
         """A unique identifier that is acquired upon being saved in cache (memory)"""
         self.id: Optional[int] = None
@@ -66,11 +140,87 @@ class AIXMDataSet:
 
         self._filepath: str = filepath
 
+        """The SHA-256 of the dataset file, calculated on first access unless it is already known"""
+        self._content_hash: Optional[str] = None
+
         """The below dicts serve as indices for faster access."""
         self._features_per_gml_id: Dict[str, AIXMFeature] = {}
         self._features_per_identifier: Dict[str, AIXMFeature] = {}
         self._features_per_gml_property_id: Dict[str, AIXMFeature] = {}
 
+        """Keeps the features of each type in the order they were found in the dataset"""
+        self._features_per_type: Dict[str, List[AIXMFeature]] = defaultdict(list)
+
+        """All the features in the order they were found in the dataset (see
+           `AIXMFeature.position`)
+        """
+        self._features_per_position: List[AIXMFeature] = []
+
+        self._gml_properties_per_id: Dict[str, GMLProperty] = {}
+
+        """The reverse associations (extensions) in CSR form: the positions of the features that
+           refer to the feature at position `i` are `_reverse_sources[_reverse_offsets[i]:
+           _reverse_offsets[i + 1]]`, in the order the references were found in the dataset.
+        """
+        self._reverse_offsets: array = array('q')
+        self._reverse_sources: array = array('q')
+
+        """The (resolved) associations in CSR form as well: the positions of the features that the
+           feature at position `i` refers to are `_forward_targets[_forward_offsets[i]:
+           _forward_offsets[i + 1]]`
+        """
+        self._forward_offsets: array = array('q')
+        self._forward_targets: array = array('q')
+
+        self._text_index_enabled: bool = text_index
+
+        """The number of the features per (type, field value) that have been counted so far"""
+        self._counts_per_filter: OrderedDict = OrderedDict()
+
+        self._parse_workers: int = parse_workers
+
+        """The inverted indices of the fields' text per feature type (if enabled)"""
+        self._text_indices: Dict[str, TrigramIndex] = {}
+
+        self._precompute_graphs_enabled: bool = precompute_graphs
+
+        """The serialized node of each feature per feature position (if enabled)"""
+        self._node_per_position: List[str] = []
+
+        """The adjacency of each feature per feature position (if enabled), i.e. its distinct edges
+           in the order they are added in its graph as (target id, serialized target node,
+           direction, version, is broken)
+        """
+        self._adjacency_per_position: List[Tuple[Tuple[str, str, str, str, bool], ...]] = []
+
+        self._columnar_enabled: bool = columnar
+
+        self._lazy_enabled: bool = lazy
+
+        """Provides the time slices of the features if they have been outlined (see `lazy`)"""
+        self._member_time_slices: Optional[MemberTimeSlices] = None
+
+        """The xlink references of the outlined features per feature position (None for the parsed
+           ones) which are kept only until the associations are created
+        """
+        self._hrefs_per_position: List[Optional[Tuple[str, ...]]] = []
+
+        """The byte offsets of the members (sequence elements) in the file followed by the offset
+           right after the last one, so that the span of member `i` is `_member_offsets[i]:
+           _member_offsets[i + 1]`. It is left empty if the members could not be located reliably.
+        """
+        self._member_offsets: array = array('q')
+
+        """The index of the member each feature was extracted from, per feature position"""
+        self._member_per_position: array = array('q')
+        self._members_count: int = 0
+
+        """The XML declaration and the namespaces of the root, used to parse single members"""
+        self._prolog: Optional[Tuple[bytes, Dict[Optional[str], str]]] = None
+
+        """The last member parsed by `get_gml_element` as (index, element)"""
+        self._last_member: Optional[Tuple[int, etree.Element]] = None
+
         """Holds the namespace of the sequence element (if any), i.e. `hasMember` to be used 
            in skeleton generation
         """
@@ -79,7 +229,28 @@ class AIXMDataSet:
         """Is updated with the namespaces of each element and initialized with the extension ns"""
         self._ns_map: Dict[str, str] = {EXTENSION_PREFIX: EXTENSION_NS}
 
-        self._skeleton_filepath: Optional[str] = None
+        """The path of the skeleton file once it is generated"""
+        self.skeleton_filepath: Optional[str] = None
+
+        """The incremental parser of the content that is fed while being uploaded (if any)"""
+        self._pull_parser: Optional[etree.XMLPullParser] = None
+        self._member_offset_scanner: Optional[MemberOffsetScanner] = None
+
+        """When the dataset was processed (seconds since the epoch). It is persisted in the snapshot
+           so that along with the content hash it identifies the version of the processed state
+        """
+        self._processed_at: Optional[float] = None
+
+        """The approximate size in bytes of the processed state, estimated once it is set"""
+        self._memory_size: int = 0
+
+        """Keeps track of the processing and, if set, the callback is notified on its updates"""
+        self.progress: ProcessingProgress = ProcessingProgress()
+        self.progress_callback: Optional[Callable[[ProcessingProgress], None]] = None
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
 
     @property
     def name(self) -> str:
@@ -99,24 +270,114 @@ class AIXMDataSet:
             yield feature
 
     @property
-    def feature_type_stats(self) -> Dict[str, int]:
+    def feature_type_stats(self) -> Optional[Dict[str, int]]:
         """
+        The dataset is considered processed once its stats are set, which are set only after the
+        rest of its processed state is, i.e. by the end of `process` or `load_snapshot`.
 
-        :return:
+        :return: None if the dataset is not processed yet
         """
         return self._feature_type_stats
 
+    @property
+    def processed_at(self) -> Optional[float]:
+        return self._processed_at
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """
+        :return: the options the dataset was created with
+        """
+        return {
+            'text_index': self._text_index_enabled,
+            'parse_workers': self._parse_workers,
+            'precompute_graphs': self._precompute_graphs_enabled,
+            'columnar': self._columnar_enabled,
+            'lazy': self._lazy_enabled
+        }
+
+    @property
+    def memory_size(self) -> int:
+        return self._memory_size
+
+    @property
+    def version(self) -> Optional[str]:
+        """
+        Identifies the processed state of the dataset via its content hash and the time it was
+        processed, so that it changes whenever the dataset is processed again while it remains the
+        same when its snapshot is loaded, i.e. across restarts and workers. It is None until the
+        dataset is processed or its snapshot is loaded.
+        """
+        if self._processed_at is None:
+            return None
+
+        return f'{self.content_hash}.{round(self._processed_at * 1000000):x}'
+
+    @property
+    def content_hash(self) -> str:
+        """
+
+        :return:
+        """
+        if self._content_hash is None:
+            self._content_hash = file_content_hash(self._filepath)
+
+        return self._content_hash
+
+    @content_hash.setter
+    def content_hash(self, value: str) -> None:
+        self._content_hash = value
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Extracts the processed state of the dataset so that it can be persisted and loaded later
+        without processing the dataset file again.
+
+        :return:
+        """
+        return {attr: getattr(self, attr) for attr in self.snapshot_attrs}
+
+    def load_snapshot(self, snapshot: Dict[str, Any]):
+        """
+
+        :param snapshot: as returned by `to_snapshot`
+        :return: AIXMDataSet
+        """
+        for attr in self.snapshot_attrs:
+            if attr != '_feature_type_stats':
+                setattr(self, attr, snapshot[attr])
+
+        if self._member_time_slices is not None:
+            self._member_time_slices.bind(self._parse_time_slices)
+        elif self._precompute_graphs_enabled:
+            self._precompute_graphs()
+
+        self._counts_per_filter.clear()
+        self._memory_size = self._estimate_memory_size()
+        self._feature_type_stats = snapshot['_feature_type_stats']
+        self._set_progress(phase=ProcessingProgress.DONE)
+
+        return self
+
+    def _set_progress(self, **kwargs) -> None:
+        """
+        Updates the processing progress and notifies the callback (if any)
+
+        :param kwargs: the attributes of ProcessingProgress to be updated
+        """
+        for attr, value in kwargs.items():
+            setattr(self.progress, attr, value)
+
+        if self.progress_callback is not None:
+            self.progress_callback(self.progress)
+
     def has_feature_type_name(self, name: str) -> bool:
         """
 
         :param name:
         :return:
         """
-        for feature in self.features:
-            if feature.name == name:
-                return True
-
-        return False
+        return name in self._features_per_type
 
     def get_feature_by_id(self, feature_id: str) -> AIXMFeature:
         """
@@ -128,33 +389,207 @@ class AIXMDataSet:
             or self._features_per_identifier.get(feature_id) \
             or self._features_per_gml_property_id.get(feature_id)
 
+    def get_features_by_type(self, name: str) -> Sequence[AIXMFeature]:
+        """
+
+        :param name:
+        :return:
+        """
+        return self._features_per_type.get(name, [])
+
     def filter_features(self,
                         name: str,
-                        field_value: Optional[str] = None):
+                        field_value: Optional[str] = None) -> Sequence[AIXMFeature]:
         """
-        Filters the features per name and/or field value
+        Filters the features per name and/or field value. Only the features of the given type are
+        visited, and if no field value is provided the type index is returned as is.
+
+        If a text index exists for the type, only the features it returns as candidates are checked
+        against the field value.
 
         :param name:
         :param field_value:
-        :return: Generator[AIXMFeature]
+        :return:
         """
-        features = (feature for feature in self.features if feature.name == name)
+        features = self.get_features_by_type(name)
 
         if field_value:
-            features = (feature for feature in features if feature.matches_field_value(field_value))
+            text_index = self._text_indices.get(name)
+            positions = text_index.candidates(field_value) if text_index is not None else None
+
+            if positions is not None:
+                features = [features[position] for position in positions]
+
+            features = [feature for feature in features if feature.matches_field_value(field_value)]
 
         return features
 
+    def _iter_matching_positions(self,
+                                 name: str,
+                                 field_value: Optional[str] = None,
+                                 start: int = 0,
+                                 backwards: bool = False) -> Iterator[int]:
+        """
+        Iterates over the positions, among the features of the given type, of the features that
+        match the field value (see `filter_features`) starting from the given position, so that
+        a page of them can be found without filtering all of them.
+
+        :param name:
+        :param field_value:
+        :param start:
+        :param backwards: if True, the positions before `start` are iterated in reverse order
+        :return:
+        """
+        features = self.get_features_by_type(name)
+        positions = range(start - 1, -1, -1) if backwards else range(start, len(features))
+
+        if not field_value:
+            yield from positions
+            return
+
+        text_index = self._text_indices.get(name)
+        candidates = text_index.candidates(field_value) if text_index is not None else None
+
+        if candidates is not None:
+            if backwards:
+                positions = reversed(candidates[:bisect_left(candidates, start)])
+            else:
+                positions = candidates[bisect_left(candidates, start):]
+
+        for position in positions:
+            if features[position].matches_field_value(field_value):
+                yield position
+
+    def get_features_page(self,
+                          name: str,
+                          field_value: Optional[str],
+                          start: int,
+                          limit: int) -> Tuple[List[AIXMFeature], Optional[int]]:
+        """
+        Retrieves a page of the features of the given type that match the field value (if any),
+        starting from the given position among the features of the type.
+
+        :param name:
+        :param field_value:
+        :param start:
+        :param limit:
+        :return: the features of the page and the position the next page starts from (if any)
+        """
+        features = self.get_features_by_type(name)
+        positions = list(islice(self._iter_matching_positions(name, field_value, start), limit + 1))
+        next_start = positions.pop() if len(positions) > limit else None
+
+        return [features[position] for position in positions], next_start
+
+    def get_prev_page_start(self,
+                            name: str,
+                            field_value: Optional[str],
+                            start: int,
+                            limit: int) -> Optional[int]:
+        """
+
+        :param name:
+        :param field_value:
+        :param start: the position the current page starts from
+        :param limit:
+        :return: the position the previous page starts from (if any)
+        """
+        positions = list(islice(self._iter_matching_positions(name, field_value, start,
+                                                              backwards=True), limit))
+
+        return positions[-1] if positions else None
+
+    def get_page_start(self, name: str, field_value: Optional[str], offset: int) -> int:
+        """
+
+        :param name:
+        :param field_value:
+        :param offset: among the matching features
+        :return: the position, among the features of the type, of the feature at the offset
+        """
+        return next(islice(self._iter_matching_positions(name, field_value), offset, None),
+                    len(self.get_features_by_type(name)))
+
+    def count_features(self, name: str, field_value: Optional[str] = None) -> int:
+        """
+        The number of the features of the given type that match the field value (if any). The
+        counts of the filtered features are kept (up to `max_kept_counts`) so that they are not
+        counted on every page.
+
+        :param name:
+        :param field_value:
+        :return:
+        """
+        if not field_value:
+            return len(self.get_features_by_type(name))
+
+        key = (name, field_value)
+        count = self._counts_per_filter.get(key)
+
+        if count is None:
+            count = sum(1 for _ in self._iter_matching_positions(name, field_value))
+
+            if len(self._counts_per_filter) >= self.max_kept_counts:
+                self._counts_per_filter.popitem(last=False)
+            self._counts_per_filter[key] = count
+
+        return count
+
     def process(self):
         """
         Performs the processing of the dataset including:
-            - parse the dataset file
+            - parse the dataset file (unless its content has been fed already, see `feed`)
             - extract features and store their essential data
             - create extensions (bi-directional associations)
+            - precompute the graph of each feature (if enabled)
+            - index the text of the features' fields (if enabled)
             - generate stats to be used in front-end
+            - write the time slices of the features in columns (if enabled)
         :return: AIXMDataSet
         """
-        return self._parse()._create_reverse_associations()._compute_feature_type_stats()
+        try:
+            if self._pull_parser is None:
+                self._set_progress(phase=ProcessingProgress.PARSE,
+                                   bytes_total=os.path.getsize(self._filepath))
+                self._parse()
+            else:
+                self._close_feed()
+
+            self._set_progress(phase=ProcessingProgress.REVERSE_ASSOCIATIONS)
+            self._create_reverse_associations()
+
+            # the outlined features would all be parsed
+            outlined = self._member_time_slices is not None
+
+            if self._precompute_graphs_enabled and not outlined:
+                self._set_progress(phase=ProcessingProgress.GRAPH_FRAGMENTS)
+                self._precompute_graphs()
+
+            if self._text_index_enabled and not outlined:
+                self._set_progress(phase=ProcessingProgress.TEXT_INDEX)
+                self._create_text_indices()
+
+            self._set_progress(phase=ProcessingProgress.STATS)
+            self._compute_feature_type_stats()
+            self._hrefs_per_position = []
+
+            # they are set once the rest of the processed state is (see `feature_type_stats`)
+            feature_type_stats, self._feature_type_stats = self._feature_type_stats, None
+
+            if self._columnar_enabled and not outlined:
+                self._set_progress(phase=ProcessingProgress.COLUMNS)
+                self._write_columns()
+        except Exception as e:
+            self._set_progress(phase=ProcessingProgress.FAILED, error=str(e))
+            raise
+
+        self._processed_at = time.time()
+        self._counts_per_filter.clear()
+        self._memory_size = self._estimate_memory_size()
+        self._feature_type_stats = feature_type_stats
+        self._set_progress(phase=ProcessingProgress.DONE)
+
+        return self
 
     def _parse(self):
         """
@@ -164,68 +599,597 @@ class AIXMDataSet:
         The element features are parsed and extracted one by one. Their data are stored and they are
         deleted before proceeding to the next one.
 
+        If more than one parse workers are configured the parsing is done in parallel instead,
+        while if `lazy` is enabled the members are outlined instead of being parsed.
+
+        The byte spans of the members are recorded as well so that single members can be read back
+        from the file later on, i.e. during skeleton generation. They are located up front only if
+        the members are to be outlined or parsed on their own, otherwise along with the parsing.
+
+        Compressed files are decompressed on the fly while being parsed, and in this case the
+        progress refers to the position within the compressed file.
+
         :return: AIXMDataSet
         """
+        # the chunks of a compressed file cannot be reached without decompressing it from its start,
+        # while the members are outlined or parsed on their own only if their spans can be trusted
+        if self.sequence_tag and (self._lazy_enabled or self._parse_workers > 1) \
+                and get_compression(self._filepath) is None:
+            offsets, members_end = find_member_offsets(self._filepath, self.sequence_tag)
+
+            if offsets and self._members_are_delimited(offsets, members_end):
+                if self._lazy_enabled:
+                    self._outline_members(offsets, members_end)
+                else:
+                    self._parse_in_parallel(offsets, members_end)
+
+                self._set_member_offsets(offsets, members_end)
 
+                return self
+
+        return self._parse_sequentially()
+
+    def _members_are_delimited(self, offsets: List[int], members_end: int) -> bool:
+        """
+
+        :param offsets: the byte offsets of the members in the file
+        :param members_end: the byte offset right after the last member
+        :return: whether each span holds exactly one member (see `members_are_delimited`)
+        """
+        with open(self._filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return members_are_delimited(content, offsets, members_end, self.sequence_tag)
+
+    def _set_member_offsets(self, offsets: List[int], members_end: int) -> None:
+        """
+
+        :param offsets: the byte offsets of the members in the file
+        :param members_end: the byte offset right after the last member
+        """
+        # the scan might be fooled i.e. by sequence tags within CDATA, in which case the spans
+        # cannot be matched to the parsed members
+        if offsets and len(offsets) == self._members_count:
+            self._member_offsets = array('q', offsets + [members_end])
+
+    def _parser_kwargs(self) -> Dict[str, Any]:
         kwargs = dict(events=('end', 'start-ns'), remove_comments=True)
         if self.sequence_tag:
             kwargs.update(tag=f'{{*}}{self.sequence_tag}')
 
-        context = etree.iterparse(self._filepath, **kwargs)
+        return kwargs
+
+    def _parse_sequentially(self):
+        """
+
+        :return: AIXMDataSet
+        """
+        scanner = MemberOffsetScanner(self.sequence_tag) if self.sequence_tag else None
+
+        with open(self._filepath, 'rb') as f:
+            with decompressed(f, self._filepath) as source:
+                if scanner is not None:
+                    source = ScanningReader(source, scanner)
+
+                context = etree.iterparse(source, **self._parser_kwargs())
+
+                for event, sequence_element in context:
+                    self._handle_parse_event(event, sequence_element)
+
+                    if event == 'end':
+                        self._set_progress(bytes_read=f.tell(),
+                                           features_indexed=self.progress.features_indexed + 1)
+
+                del context
+
+        if scanner is not None:
+            scanner.close()
+            self._set_member_offsets(scanner.offsets, scanner.members_end)
+
+        return self
+
+    def feed(self, data: bytes, bytes_read: Optional[int] = None) -> None:
+        """
+        Parses the next block of the (decompressed) content of the dataset file, i.e. while the file
+        is being uploaded, so that `process` does not have to parse the file afterwards.
+
+        :param data:
+        :param bytes_read: how many bytes of the file have been received so far
+        """
+        if self._pull_parser is None:
+            self._pull_parser = etree.XMLPullParser(**self._parser_kwargs())
+            self._member_offset_scanner = MemberOffsetScanner(self.sequence_tag) \
+                if self.sequence_tag else None
+            self._set_progress(phase=ProcessingProgress.PARSE)
+
+        self._pull_parser.feed(data)
+
+        if self._member_offset_scanner is not None:
+            self._member_offset_scanner.feed(data)
 
-        for event, sequence_element in context:
-            if event == 'start-ns':
-                ns_code, ns_link = sequence_element
-                if ns_code:
-                    self._ns_map[ns_code] = ns_link
-            elif event == 'end':
-                if sequence_element.prefix and not self._sequence_ns:
-                    self._sequence_ns = sequence_element.nsmap[sequence_element.prefix]
+        self._handle_pull_parser_events()
 
-                feature = self.feature_factory.feature_from_sequence_element(
-                    seq_element=sequence_element)
+        if bytes_read is not None:
+            self._set_progress(bytes_read=bytes_read)
 
-                self._index_feature(feature)
+    def _close_feed(self):
+        """
+        Completes the parsing of the fed content
+
+        :return: AIXMDataSet
+        """
+        self._pull_parser.close()
+        self._handle_pull_parser_events()
 
-                # clean up obsolete elements
-                sequence_element.clear()
-                while sequence_element.getprevious() is not None:
-                    del sequence_element.getparent()[0]
-                del sequence_element
+        if self._member_offset_scanner is not None:
+            self._member_offset_scanner.close()
+            self._set_member_offsets(self._member_offset_scanner.offsets,
+                                     self._member_offset_scanner.members_end)
 
-        del context
+        self._pull_parser = None
+        self._member_offset_scanner = None
 
         return self
 
-    def _index_feature(self, feature: AIXMFeature) -> None:
+    def _handle_pull_parser_events(self) -> None:
+        for event, sequence_element in self._pull_parser.read_events():
+            self._handle_parse_event(event, sequence_element)
+
+            if event == 'end':
+                self._set_progress(features_indexed=self.progress.features_indexed + 1)
+
+    def _parse_in_parallel(self, offsets: List[int], members_end: int):
+        """
+        The members of the file are split in byte ranges (a few per worker for better balancing)
+        which are parsed in a process pool. The extracted features are sent back as records (see
+        `feature_to_record`) and indexed in the order of the chunks, so the result is the same as
+        parsing the file sequentially.
+
+        :param offsets: the byte offsets of the members in the file
+        :param members_end: the byte offset right after the last member
+        :return: AIXMDataSet
+        """
+        declaration, nsmap = read_prolog(self._filepath, offsets[0])
+        self._ns_map.update({ns_code: ns_link for ns_code, ns_link in nsmap.items() if ns_code})
+
+        chunks = split_into_chunks(offsets, members_end, chunks_num=self._parse_workers * 4)
+        starts, ends = zip(*chunks)
+
+        # processes are spawned instead of forked since the dataset might be processed by a
+        # background thread. The feature classes have to be registered again in each of them.
+        with ProcessPoolExecutor(max_workers=self._parse_workers,
+                                 mp_context=get_context('spawn'),
+                                 initializer=AIXMFeatureClassRegistry.load_feature_classes,
+                                 initargs=(AIXMFeatureClassRegistry.get_config(),)) as executor:
+            results = executor.map(parse_chunk,
+                                   repeat(self._filepath),
+                                   starts,
+                                   ends,
+                                   repeat(declaration),
+                                   repeat(nsmap),
+                                   repeat(self.sequence_tag),
+                                   repeat(self.feature_factory))
+
+            for end, result in zip(ends, results):
+                self._ns_map.update(result.ns_map)
+
+                if result.sequence_ns and not self._sequence_ns:
+                    self._sequence_ns = result.sequence_ns
+
+                for record in result.records:
+                    self._index_feature(feature_from_record(record))
+
+                self._set_progress(
+                    bytes_read=end,
+                    features_indexed=self.progress.features_indexed + len(result.records))
+
+        return self
+
+    def _outline_members(self, offsets: List[int], members_end: int):
+        """
+        Extracts the outline of each member (see `MemberOutliner`) which is indexed as a feature
+        without time slices. Its time slices are parsed from its member on first access instead
+        (see `MemberTimeSlices`). The members that cannot be outlined are parsed as usual.
+
+        The members are outlined only if the file is UTF-8 encoded and its root declares the GML and
+        XLink namespaces, otherwise the file is parsed as usual.
+
+        :param offsets: the byte offsets of the members in the file
+        :param members_end: the byte offset right after the last member
+        :return: AIXMDataSet
+        """
+        declaration, nsmap = self._prolog = read_prolog(self._filepath, offsets[0])
+        prefixes = {ns_link: ns_code for ns_code, ns_link in nsmap.items() if ns_code}
+        encoding = re.search(rb'encoding\s*=\s*["\']([\w.-]+)', declaration)
+
+        # the outliner looks for the attributes of either namespace via a single prefix
+        if GML_NS not in prefixes or XLINK_NS not in prefixes \
+                or list(nsmap.values()).count(GML_NS) > 1 \
+                or list(nsmap.values()).count(XLINK_NS) > 1 \
+                or (encoding and encoding.group(1).lower() not in (b'utf-8', b'utf8')):
+            return self._parse_sequentially()
+
+        self._ns_map.update({ns_code: ns_link for ns_code, ns_link in nsmap.items() if ns_code})
+
+        outliner = MemberOutliner(gml_prefix=prefixes[GML_NS], xlink_prefix=prefixes[XLINK_NS])
+        member_time_slices = self._member_time_slices = \
+            MemberTimeSlices(max_entries=self.max_parsed_features)
+
+        with open(self._filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for start, end in zip(offsets, offsets[1:] + [members_end]):
+                outline = outliner.outline(content[start:end])
+
+                if outline is None:
+                    member = self._parse_member(f, start, end)
+                    self._ns_map.update(member.nsmap)
+                    self._set_sequence_ns(member.prefix, member.nsmap)
+
+                    feature = self.feature_factory.feature_from_sequence_element(member)
+                    self._index_feature(feature)
+                    hrefs = None
+                else:
+                    self._set_sequence_ns(outline.member_prefix, self._ns_map)
+
+                    feature = self._feature_from_outline(outline)
+                    self._index_feature(feature, gml_properties=[
+                        GMLProperty(id=gml_id, name=name)
+                        for gml_id, name in outline.gml_properties
+                    ])
+                    hrefs = outline.hrefs
+
+                # a feature with the same gml:id replaces the previous one but keeps its position
+                if feature.position == len(self._hrefs_per_position):
+                    self._hrefs_per_position.append(hrefs)
+                    member_time_slices.time_slices_counts.append(0)
+                else:
+                    self._hrefs_per_position[feature.position] = hrefs
+
+                if hrefs is not None:
+                    member_time_slices.time_slices_counts[feature.position] = \
+                        outline.time_slices_count
+                    feature.use_columns(member_time_slices)
+
+                self._set_progress(bytes_read=end,
+                                   features_indexed=self.progress.features_indexed + 1)
+
+        member_time_slices.bind(self._parse_time_slices)
+
+        return self
+
+    def _set_sequence_ns(self, prefix: Optional[str], nsmap: Dict[str, str]) -> None:
+        if prefix and not self._sequence_ns:
+            self._sequence_ns = nsmap[prefix]
+
+    def _feature_from_outline(self, outline: MemberOutline) -> AIXMFeature:
+        """
+        Creates a feature out of the outline of its member which has no time slices of its own, they
+        are parsed on first access instead (see `_parse_time_slices`).
+
+        :param outline:
+        :return:
+        """
+        feature_class = AIXMFeatureClassRegistry.get_feature_class(outline.name)
+
+        feature = feature_class(name=outline.name, prefix=outline.prefix)
+        feature.id = outline.id
+        feature.identifier = outline.identifier
+
+        return feature
+
+    def _parse_member(self, source: BinaryIO, start: int, end: int) -> etree.Element:
+        """
+        Parses the member found in the given byte range of the file without its comments, as the
+        features are extracted during a full parse.
+
+        :param source:
+        :param start:
+        :param end:
+        :return:
+        """
+        if self._prolog is None:
+            self._prolog = read_prolog(self._filepath, self._member_offsets[0])
+
+        declaration, nsmap = self._prolog
+        member = parse_fragment(source, start, end, declaration, nsmap)[0]
+
+        etree.strip_elements(member, etree.Comment, with_tail=False)
+
+        return member
+
+    def _parse_time_slices(self, position: int) -> List[AIXMFeatureTimeSlice]:
+        """
+        Parses the time slices of the outlined feature at the given position from its member. Their
+        xlinks and gml properties are matched with the ones that were outlined, i.e. the xlinks that
+        cannot be resolved are marked as broken.
+
+        :param position:
+        :return:
+        """
+        member_index = self._member_per_position[position]
+
+        with open(self._filepath, 'rb') as f:
+            member = self._parse_member(f,
+                                        start=self._member_offsets[member_index],
+                                        end=self._member_offsets[member_index + 1])
+
+        time_slices = self.feature_factory.feature_from_sequence_element(member).time_slices
+
+        for time_slice in time_slices:
+            for xlink in time_slice.xlinks:
+                if self.get_feature_by_id(xlink.href) is None:
+                    xlink.set_broken()
+
+            time_slice._gml_properties = [self._gml_properties_per_id.get(gml.id, gml)
+                                          for gml in time_slice.gml_properties]
+
+        return time_slices
+
+    def _handle_parse_event(self, event: str, sequence_element) -> None:
+        """
+
+        :param event:
+        :param sequence_element: the namespace tuple in case of `start-ns` event
+        """
+        if event == 'start-ns':
+            ns_code, ns_link = sequence_element
+            if ns_code:
+                self._ns_map[ns_code] = ns_link
+        elif event == 'end':
+            if sequence_element.prefix and not self._sequence_ns:
+                self._sequence_ns = sequence_element.nsmap[sequence_element.prefix]
+
+            feature = self.feature_factory.feature_from_sequence_element(
+                seq_element=sequence_element)
+
+            self._index_feature(feature)
+
+            # clean up obsolete elements
+            sequence_element.clear()
+            while sequence_element.getprevious() is not None:
+                del sequence_element.getparent()[0]
+            del sequence_element
+
+    def _index_feature(self,
+                       feature: AIXMFeature,
+                       gml_properties: Optional[List[GMLProperty]] = None) -> None:
         """
 
         :param feature:
+        :param gml_properties: the gml properties of the feature if they are not found in its time
+                               slices, i.e. if it has been outlined
         """
+        features_of_type = self._features_per_type[feature.name]
+        existing_feature = self._features_per_gml_id.get(feature.id)
+
+        # a feature with the same gml:id replaces the previous one but keeps its position
+        if existing_feature is not None:
+            feature.position = existing_feature.position
+            self._features_per_position[feature.position] = feature
+        else:
+            feature.position = len(self._features_per_position)
+            self._features_per_position.append(feature)
+
+        if existing_feature is not None and existing_feature.name == feature.name:
+            features_of_type[features_of_type.index(existing_feature)] = feature
+        else:
+            features_of_type.append(feature)
+
+            # the replaced feature of another type is not listed under its type anymore
+            if existing_feature is not None:
+                features_of_existing_type = self._features_per_type[existing_feature.name]
+                features_of_existing_type.remove(existing_feature)
+                if not features_of_existing_type:
+                    del self._features_per_type[existing_feature.name]
+
         self._features_per_gml_id[feature.id] = feature
 
+        if feature.position == len(self._member_per_position):
+            self._member_per_position.append(self._members_count)
+        else:
+            self._member_per_position[feature.position] = self._members_count
+        self._members_count += 1
+
         if feature.identifier is not None:
             self._features_per_identifier[feature.identifier] = feature
 
-        for gml in feature.gml_properties:
+        for gml in feature.gml_properties if gml_properties is None else gml_properties:
             self._features_per_gml_property_id[gml.id] = feature
+            self._gml_properties_per_id[gml.id] = gml
 
     def _create_reverse_associations(self):
         """
-        For each xlink reference found in a feature, an extension (xlink) is created to the
-        referred featured pointing back to it. If the referred feature is not found then the xlink
-        is marked as broken.
+        For each xlink reference found in a feature, a reverse association is recorded to the
+        referred featured pointing back to it, which will result in an extension (xlink) in the
+        skeleton and the graph. If the referred feature is not found then the xlink is marked as
+        broken. If the xlink refers to a gml property of the feature, the property is marked as
+        serializable.
+
+        The (forward) associations are recorded as well so that the features can be traversed
+        without resolving their xlinks again.
 
         :return: AIXMDataSet
         """
-        for source_feature in self.features:
-            for xlink in source_feature.xlinks:
-                target_feature = self.get_feature_by_id(xlink.href)
+        targets = array('q')
+        sources = array('q')
+
+        for source_feature in self._features_per_position:
+            for href, xlink in self._iter_references(source_feature):
+                target_feature = self.get_feature_by_id(href)
 
                 if target_feature is None:
-                    xlink.set_broken()
+                    # the xlinks of the outlined features are marked once they are parsed
+                    if xlink is not None:
+                        xlink.set_broken()
+                    continue
+
+                targets.append(target_feature.position)
+                sources.append(source_feature.position)
+
+                if self._features_per_gml_property_id.get(href) is target_feature:
+                    self._gml_properties_per_id[href].serializable = True
+
+        # counting sort of the sources per target which keeps their original order
+        offsets = array('q', [0]) * (len(self._features_per_position) + 1)
+        for target in targets:
+            offsets[target + 1] += 1
+        for i in range(1, len(offsets)):
+            offsets[i] += offsets[i - 1]
+
+        next_slots = array('q', offsets)
+        reverse_sources = array('q', [0]) * len(sources)
+        for target, source in zip(targets, sources):
+            reverse_sources[next_slots[target]] = source
+            next_slots[target] += 1
+
+        self._reverse_offsets = offsets
+        self._reverse_sources = reverse_sources
+
+        # the targets are already grouped by source since the sources are iterated in order
+        forward_offsets = array('q', [0]) * (len(self._features_per_position) + 1)
+        for source in sources:
+            forward_offsets[source + 1] += 1
+        for i in range(1, len(forward_offsets)):
+            forward_offsets[i] += forward_offsets[i - 1]
+
+        self._forward_offsets = forward_offsets
+        self._forward_targets = targets
+
+        return self
+
+    def _iter_references(self,
+                         feature: AIXMFeature) -> Iterator[Tuple[str, Optional[XLinkField]]]:
+        """
+        The xlink references of the feature as (href, xlink), where the xlink is None if the feature
+        has been outlined, so that its time slices are not parsed in order to be resolved.
+
+        :param feature:
+        :return:
+        """
+        hrefs = self._hrefs_per_position[feature.position] \
+            if feature.position < len(self._hrefs_per_position) else None
+
+        if hrefs is not None:
+            return ((href, None) for href in hrefs)
+
+        return ((xlink.href, xlink) for xlink in feature.xlinks)
+
+    def _has_broken_references(self, feature: AIXMFeature) -> bool:
+        return any(self.get_feature_by_id(href) is None if xlink is None else xlink.is_broken
+                   for href, xlink in self._iter_references(feature))
+
+    def get_referring_features(self, feature: AIXMFeature) -> List[AIXMFeature]:
+        """
+        The features that refer to the given one via xlinks (once per xlink)
+
+        :param feature:
+        :return:
+        """
+        if feature.position is None or feature.position + 1 >= len(self._reverse_offsets):
+            return []
+
+        start = self._reverse_offsets[feature.position]
+        end = self._reverse_offsets[feature.position + 1]
+
+        return [self._features_per_position[position]
+                for position in self._reverse_sources[start:end]]
+
+    def get_extensions_count(self, feature: AIXMFeature) -> int:
+        """
+        The number of extensions of the feature across its time slices
+
+        :param feature:
+        :return:
+        """
+        if feature.position is None or feature.position + 1 >= len(self._reverse_offsets):
+            return 0
+
+        references_num = self._reverse_offsets[feature.position + 1] - \
+            self._reverse_offsets[feature.position]
+
+        return references_num * feature.time_slices_count
+
+    def get_extensions(self, feature: AIXMFeature) -> List[Extension]:
+        """
+        Materialises the extensions of the feature, i.e. the xlinks pointing back to the features
+        that refer to it.
+
+        :param feature:
+        :return:
+        """
+        return [
+            Extension.create(name=f'the{source_feature.name}',
+                             href=source_feature.id,
+                             prefix=EXTENSION_PREFIX)
+            for source_feature in self.get_referring_features(feature)
+        ]
+
+    def _node_from_feature(self, feature: AIXMFeature) -> Node:
+        return Node.from_feature(feature, extensions_count=self.get_extensions_count(feature))
+
+    def _precompute_graphs(self):
+        """
+        Serializes the node of each feature and collects its adjacency so that its graph can be
+        assembled from them (see `_iter_associations`). It is not part of the snapshot since it is
+        derived from it, thus it is recomputed upon loading the snapshot instead.
+
+        :return: AIXMDataSet
+        """
+        self._node_per_position = [self._node_from_feature(feature).serialize()
+                                   for feature in self._features_per_position]
+
+        self._adjacency_per_position = [self._collect_adjacency(feature)
+                                        for feature in self._features_per_position]
+
+        return self
+
+    def _collect_adjacency(self,
+                           feature: AIXMFeature) -> Tuple[Tuple[str, str, str, str, bool], ...]:
+        """
+        Collects the edges of the graph of the feature (see `get_graph_for_feature`) in the order
+        they are added along with their target node. Repeated edges are skipped since they are
+        added only once in the graph anyway.
+
+        :param feature:
+        :return:
+        """
+        adjacency = {}
+
+        referring_features = self.get_referring_features(feature)
+
+        for time_slice in feature.time_slices:
+            for xlink in time_slice.xlinks:
+                target = self.get_feature_by_id(xlink.href)
+
+                if target is not None:
+                    edge = (target.id, self._node_per_position[target.position], 'target',
+                            time_slice.version, False)
                 else:
-                    target_feature.handle_reverse_association(xlink, source_feature)
+                    edge = (xlink.href, Node.from_broken_xlink(xlink).serialize(), 'target',
+                            time_slice.version, True)
+
+                adjacency.setdefault((frozenset((feature.id, edge[0])), edge[3]), edge)
+
+            for source_feature in referring_features:
+                edge = (source_feature.id, self._node_per_position[source_feature.position],
+                        'source', time_slice.version, False)
+
+                adjacency.setdefault((frozenset((feature.id, edge[0])), edge[3]), edge)
+
+        return tuple(adjacency.values())
+
+    def _create_text_indices(self):
+        """
+        Builds an inverted index per feature type over the text of the data fields of its features.
+
+        :return: AIXMDataSet
+        """
+        for name, features in self._features_per_type.items():
+            text_index = TrigramIndex()
+
+            for position, feature in enumerate(features):
+                text_index.add(position, (field.text for field in feature.data_fields))
+
+            self._text_indices[name] = text_index
 
         return self
 
@@ -235,78 +1199,235 @@ class AIXMDataSet:
         as broken xlinks per feature type.
         :return:
         """
-        self._feature_type_stats = defaultdict(lambda: defaultdict(int))
+        self._feature_type_stats = {}
+
+        for name, features in self._features_per_type.items():
+            self._feature_type_stats[name] = {
+                'size': len(features),
+                'features_num_with_broken_xlinks': sum(1 for feature in features
+                                                       if self._has_broken_references(feature))
+            }
 
-        for feature in self.features:
-            self._feature_type_stats[feature.name]['size'] += 1
+        return self
 
-            if feature.has_broken_xlinks:
-                self._feature_type_stats[feature.name]['features_num_with_broken_xlinks'] += 1
+    def make_columns_path(self) -> str:
+        """
+        The path depends on the content of the dataset as well so that the columns of a previous
+        content in the same path are not overwritten while being read.
+
+        :return:
+        """
+        filename = os.path.splitext(strip_compression(self._filepath))[0]
+
+        return f"{filename}_{self.content_hash[:16]}.columns"
+
+    def _write_columns(self):
+        """
+        Writes the time slices of the features in a memory mapped file of columns which the features
+        read them from on access, so that the time slices are not kept in memory. The file is saved
+        next to the dataset file and is shared, via the page cache, among the processes that map
+        it, i.e. the ones that load the snapshot of the dataset.
+        """
+        columns = FeatureColumns(write_columns(self.make_columns_path(),
+                                               self._features_per_position))
+
+        for feature in self._features_per_position:
+            feature.use_columns(columns)
 
         return self
 
+    def _estimate_memory_size(self) -> int:
+        """
+        Measuring every feature would take as long as processing them, thus the size of the features
+        (along with their fields and graph fragments) is extrapolated from an evenly spaced sample
+        of them, while the indices and the arrays are measured as they are.
+
+        :return: the approximate size in bytes of the processed state
+        """
+        features = self._features_per_position
+        size = sum(sys.getsizeof(getattr(self, attr)) for attr in (
+            '_features_per_gml_id',
+            '_features_per_identifier',
+            '_features_per_gml_property_id',
+            '_features_per_position',
+            '_gml_properties_per_id',
+            '_reverse_offsets',
+            '_reverse_sources',
+            '_forward_offsets',
+            '_forward_targets',
+            '_member_offsets',
+            '_member_per_position',
+            '_node_per_position',
+            '_adjacency_per_position',
+        ))
+        size += sum(sys.getsizeof(features) for features in self._features_per_type.values())
+        size += sum(text_index.memory_size() for text_index in self._text_indices.values())
+
+        if features:
+            sample = range(0, len(features), max(1, len(features) // self.memory_size_sample))
+            seen = {id(features[position].config) for position in sample}
+
+            # the sources of the time slices (if any) are shared among the features
+            sources = {id(source): source for source in (features[position]._time_slices
+                                                         for position in sample)
+                       if not isinstance(source, list)}
+            seen.update(sources)
+            size += sum(deep_getsizeof(source) for source in sources.values())
+
+            sample_size = sum(deep_getsizeof(features[position], seen) for position in sample)
+
+            if self._node_per_position:
+                sample_size += sum(deep_getsizeof(self._node_per_position[position], seen)
+                                   + deep_getsizeof(self._adjacency_per_position[position], seen)
+                                   for position in sample)
+
+            size += sample_size * len(features) // len(sample)
+
+        return size
+
     def make_skeleton_path(self) -> str:
         """
+        The path depends on the content of the dataset as well, as in `make_columns_path`, since
+        files of different content may share the same name once their compression is stripped, i.e.
+        `d.xml`, `d.xml.gz` and `d.zip`.
 
         :return:
         """
-        filename, ext = os.path.splitext(self._filepath)
+        filename, ext = os.path.splitext(strip_compression(self._filepath))
+
+        return f"{filename}_{self.content_hash[:16]}_skeleton{ext}"
+
+    @property
+    def skeleton_name(self) -> str:
+        """
+        :return: the name the skeleton is downloaded with
+        """
+        filename, ext = os.path.splitext(os.path.basename(strip_compression(self._filepath)))
 
         return f"{filename}_skeleton{ext}"
 
-    def get_gml_element(self, tag: str, gml_id: str):
+    def get_gml_element(self, tag: str, gml_id: str, source: Optional[BinaryIO] = None):
         """
-        Retrieves an element by tag and gml:id
+        Retrieves an element by tag and gml:id. Only the member of the feature that holds it is read
+        from the file, provided that the member spans are known, otherwise the whole file is
+        scanned.
 
         :param tag:
         :param gml_id:
+        :param source: the opened dataset file (see `open_dataset_file`) to read the member from.
+                       Since seeking within a compressed file decompresses its content up to that
+                       point, it should be kept open while reading several members in order.
         :return:
         """
-        context = etree.iterparse(self._filepath, tag=f'{{*}}{tag}', events=('end',))
+        feature = self._features_per_gml_property_id.get(gml_id)
 
-        for _, element in context:
-            if element.attrib.get(f'{{{GML_NS}}}id') == gml_id:
-                del context
-                return element
+        if feature is not None and self._member_offsets:
+            member_index = self._member_per_position[feature.position]
+
+            if source is None:
+                with open_dataset_file(self._filepath) as source:
+                    member = self._get_member_element(member_index, source)
+            else:
+                member = self._get_member_element(member_index, source)
+
+            for element in member.iter(f'{{*}}{tag}'):
+                if element.attrib.get(f'{{{GML_NS}}}id') == gml_id:
+                    return element
+
+        return self._find_gml_element(tag, gml_id)
+
+    def _get_member_element(self, member_index: int, source: BinaryIO) -> etree.Element:
+        """
+        Parses the member with the given index on its own. The last parsed member is kept since the
+        gml properties of a feature are requested one after the other.
+
+        :param member_index:
+        :param source:
+        :return:
+        """
+        if self._last_member is not None and self._last_member[0] == member_index:
+            return self._last_member[1]
+
+        if self._prolog is None:
+            self._prolog = read_prolog(self._filepath, self._member_offsets[0])
 
-        del context
+        declaration, nsmap = self._prolog
+        member = parse_fragment(source,
+                                start=self._member_offsets[member_index],
+                                end=self._member_offsets[member_index + 1],
+                                declaration=declaration,
+                                nsmap=nsmap)
+
+        self._last_member = (member_index, member)
+
+        return member
+
+    def _find_gml_element(self, tag: str, gml_id: str):
+        """
+        Retrieves an element by tag and gml:id by scanning the whole file
+
+        :param tag:
+        :param gml_id:
+        :return:
+        """
+        with open_dataset_file(self._filepath) as source:
+            context = etree.iterparse(source, tag=f'{{*}}{tag}', events=('end',))
+
+            for _, element in context:
+                if element.attrib.get(f'{{{GML_NS}}}id') == gml_id:
+                    del context
+                    return element
+
+            del context
 
     def generate_skeleton(self) -> str:
         """
         Skeleton is a subset of the original dataset including only the information that
-        was extracted by it plus the created extensions
+        was extracted by it plus the created extensions.
+
+        The file is written under a temporary name and renamed once complete, so that a partially
+        written skeleton is never found in its path.
 
         :return: the path of the generated skeleton file
         """
-        if self._skeleton_filepath:
-            return self._skeleton_filepath
+        if self.skeleton_filepath:
+            return self.skeleton_filepath
 
         prefix = f"{{{self._sequence_ns}}}" if self._sequence_ns else ""
         root = etree.Element(f"{prefix}{self.basic_message_tag}", nsmap=self._ns_map)
 
-        for feature in self.features:
-            member_el = etree.Element(f'{prefix}{self.sequence_tag}', nsmap=self._ns_map)
-            feature_el = feature.to_lxml(self._ns_map, gml_prop_callback=self.get_gml_element)
+        skeleton_filepath = self.make_skeleton_path()
 
-            member_el.append(feature_el)
-            root.append(member_el)
+        # the members are written one by one so that the memory usage does not depend on the size
+        # of the dataset
+        tmp_filepath = f'{skeleton_filepath}.tmp'
+        try:
+            with open(tmp_filepath, 'wb') as f, StreamingTreeWriter(f, root) as writer, \
+                    open_dataset_file(self._filepath) as source:
+                gml_prop_callback = partial(self.get_gml_element, source=source)
 
-        self._skeleton_filepath = self.make_skeleton_path()
-        with open(self._skeleton_filepath, 'w') as f:
-            f.write(etree.tostring(root,
-                                   encoding='utf-8',
-                                   xml_declaration=True,
-                                   pretty_print=True).decode('utf-8'))
+                for feature in self.features:
+                    member_el = etree.Element(f'{prefix}{self.sequence_tag}', nsmap=self._ns_map)
+                    feature_el = feature.to_lxml(self._ns_map,
+                                                 gml_prop_callback=gml_prop_callback,
+                                                 extensions=self.get_extensions(feature))
 
-        return self._skeleton_filepath
+                    member_el.append(feature_el)
+                    writer.write(member_el)
 
-    def _get_edge_direction(self, association: Union[XLinkField, Extension]) -> str:
-        directions = {
-            XLinkField: 'target',
-            Extension: 'source'
-        }
+            os.replace(tmp_filepath, skeleton_filepath)
+        except BaseException:
+            # a partially written skeleton is not left behind
+            try:
+                os.remove(tmp_filepath)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self._last_member = None
+        self.skeleton_filepath = skeleton_filepath
 
-        return directions.get(type(association))
+        return self.skeleton_filepath
 
     def get_graph_for_feature(self, feature: AIXMFeature) -> Graph:
         """
@@ -317,43 +1438,328 @@ class AIXMDataSet:
         :return:
         """
         graph = Graph()
-        graph.add_nodes(Node.from_feature(feature))
+        graph.add_items(self.iter_graph_for_feature(feature))
+
+        return graph
+
+    def iter_graph_for_feature(
+            self, feature: AIXMFeature) -> Iterator[Union[Node, SerializedNode, Edge]]:
+        """
+        Yields the nodes and edges of the graph of the feature (see `get_graph_for_feature`) in the
+        order they are added in it, so that the graph can be serialized while being created. The
+        node of a feature is created only the first time it is reached.
+
+        :param feature:
+        :return:
+        """
+        node_ids = {feature.id}
+        yield self._get_node(feature)
+
+        for target_id, target, direction, version, ghost_node in \
+                self._iter_associations(feature):
+            if target_id not in node_ids:
+                node_ids.add(target_id)
+                yield ghost_node if target is None else self._get_node(target)
+
+            yield Edge(source=feature.id,
+                       target=target_id,
+                       name=version,
+                       direction=direction,
+                       is_broken=target is None)
+
+    def _get_node(self, feature: AIXMFeature) -> Union[Node, SerializedNode]:
+        if feature.position is not None and feature.position < len(self._node_per_position):
+            return SerializedNode(feature.id, self._node_per_position[feature.position])
+
+        return self._node_from_feature(feature)
+
+    def _iter_associations(self, feature: AIXMFeature) -> Iterator[
+            Tuple[str, Optional[AIXMFeature], str, str, Optional[Union[Node, SerializedNode]]]]:
+        """
+        Walks the associations of the feature, i.e. per time slice its xlinks and then the features
+        that refer to it (via the reverse adjacency), in the order their edges are added in its
+        graph, without creating the nodes of the features they reach.
+
+        If the graphs are precomputed the associations are taken from the adjacency of the feature
+        instead, which holds each edge once.
+
+        :param feature:
+        :return: (target id, target feature, direction, version, ghost node) per association, where
+                 the target feature is None if the xlink is broken, in which case the ghost node
+                 stands for it instead
+        """
+        if feature.position is not None and feature.position < len(self._adjacency_per_position):
+            for target_id, target_node, direction, version, is_broken in \
+                    self._adjacency_per_position[feature.position]:
+                if is_broken:
+                    yield target_id, None, direction, version, \
+                        SerializedNode(target_id, target_node)
+                else:
+                    yield target_id, self.get_feature_by_id(target_id), direction, version, None
+            return
+
+        referring_features = self.get_referring_features(feature)
 
         for time_slice in feature.time_slices:
-            for association in time_slice.associations:
-                target = self.get_feature_by_id(association.href)
-                direction=self._get_edge_direction(association)
+            for xlink in time_slice.xlinks:
+                target = self.get_feature_by_id(xlink.href)
 
                 if target is not None:
-                    node = Node.from_feature(target)
-                    edge = Edge(source=feature.id,
-                                target=target.id,
-                                direction=direction,
-                                name=time_slice.version)
+                    yield target.id, target, 'target', time_slice.version, None
                 else:
-                    node = Node.from_broken_xlink(association)
-                    edge = Edge(source=feature.id,
-                                target=association.href,
-                                name=time_slice.version,
-                                direction=direction,
-                                is_broken=True)
+                    yield xlink.href, None, 'target', time_slice.version, \
+                        Node.from_broken_xlink(xlink)
+
+            for source_feature in referring_features:
+                yield source_feature.id, source_feature, 'source', time_slice.version, None
+
+    def get_neighbourhood_graph(self,
+                                feature: AIXMFeature,
+                                depth: int,
+                                max_nodes: Optional[int] = None,
+                                feature_types: Optional[Set[str]] = None) -> Tuple[Graph, bool]:
+        """
+        Creates the graph of the features that are up to `depth` associations (xlinks or
+        extensions) away from the given feature (see `iter_neighbourhood_graph`).
+
+        :param feature:
+        :param depth: at least 1
+        :param max_nodes: if None the graph is not bounded
+        :param feature_types: if given, only the features of these types are reached (besides the
+                              given feature) while the broken xlinks are left out
+        :return: the graph and whether it was truncated
+        """
+        traversal = GraphTraversal(self.iter_neighbourhood_graph(feature, depth, max_nodes,
+                                                                 feature_types))
+        graph = Graph()
+        graph.add_items(traversal)
+
+        return graph, traversal.outcome
+
+    def iter_neighbourhood_graph(
+            self,
+            feature: AIXMFeature,
+            depth: int,
+            max_nodes: Optional[int] = None,
+            feature_types: Optional[Set[str]] = None
+    ) -> Generator[Union[Node, SerializedNode, Edge], None, bool]:
+        """
+        Yields the nodes and edges of the graph of the features that are up to `depth` associations
+        away from the given feature as they are reached, by walking breadth first the associations
+        of the features of each level (see `_iter_associations`), so that depth 1 is the graph of
+        the feature itself. Only the nodes of the features that are admitted in the graph are
+        created.
+
+        The nodes are yielded in the order they are reached until `max_nodes` is reached, in which
+        case the graph is truncated, and the edges are yielded only between nodes of the graph.
+
+        :param feature:
+        :param depth: at least 1
+        :param max_nodes: if None the graph is not bounded
+        :param feature_types: if given, only the features of these types are reached (besides the
+                              given feature) while the broken xlinks are left out
+        :return: whether the graph was truncated, once exhausted
+        """
+        if max_nodes is not None and max_nodes < 1:
+            return True
+
+        node_ids = {feature.id}
+        yield self._get_node(feature)
+
+        frontier = [feature]
+        truncated = False
+
+        for _ in range(depth):
+            next_frontier = []
+
+            for frontier_feature in frontier:
+                for target_id, target, direction, version, ghost_node in \
+                        self._iter_associations(frontier_feature):
+                    if target_id not in node_ids:
+                        if truncated or feature_types is not None \
+                                and (target is None or target.name not in feature_types):
+                            continue
+
+                        if max_nodes is not None and len(node_ids) >= max_nodes:
+                            truncated = True
+                            continue
 
-                graph.add_nodes(node)
-                graph.add_edges(edge)
+                        node_ids.add(target_id)
+                        yield ghost_node if target is None else self._get_node(target)
+
+                        if target is not None:
+                            next_frontier.append(target)
+
+                    yield Edge(source=frontier_feature.id,
+                               target=target_id,
+                               name=version,
+                               direction=direction,
+                               is_broken=target is None)
+
+                # the edges of the feature to the nodes already in the graph are kept
+                if truncated:
+                    return True
+
+            frontier = next_frontier
+
+        return False
+
+    def _iter_neighbour_positions(self, position: int) -> Iterator[int]:
+        """
+        The positions of the features that are associated with the feature at the given position
+        either way, i.e. via its xlinks or its extensions
+
+        :param position:
+        :return:
+        """
+        yield from self._forward_targets[
+            self._forward_offsets[position]:self._forward_offsets[position + 1]]
+        yield from self._reverse_sources[
+            self._reverse_offsets[position]:self._reverse_offsets[position + 1]]
+
+    def find_path(self,
+                  source: AIXMFeature,
+                  target: AIXMFeature,
+                  max_depth: int,
+                  time_budget: Optional[float] = None) -> Tuple[Optional[List[AIXMFeature]], bool]:
+        """
+        Finds one of the shortest paths between the two features over their associations (either
+        way) via a bidirectional breadth first search, i.e. the smaller of the two frontiers is
+        expanded each time until they meet.
+
+        :param source:
+        :param target:
+        :param max_depth: the max length of the path (in associations)
+        :param time_budget: in seconds. If None the search is not bounded in time
+        :return: the features of the path from source to target (or None if it is not found) and
+                 whether the search ran out of time
+        """
+        if source is target:
+            return [source], False
+
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+
+        # the parent of each reached position per side of the search
+        source_parents = {source.position: None}
+        target_parents = {target.position: None}
+        source_frontier = [source.position]
+        target_frontier = [target.position]
+        depth = 0
+
+        while source_frontier and target_frontier and depth < max_depth:
+            if len(source_frontier) <= len(target_frontier):
+                frontier, parents, other_parents = source_frontier, source_parents, target_parents
+            else:
+                frontier, parents, other_parents = target_frontier, target_parents, source_parents
+
+            next_frontier = []
+            for position in frontier:
+                if deadline is not None and time.monotonic() > deadline:
+                    return None, True
+
+                for neighbour in self._iter_neighbour_positions(position):
+                    if neighbour in parents:
+                        continue
+
+                    parents[neighbour] = position
+
+                    if neighbour in other_parents:
+                        return self._make_path(neighbour, source_parents, target_parents), False
+
+                    next_frontier.append(neighbour)
+
+            if frontier is source_frontier:
+                source_frontier = next_frontier
+            else:
+                target_frontier = next_frontier
+
+            depth += 1
+
+        return None, False
+
+    def _make_path(self,
+                   meeting_position: int,
+                   source_parents: Dict[int, Optional[int]],
+                   target_parents: Dict[int, Optional[int]]) -> List[AIXMFeature]:
+        """
+
+        :param meeting_position: the position both sides of the search have reached
+        :param source_parents:
+        :param target_parents:
+        :return: the features of the path from the source to the target
+        """
+        positions = []
+
+        position = meeting_position
+        while position is not None:
+            positions.append(position)
+            position = source_parents[position]
+
+        positions.reverse()
+
+        position = target_parents[meeting_position]
+        while position is not None:
+            positions.append(position)
+            position = target_parents[position]
+
+        return [self._features_per_position[position] for position in positions]
+
+    def get_path_graph(self, path: List[AIXMFeature]) -> Graph:
+        """
+        Creates the graph of the path (see `iter_path_graph`).
+
+        :param path: as returned by `find_path`
+        :return:
+        """
+        graph = Graph()
+        graph.add_items(self.iter_path_graph(path))
 
         return graph
 
-    def get_graph(self, features, offset: int, limit: int) -> Graph:
+    def iter_path_graph(
+            self, path: List[AIXMFeature]) -> Iterator[Union[Node, SerializedNode, Edge]]:
+        """
+        Yields the nodes and edges of the graph of the path, i.e. its features and the edges between
+        the consecutive ones (one per version of the association) out of the associations of each
+        feature.
+
+        :param path: as returned by `find_path`
+        :return:
+        """
+        for i, feature in enumerate(path):
+            adjacent_ids = {path[j].id for j in (i - 1, i + 1) if 0 <= j < len(path)}
+
+            yield self._get_node(feature)
+
+            for target_id, target, direction, version, _ in self._iter_associations(feature):
+                if target_id in adjacent_ids:
+                    yield Edge(source=feature.id,
+                               target=target_id,
+                               name=version,
+                               direction=direction,
+                               is_broken=target is None)
+
+    def get_graph(self, features: Sequence[AIXMFeature], offset: int, limit: int) -> Graph:
         """
         Creates a graph for a collection of features.
 
-        :param features: Generator[AIXMFeature]
+        :param features:
         :param offset:
         :param limit:
         :return:
         """
-        return reduce(
-            lambda g, f: g + self.get_graph_for_feature(f),
-            islice(features, offset, limit),
-            Graph()
-        )
+        graph = Graph()
+        graph.add_items(self.iter_graph(features[offset:limit]))
+
+        return graph
+
+    def iter_graph(
+            self, features: Iterable[AIXMFeature]) -> Iterator[Union[Node, SerializedNode, Edge]]:
+        """
+        Yields the nodes and edges of the graphs of the features one feature after the other.
+
+        :param features:
+        :return:
+        """
+        for feature in features:
+            yield from self.iter_graph_for_feature(feature)
@@ -32,18 +32,25 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import sys
 from itertools import chain
-from typing import Dict, List, Type, TypeVar, Callable, Optional, Iterator
+from typing import Dict, List, Type, TypeVar, Callable, Optional, Iterator, Any, Union, \
+    TYPE_CHECKING
 
 from lxml import etree
 from lxml.etree import QName
 
-from aixm_graph import EXTENSION_PREFIX, GML_NS
+from aixm_graph import GML_NS
 from aixm_graph.datasets.fields import Field, XLinkField, Extension
 from aixm_graph.utils import get_attrib_value, make_attrib
 
+if TYPE_CHECKING:
+    from aixm_graph.datasets.columnar import FeatureColumns
+    from aixm_graph.datasets.lazy import MemberTimeSlices
+
 
 class GMLProperty:
+    __slots__ = ('id', 'name', 'serializable')
 
     def __init__(self, id: str, name: str, serializable: bool = False):
         """
@@ -55,11 +62,19 @@ class GMLProperty:
         :param serializable: indicates whether it will be included in the skeleton
         """
         self.id = id
-        self.name = name
+        self.name = sys.intern(name)
         self.serializable = serializable
 
+    def __getstate__(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
 
 class AIXMFeatureTimeSlice(Field):
+    __slots__ = ('version', '_data_fields', '_xlinks', '_gml_properties')
 
     def __init__(self, *args, **kwargs):
         """
@@ -74,16 +89,8 @@ class AIXMFeatureTimeSlice(Field):
 
         self._data_fields: List[Field] = []
         self._xlinks: List[XLinkField] = []
-        self._extensions: List[Extension] = []
         self._gml_properties: List[GMLProperty] = []
 
-    def add_extension(self, extension: Extension):
-        """
-
-        :param extension:
-        """
-        self._extensions.append(extension)
-
     @property
     def data_fields(self) -> Iterator[Field]:
         return (f for f in self._data_fields)
@@ -96,14 +103,6 @@ class AIXMFeatureTimeSlice(Field):
     def gml_properties(self) -> Iterator[GMLProperty]:
         return (g for g in self._gml_properties)
 
-    @property
-    def associations(self) -> Iterator[Field]:
-        return (a for a in chain(self.xlinks, self.extensions))
-
-    @property
-    def extensions(self) -> Iterator[Extension]:
-        return (e for e in self._extensions)
-
     @property
     def has_broken_xlinks(self) -> bool:
         return any(xlink.is_broken for xlink in self._xlinks)
@@ -113,7 +112,7 @@ class AIXMFeatureTimeSlice(Field):
 
 
 class AIXMFeature(Field):
-    config = {}
+    __slots__ = ('_time_slices', 'id', 'identifier', 'position', '_config')
 
     def __init__(self, *args, **kwargs):
         """
@@ -124,7 +123,7 @@ class AIXMFeature(Field):
 
         # the time slice of an AIXM feature is treated as a feature version of it, thus a feature
         # keeps all its versions in a dict
-        self.time_slices: List[AIXMFeatureTimeSlice] = []
+        self._time_slices: List[AIXMFeatureTimeSlice] = []
 
         """ the gml:id of the feature"""
         self.id = None
@@ -132,6 +131,53 @@ class AIXMFeature(Field):
         """ the identifier of the feature"""
         self.identifier = None
 
+        """ the position of the feature in the dataset it belongs to"""
+        self.position = None
+
+    @property
+    def time_slices(self) -> List[AIXMFeatureTimeSlice]:
+        """
+        The time slices are either kept by the feature or read on each access from the columns they
+        have been written in or the member they are parsed from (see `use_columns`).
+        """
+        if isinstance(self._time_slices, list):
+            return self._time_slices
+
+        return self._time_slices.get_time_slices(self.position)
+
+    @property
+    def time_slices_count(self) -> int:
+        if isinstance(self._time_slices, list):
+            return len(self._time_slices)
+
+        return self._time_slices.get_time_slices_count(self.position)
+
+    @time_slices.setter
+    def time_slices(self, value: List[AIXMFeatureTimeSlice]) -> None:
+        self._time_slices = value
+
+    def use_columns(self, columns: Union['FeatureColumns', 'MemberTimeSlices']) -> None:
+        """
+        Drops the time slices of the feature in favour of the columns they have been written in,
+        which are shared among all the features of a dataset (see `datasets.columnar`), or of the
+        members they are parsed from on access (see `datasets.lazy`)
+
+        :param columns:
+        """
+        self._time_slices = columns
+
+    @property
+    def config(self) -> Dict:
+        """
+        The feature classes generated by AIXMFeatureClassRegistry override this with the config of
+        their type, while for plain AIXMFeature instances it can be set per instance.
+        """
+        return getattr(self, '_config', {})
+
+    @config.setter
+    def config(self, value: Dict) -> None:
+        self._config = value
+
     @property
     def data_fields(self) -> Iterator[Field]:
         return (field for ts in self.time_slices for field in ts.data_fields)
@@ -144,10 +190,6 @@ class AIXMFeature(Field):
     def gml_properties(self) -> Iterator[GMLProperty]:
         return (gml for ts in self.time_slices for gml in ts.gml_properties)
 
-    @property
-    def extensions(self) -> Iterator[Extension]:
-        return (extension for ts in self.time_slices for extension in ts.extensions)
-
     @property
     def has_broken_xlinks(self) -> bool:
         return any(ts.has_broken_xlinks for ts in self.time_slices)
@@ -155,28 +197,21 @@ class AIXMFeature(Field):
     def matches_field_value(self, filter_key: str) -> bool:
         return any(ts.matches_field_value(filter_key) for ts in self.time_slices)
 
-    def handle_reverse_association(self, xlink: XLinkField, source_feature):
-        """
-        :param xlink:
-        :param source_feature: AIXMFeature
-        """
-        extension = Extension.create(name=f'the{source_feature.name}',
-                                     href=source_feature.id,
-                                     prefix=EXTENSION_PREFIX)
-        for ts in self.time_slices:
-            ts.add_extension(extension)
-
-        for gml_prop in self.gml_properties:
-            if gml_prop.id == xlink.href:
-                gml_prop.serializable = True
+    def __reduce__(self):
+        # the feature classes are created on the fly from the config (see AIXMFeatureClassRegistry)
+        # so pickle cannot look them up by their qualified name
+        return new_feature, (self.name,), self.__getstate__()
 
     def to_lxml(self,
                 nsmap: Dict[str, str],
-                gml_prop_callback: Optional[Callable] = None, **kwargs) -> etree.Element:
+                gml_prop_callback: Optional[Callable] = None,
+                extensions: Optional[List[Extension]] = None, **kwargs) -> etree.Element:
         """
 
         :param gml_prop_callback:
         :param nsmap:
+        :param extensions: the reverse associations of the feature which are added in each of its
+                           time slices
         :return:
         """
         root = etree.Element(f"{{{nsmap[self.prefix]}}}{self.name}",
@@ -208,7 +243,7 @@ class AIXMFeature(Field):
                                                     gml_id=gml_prop.id)
                         ts_root.append(element)
 
-            for extension in ts.extensions:
+            for extension in extensions or []:
                 ts_root.append(self.create_extension_element(extension, nsmap))
 
             time_slice_container = etree.Element(f"{{{nsmap[ts.prefix]}}}timeSlice", nsmap=nsmap)
@@ -433,12 +468,22 @@ class AIXMFeatureClassRegistry:
             try:
                 data = {
                     'config': cls.validate_config(config_data),
+                    '__slots__': (),
                 }
                 feature_class = type(feature_name, (AIXMFeature,), data)
                 cls.feature_classes[feature_class.__name__] = feature_class
             except ValueError as e:
                 raise ValueError(f"Config validation error for {feature_name}: {str(e)} ")
 
+    @classmethod
+    def get_config(cls) -> Dict:
+        """
+        The config of the loaded feature classes, i.e. in order to load them in another process
+
+        :return:
+        """
+        return {name: feature_class.config for name, feature_class in cls.feature_classes.items()}
+
     @classmethod
     def validate_config(cls, config: Dict) -> Dict:
         """
@@ -465,3 +510,16 @@ class AIXMFeatureClassRegistry:
         :return:
         """
         return cls.feature_classes.get(feature_name)
+
+
+def new_feature(name: str) -> AIXMFeature:
+    """
+    Creates an empty instance of the feature class registered with the given name (or of the base
+    class if there is no such one) which is meant to be populated afterwards, e.g. by pickle.
+
+    :param name:
+    :return:
+    """
+    feature_class = AIXMFeatureClassRegistry.get_feature_class(name) or AIXMFeature
+
+    return feature_class.__new__(feature_class)
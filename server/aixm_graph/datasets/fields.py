@@ -31,8 +31,8 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 """
 __author__ = "EUROCONTROL (SWIM)"
 
-from copy import deepcopy
-from typing import Dict, Optional
+import sys
+from typing import Dict, Optional, Tuple, Any
 
 from lxml import etree
 from lxml.etree import QName
@@ -42,6 +42,7 @@ from aixm_graph import XLINK_NS
 
 
 class Field:
+    __slots__ = ('name', 'text', '_attrib', 'prefix')
 
     def __init__(self,
                  name: str,
@@ -53,20 +54,41 @@ class Field:
         The namespace information is discarded because it is repeated in all the `etree.Element`
         instances of a parsed file, thus not redundant memory is used.
 
-        Additionally the `attrib` attribute is deep copied (below) in order to avoid keeping
-        reference to it and consequently to the parent element. All those elements are supposed to
-        be deleted by the parser `server.datasets.AIXMDataSet.parse` after having been read in order
-        to avoid memory overflow in case of huge files with thousands of elements.
+        Additionally the `attrib` attribute is copied (below) into a tuple of pairs in order to
+        avoid keeping reference to it and consequently to the parent element. All those elements
+        are supposed to be deleted by the parser `server.datasets.AIXMDataSet.parse` after having
+        been read in order to avoid memory overflow in case of huge files with thousands of
+        elements.
+
+        Since there can be millions of fields in a dataset, they are slotted and their name, prefix
+        and attribute names are interned so that they are shared among all the fields.
 
         :param name:
         :param text:
         :param attrib:
         :param prefix:
         """
-        self.name = name
+        self.name = sys.intern(name)
         self.text = text or ""
-        self.attrib = deepcopy(attrib) if attrib else {}
-        self.prefix = prefix or ""
+        self._attrib: Tuple[Tuple[str, str], ...] = \
+            tuple((sys.intern(key), value) for key, value in attrib.items()) if attrib else ()
+        self.prefix = sys.intern(prefix or "")
+
+    @property
+    def attrib(self) -> Dict[str, str]:
+        return dict(self._attrib)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            slot: getattr(self, slot)
+            for cls in type(self).__mro__
+            for slot in getattr(cls, '__slots__', ())
+            if hasattr(self, slot)
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
 
     @classmethod
     def from_lxml(cls, element: etree.Element):
@@ -97,6 +119,8 @@ class Field:
 
 
 class XLinkField(Field):
+    __slots__ = ('_href', '_title', '_broken')
+
     prefixes = ('urn:uuid:', '#',)
 
     def __init__(self, **kwargs) -> None:
@@ -134,6 +158,7 @@ class XLinkField(Field):
 
 
 class Extension(Field):
+    __slots__ = ('href',)
 
     @classmethod
     def create(cls, name: str, href: str, prefix: str):
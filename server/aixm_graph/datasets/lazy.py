@@ -0,0 +1,301 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+__author__ = "EUROCONTROL (SWIM)"
+
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Callable, Pattern
+from xml.sax.saxutils import unescape
+
+from aixm_graph.datasets.features import AIXMFeatureTimeSlice
+from aixm_graph.datasets.fields import XLinkField
+
+"""Matches the (single or double) quoted value of an attribute in the next two groups"""
+_QUOTED_VALUE = rb'\s*=\s*(?:"([^"]*)"|\'([^\']*)\')'
+
+_START_TAG_PATTERN = re.compile(rb'<(?:([\w.-]+):)?([\w.-]+)[\s/>]')
+
+"""The members that declare (or rebind) any namespace are not outlined, since the patterns are
+   built out of the prefixes declared by the root of the dataset
+"""
+_NS_DECLARATION_PATTERN = re.compile(rb'\sxmlns(?::[\w.-]+)?\s*=')
+
+"""The members that contain any of these are not outlined since they could fool the patterns"""
+_UNSAFE_MARKUP_PATTERN = re.compile(rb'<(?:!\[CDATA\[|!DOCTYPE|!ENTITY|\?)')
+
+"""The comments are removed before outlining since `<` cannot be found elsewhere but in CDATA"""
+_COMMENT_PATTERN = re.compile(rb'<!--.*?-->', re.DOTALL)
+
+_ENTITIES = {'&quot;': '"', '&apos;': "'"}
+
+
+class MemberOutline(NamedTuple):
+    member_prefix: str
+    name: str
+    prefix: str
+    id: str
+    identifier: Optional[str]
+    hrefs: Tuple[str, ...]
+    gml_properties: List[Tuple[str, str]]
+    time_slices_count: int
+
+
+def _quoted_value(match, group: int) -> str:
+    value = match.group(group)
+    if value is None:
+        value = match.group(group + 1)
+
+    return _unescape(value)
+
+
+def _unescape(value: bytes) -> str:
+    return unescape(value.decode('utf-8'), _ENTITIES) if b'&' in value else value.decode('utf-8')
+
+
+def _strip_prefixes(value: str, prefixes: Tuple[str, ...]) -> str:
+    for prefix in prefixes:
+        if value.startswith(prefix):
+            return value[len(prefix):]
+
+    return value
+
+
+class MemberOutliner:
+
+    def __init__(self, gml_prefix: str, xlink_prefix: str) -> None:
+        """
+        Extracts the outline of the members (i.e. `hasMember`) of a dataset out of their raw bytes
+        without parsing them, which is several times faster: the type, the gml:id and the identifier
+        of their feature, the xlink references and the gml:ids of the elements of its time slices
+        (i.e. `timeSlice/*TimeSlice`), as they are extracted by `AIXMFeatureFactory`.
+
+        The UTF-8 encoded members are only supported and the prefixes should be the ones declared by
+        the root of the dataset for the respective namespaces. The members declaring namespaces of
+        their own are not outlined.
+
+        :param gml_prefix:
+        :param xlink_prefix:
+        """
+        gml, xlink = re.escape(gml_prefix.encode()), re.escape(xlink_prefix.encode())
+
+        self._id_pattern = re.compile(rb'\s' + gml + rb':id' + _QUOTED_VALUE)
+        self._identifier_pattern = re.compile(rb'<' + gml + rb':identifier\b[^>]*>([^<]*)</')
+        self._href_pattern = re.compile(rb'\s' + xlink + rb':href' + _QUOTED_VALUE)
+        self._gml_id_pattern = re.compile(rb'\s' + gml + rb':id' + _QUOTED_VALUE)
+
+        self._time_slice_patterns: Dict[Tuple[bytes, bytes], Tuple[Pattern, Pattern]] = {}
+
+    def _time_slice_pattern(self, prefix: bytes, name: bytes) -> Tuple[Pattern, Pattern]:
+        """The patterns of the start and the end tag of the time slices of a feature type"""
+        patterns = self._time_slice_patterns.get((prefix, name))
+
+        if patterns is None:
+            tag = re.escape(prefix + b':' if prefix else b'') + re.escape(name + b'TimeSlice')
+            patterns = re.compile(rb'<' + tag + rb'[\s/>]'), re.compile(rb'</' + tag + rb'\s*>')
+            self._time_slice_patterns[(prefix, name)] = patterns
+
+        return patterns
+
+    def _time_slice_spans(self,
+                          data: bytes,
+                          prefix: bytes,
+                          name: bytes,
+                          start: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        The spans of the content of the time slices (i.e. `timeSlice/*TimeSlice`) of the feature
+
+        :param data: the bytes of the member
+        :param prefix: the prefix of the feature
+        :param name: the name of the feature
+        :param start: where the content of the feature starts
+        :return: None if the time slices cannot be delimited reliably
+        """
+        start_pattern, end_pattern = self._time_slice_pattern(prefix, name)
+        spans = []
+
+        match = start_pattern.search(data, start)
+        while match is not None:
+            # the time slice should be a child of a timeSlice element of the feature
+            parent_start = _START_TAG_PATTERN.match(data, data.rfind(b'<', 0, match.start()))
+            if parent_start is None or (parent_start.group(1) or b'', parent_start.group(2)) \
+                    != (prefix, b'timeSlice'):
+                return None
+
+            tag_end = data.find(b'>', match.start())
+            if tag_end < 0:
+                return None
+
+            if data[tag_end - 1] == ord('/'):
+                spans.append((tag_end, tag_end))
+                end = tag_end
+            else:
+                end_match = end_pattern.search(data, tag_end)
+                if end_match is None:
+                    return None
+
+                spans.append((tag_end + 1, end_match.start()))
+                end = end_match.end()
+
+            match = start_pattern.search(data, end)
+
+        return spans
+
+    def outline(self, data: bytes) -> Optional[MemberOutline]:
+        """
+
+        :param data: the bytes of the member
+        :return: None if the member cannot be outlined reliably, thus it should be parsed instead
+        """
+        if _UNSAFE_MARKUP_PATTERN.search(data) or _NS_DECLARATION_PATTERN.search(data):
+            return None
+
+        if b'<!--' in data:
+            data = _COMMENT_PATTERN.sub(b'', data)
+
+        # the feature is the first child of the member
+        member_start = _START_TAG_PATTERN.match(data)
+        member_tag_end = data.find(b'>')
+        feature_start = _START_TAG_PATTERN.search(data, member_tag_end + 1) \
+            if member_start is not None and member_tag_end >= 0 else None
+        if feature_start is None:
+            return None
+
+        feature_tag_end = data.find(b'>', feature_start.start())
+        feature_id = self._id_pattern.search(data, feature_start.start(), feature_tag_end)
+        if feature_id is None:
+            return None
+
+        prefix, name = feature_start.group(1) or b'', feature_start.group(2)
+
+        time_slice_spans = self._time_slice_spans(data, prefix, name, feature_tag_end)
+        if time_slice_spans is None:
+            return None
+
+        identifier = self._identifier_pattern.search(data, feature_tag_end)
+
+        # the elements with a gml:id within the time slices apart from the time slices themselves
+        gml_properties = []
+        hrefs = []
+        for start, end in time_slice_spans:
+            for match in self._gml_id_pattern.finditer(data, start, end):
+                tag_name = _START_TAG_PATTERN.match(
+                    data, data.rfind(b'<', 0, match.start())).group(2)
+                gml_properties.append((_quoted_value(match, 1), tag_name.decode()))
+
+            hrefs.extend(_strip_prefixes(_quoted_value(match, 1), XLinkField.prefixes)
+                         for match in self._href_pattern.finditer(data, start, end))
+
+        return MemberOutline(
+            member_prefix=(member_start.group(1) or b'').decode(),
+            name=name.decode(),
+            prefix=prefix.decode(),
+            id=_strip_prefixes(_quoted_value(feature_id, 1), ('uuid.',)),
+            identifier=_unescape(identifier.group(1)) if identifier is not None else None,
+            # the xlinks without href are discarded, as in `AIXMFeatureTimeSliceFactory`
+            hrefs=tuple(href for href in hrefs if href),
+            gml_properties=gml_properties,
+            time_slices_count=len(time_slice_spans)
+        )
+
+
+class MemberTimeSlices:
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        Provides the time slices of the outlined features (see `MemberOutliner`) by parsing their
+        member on first access. The time slices of up to `max_entries` features are kept, the least
+        recently used ones being dropped first.
+
+        It is bound to the dataset the features belong to which parses their members (see `bind`).
+
+        :param max_entries:
+        """
+        self.max_entries = max_entries
+
+        """The number of the time slices of each feature per feature position as outlined"""
+        self.time_slices_counts: array = array('i')
+
+        self._parse_time_slices: Optional[Callable[[int], List[AIXMFeatureTimeSlice]]] = None
+        self._time_slices_per_position: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bind(self, parse_time_slices: Callable[[int], List[AIXMFeatureTimeSlice]]) -> None:
+        """
+
+        :param parse_time_slices: parses the time slices of the feature at the given position
+        """
+        self._parse_time_slices = parse_time_slices
+
+        with self._lock:
+            self._time_slices_per_position.clear()
+
+    def get_time_slices(self, position: int) -> List[AIXMFeatureTimeSlice]:
+        """
+
+        :param position: the position of the feature
+        :return:
+        """
+        with self._lock:
+            time_slices = self._time_slices_per_position.get(position)
+
+            if time_slices is not None:
+                self._time_slices_per_position.move_to_end(position)
+                return time_slices
+
+        time_slices = self._parse_time_slices(position)
+
+        with self._lock:
+            self._time_slices_per_position[position] = time_slices
+
+            while len(self._time_slices_per_position) > self.max_entries:
+                self._time_slices_per_position.popitem(last=False)
+
+        return time_slices
+
+    def get_time_slices_count(self, position: int) -> int:
+        return self.time_slices_counts[position]
+
+    def __len__(self) -> int:
+        """
+        :return: the number of features whose time slices are kept
+        """
+        return len(self._time_slices_per_position)
+
+    def __getstate__(self) -> Dict:
+        # neither the parsed time slices nor the dataset are pickled, it is bound again once loaded
+        return {'max_entries': self.max_entries, 'time_slices_counts': self.time_slices_counts}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['max_entries'])
+        self.time_slices_counts = state['time_slices_counts']
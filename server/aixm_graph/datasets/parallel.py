@@ -0,0 +1,496 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import re
+import sys
+from io import BytesIO
+from typing import List, Tuple, Dict, Optional, Type, NamedTuple, BinaryIO
+from xml.sax.saxutils import quoteattr
+
+from lxml import etree
+
+from aixm_graph.datasets.compression import open_dataset_file
+from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureFactory, AIXMFeatureTimeSlice, \
+    GMLProperty, new_feature
+from aixm_graph.datasets.fields import Field, XLinkField
+
+"""The chunks are wrapped in an element with this tag in order to be parsed as standalone
+   documents
+"""
+CHUNK_ROOT_TAG = 'aixmGraphChunk'
+
+XML_DECLARATION_PATTERN = re.compile(rb'^\s*<\?xml[^>]*\?>')
+
+
+class ChunkResult(NamedTuple):
+    """The features are returned as records (see `feature_to_record`) since plain tuples of strings
+       are pickled and unpickled several times faster than the objects they are made of
+    """
+    records: List[tuple]
+    ns_map: Dict[str, str]
+    sequence_ns: str
+
+
+"""The markup within which the sequence tags are not taken into account, per its opening"""
+_SKIPPED_MARKUP_ENDS = {b'<!--': b'-->', b'<![CDATA[': b']]>', b'<?': b'?>'}
+
+_COMMENT_PATTERN = re.compile(rb'<!--.*?-->', re.DOTALL)
+
+
+class ChunkParseError(ValueError):
+
+    def __init__(self, message: str, line: Optional[int] = None) -> None:
+        """
+        Raised when a chunk cannot be parsed. Unlike `etree.XMLSyntaxError` it can be pickled, so
+        that it reaches the parent process when the chunk is parsed in a process pool.
+
+        :param message:
+        :param line: the line of the error within the chunk
+        """
+        super().__init__(message, line)
+        self.message = message
+        self.line = line
+
+    def __str__(self) -> str:
+        return self.message if self.line is None else f'{self.message} (line {self.line})'
+
+
+def _member_start_pattern(sequence_tag: str):
+    return re.compile(rb'<(?:[\w.-]+:)?' + re.escape(sequence_tag.encode()) + rb'[\s/>]')
+
+
+def _member_end_pattern(sequence_tag: str):
+    return re.compile(rb'</(?:[\w.-]+:)?' + re.escape(sequence_tag.encode()) + rb'\s*>')
+
+
+def _markup_pattern(sequence_tag: str):
+    tag = rb'(?:[\w.-]+:)?' + re.escape(sequence_tag.encode())
+
+    # the common `<` is factored out so that the pattern is matched as fast as a single tag
+    return re.compile(rb'<(?:(?P<skipped>!--|!\[CDATA\[|\?)|(?P<start>' + tag + rb'[\s/>])|'
+                      rb'(?P<end>/' + tag + rb'\s*>))')
+
+
+class MemberOffsetScanner:
+
+    def __init__(self, sequence_tag: str) -> None:
+        """
+        Scans consecutive blocks of a file for the start tags of the sequence elements (i.e.
+        `hasMember`) without parsing it. Sequence tags that appear within comments, CDATA sections
+        or processing instructions are not taken into account.
+
+        :param sequence_tag:
+        """
+        self._markup_pattern = _markup_pattern(sequence_tag)
+
+        # a tag might be split between two blocks, so the part of the previous block that has not
+        # been scanned yet is kept
+        self._overlap = len(sequence_tag) + 64
+        self._pending = b''
+        self._pending_offset = 0
+
+        """The end of the comment, CDATA section or processing instruction being skipped (if any)"""
+        self._skipped_markup_end: Optional[bytes] = None
+
+        """The byte offsets of the start tags found so far"""
+        self.offsets: List[int] = []
+
+        """The byte offset right after the last end tag found so far"""
+        self.members_end: int = 0
+
+    def feed(self, block: bytes) -> None:
+        """
+
+        :param block: the next block of the file
+        """
+        self._pending += block
+        self._scan(final=False)
+
+    def close(self) -> None:
+        """
+        Scans the rest of the content once the last block has been fed
+        """
+        self._scan(final=True)
+
+    def _scan(self, final: bool) -> None:
+        data = self._pending
+        # the markup found after this position might be incomplete unless this is the last block
+        scan_end = len(data) if final else len(data) - self._overlap
+        position = 0
+
+        while position < len(data):
+            if self._skipped_markup_end is not None:
+                markup_end = data.find(self._skipped_markup_end, position)
+
+                if markup_end < 0:
+                    # the end might be split between two blocks
+                    position = max(position, len(data) - len(self._skipped_markup_end) + 1)
+                    break
+
+                position = markup_end + len(self._skipped_markup_end)
+                self._skipped_markup_end = None
+                continue
+
+            match = self._markup_pattern.search(data, position)
+
+            if match is None or match.start() > scan_end:
+                position = max(position, scan_end)
+                break
+
+            if match.lastgroup == 'skipped':
+                self._skipped_markup_end = _SKIPPED_MARKUP_ENDS[match.group(0)]
+            elif match.lastgroup == 'start':
+                self.offsets.append(self._pending_offset + match.start())
+            else:
+                self.members_end = self._pending_offset + match.end()
+
+            position = match.end()
+
+        self._pending = data[position:]
+        self._pending_offset += position
+
+
+class ScanningReader:
+
+    def __init__(self, source: BinaryIO, scanner: MemberOffsetScanner) -> None:
+        """
+        Feeds the blocks read from the source to the scanner, so that the members are located while
+        the file is being parsed instead of in a separate pass over it.
+
+        :param source: the (decompressed) content of the file
+        :param scanner:
+        """
+        self._source = source
+        self._scanner = scanner
+
+    def read(self, size: int = -1) -> bytes:
+        block = self._source.read(size)
+        self._scanner.feed(block)
+
+        return block
+
+
+def find_member_offsets(filepath: str,
+                        sequence_tag: str,
+                        block_size: int = 8 * 1024 * 1024) -> Tuple[List[int], int]:
+    """
+    Scans the file for the start tags of the sequence elements (i.e. `hasMember`) without parsing
+    it (see `MemberOffsetScanner`).
+
+    :param filepath:
+    :param sequence_tag:
+    :param block_size: the file is read in blocks of this size
+    :return: the byte offsets of the start tags and the offset right after the last end tag within
+             the (decompressed) content of the file
+    """
+    scanner = MemberOffsetScanner(sequence_tag)
+
+    with open_dataset_file(filepath) as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            scanner.feed(block)
+
+    scanner.close()
+
+    return scanner.offsets, scanner.members_end
+
+
+def members_are_delimited(content: bytes,
+                          offsets: List[int],
+                          members_end: int,
+                          sequence_tag: str) -> bool:
+    """
+    Checks that each span between consecutive offsets starts with the start tag and ends with the
+    end tag of a sequence element and holds no other start tag, so that it can be parsed on its own
+    as a single member. The scan might still be fooled, i.e. by a sequence tag within a DOCTYPE
+    declaration, or miss a member. A start tag within a comment of a member fails the check as well,
+    though it could be parsed, since telling it apart would take parsing the member.
+
+    :param content: the (uncompressed) content of the file, i.e. memory mapped
+    :param offsets: the byte offsets of the members in the file
+    :param members_end: the byte offset right after the last member
+    :param sequence_tag:
+    :return:
+    """
+    start_pattern = _member_start_pattern(sequence_tag)
+    end_pattern = _member_end_pattern(sequence_tag)
+
+    for start, end in zip(offsets, offsets[1:] + [members_end]):
+        if start_pattern.match(content, start, end) is None:
+            return False
+
+        # only whitespace and comments may follow the end tag up to the next member
+        end_tag_start = content.rfind(b'</', start, end)
+        end_tag = end_pattern.match(content, end_tag_start, end) if end_tag_start >= 0 else None
+
+        if end_tag is None or _COMMENT_PATTERN.sub(b'', content[end_tag.end():end]).strip():
+            return False
+
+        if start_pattern.search(content, start + 1, end_tag_start) is not None:
+            return False
+
+    return True
+
+
+def split_into_chunks(offsets: List[int], end: int, chunks_num: int) -> List[Tuple[int, int]]:
+    """
+    Groups consecutive members into (about) equally sized byte ranges.
+
+    :param offsets: the offsets of the members
+    :param end: the offset right after the last member
+    :param chunks_num:
+    :return:
+    """
+    if not offsets:
+        return []
+
+    chunk_size = max(1, (end - offsets[0]) // chunks_num)
+
+    chunks = []
+    chunk_start = offsets[0]
+    for offset in offsets[1:]:
+        if offset - chunk_start >= chunk_size:
+            chunks.append((chunk_start, offset))
+            chunk_start = offset
+    chunks.append((chunk_start, end))
+
+    return chunks
+
+
+def read_prolog(filepath: str, first_member_offset: int) -> Tuple[bytes, Dict[Optional[str], str]]:
+    """
+    Reads the part of the file before the first member in order to retrieve the XML declaration
+    and the namespaces declared by the root element and its preceding siblings.
+
+    :param filepath:
+    :param first_member_offset:
+    :return:
+    """
+    with open_dataset_file(filepath) as f:
+        header = f.read(first_member_offset)
+
+    declaration = XML_DECLARATION_PATTERN.match(header)
+
+    parser = etree.XMLPullParser(events=('start-ns',), remove_comments=True)
+    parser.feed(header)
+
+    nsmap = {}
+    for _, (ns_code, ns_link) in parser.read_events():
+        nsmap[ns_code or None] = ns_link
+
+    return declaration.group(0).strip() if declaration else b'', nsmap
+
+
+def _make_chunk_root(nsmap: Dict[Optional[str], str]) -> Tuple[bytes, bytes]:
+    declarations = ' '.join(
+        f'xmlns:{ns_code}={quoteattr(ns_link)}' if ns_code else f'xmlns={quoteattr(ns_link)}'
+        for ns_code, ns_link in nsmap.items()
+    )
+
+    return f'<{CHUNK_ROOT_TAG} {declarations}>'.encode(), f'</{CHUNK_ROOT_TAG}>'.encode()
+
+
+def parse_fragment(fileobj: BinaryIO,
+                   start: int,
+                   end: int,
+                   declaration: bytes,
+                   nsmap: Dict[Optional[str], str]) -> etree.Element:
+    """
+    Parses the given byte range of the file (i.e. a single member) wrapped in a root element
+    declaring the namespaces of the original root. Unlike `parse_chunk` the comments are kept.
+
+    :param fileobj: the (decompressed) content of the dataset file
+    :param start:
+    :param end:
+    :param declaration: the XML declaration of the file (if any) in order to keep its encoding
+    :param nsmap: the namespaces declared before the first member
+    :return: the wrapping root element
+    """
+    fileobj.seek(start)
+    data = fileobj.read(end - start)
+
+    root_start, root_end = _make_chunk_root(nsmap)
+
+    return etree.fromstring(declaration + root_start + data + root_end)
+
+
+def parse_chunk(filepath: str,
+                start: int,
+                end: int,
+                declaration: bytes,
+                nsmap: Dict[Optional[str], str],
+                sequence_tag: str,
+                feature_factory: Type[AIXMFeatureFactory] = AIXMFeatureFactory) -> ChunkResult:
+    """
+    Parses the features of the members found within the given byte range of the file. The range
+    is wrapped in a root element declaring the namespaces of the original root so that it can be
+    parsed on its own, i.e. in a separate process.
+
+    :param filepath:
+    :param start:
+    :param end:
+    :param declaration: the XML declaration of the file (if any) in order to keep its encoding
+    :param nsmap: the namespaces declared before the first member
+    :param sequence_tag:
+    :param feature_factory:
+    :return:
+    """
+    with open_dataset_file(filepath) as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    root_start, root_end = _make_chunk_root(nsmap)
+
+    context = etree.iterparse(BytesIO(declaration + root_start + data + root_end),
+                              events=('end', 'start-ns'),
+                              remove_comments=True,
+                              tag=f'{{*}}{sequence_tag}')
+
+    try:
+        return _parse_chunk_members(context, feature_factory)
+    except etree.XMLSyntaxError as e:
+        raise ChunkParseError(f'Failed to parse the bytes {start}-{end} of {filepath}: {e.msg}',
+                              line=e.lineno)
+    finally:
+        del context
+
+
+def _parse_chunk_members(context: etree.iterparse,
+                         feature_factory: Type[AIXMFeatureFactory]) -> ChunkResult:
+    records = []
+    ns_map = {}
+    sequence_ns = ''
+
+    for event, element in context:
+        if event == 'start-ns':
+            ns_code, ns_link = element
+            if ns_code:
+                ns_map[ns_code] = ns_link
+        elif event == 'end':
+            if element.prefix and not sequence_ns:
+                sequence_ns = element.nsmap[element.prefix]
+
+            feature = feature_factory.feature_from_sequence_element(seq_element=element)
+            records.append(feature_to_record(feature))
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    return ChunkResult(records=records, ns_map=ns_map, sequence_ns=sequence_ns)
+
+
+def _field_to_record(field: Field) -> tuple:
+    return field.name, field.text, field._attrib, field.prefix
+
+
+def _time_slice_to_record(time_slice: AIXMFeatureTimeSlice) -> tuple:
+    return (_field_to_record(time_slice),
+            time_slice.version,
+            tuple(_field_to_record(field) for field in time_slice.data_fields),
+            tuple(_field_to_record(xlink) + (xlink.href,) for xlink in time_slice.xlinks),
+            tuple((gml.id, gml.name, gml.serializable) for gml in time_slice.gml_properties))
+
+
+def feature_to_record(feature: AIXMFeature) -> tuple:
+    """
+    Flattens a feature into nested tuples of strings, i.e. the record that a chunk parsed in a
+    separate process is sent back with. It is turned back into a feature by `feature_from_record`.
+
+    :param feature:
+    :return:
+    """
+    return (_field_to_record(feature),
+            feature.id,
+            feature.identifier,
+            tuple(_time_slice_to_record(time_slice) for time_slice in feature.time_slices))
+
+
+def _set_field(field: Field, record: tuple) -> Field:
+    name, field.text, attrib, prefix = record
+    field.name = sys.intern(name)
+    field.prefix = sys.intern(prefix)
+
+    # the attribute names are interned by the worker, so pickle already shares them within a chunk
+    field._attrib = attrib
+
+    return field
+
+
+def _xlink_from_record(record: tuple) -> XLinkField:
+    xlink = _set_field(XLinkField.__new__(XLinkField), record[:4])
+    xlink._href, xlink._title, xlink._broken = record[4], None, False
+
+    return xlink
+
+
+def _gml_property_from_record(record: tuple) -> GMLProperty:
+    gml_property = GMLProperty.__new__(GMLProperty)
+    gml_property.id, name, gml_property.serializable = record
+    gml_property.name = sys.intern(name)
+
+    return gml_property
+
+
+def _time_slice_from_record(record: tuple) -> AIXMFeatureTimeSlice:
+    field_record, version, data_field_records, xlink_records, gml_records = record
+
+    time_slice = _set_field(AIXMFeatureTimeSlice.__new__(AIXMFeatureTimeSlice), field_record)
+    time_slice.version = version
+    time_slice._data_fields = [_set_field(Field.__new__(Field), data_field_record)
+                               for data_field_record in data_field_records]
+    time_slice._xlinks = [_xlink_from_record(xlink_record) for xlink_record in xlink_records]
+    time_slice._gml_properties = [_gml_property_from_record(gml_record)
+                                  for gml_record in gml_records]
+
+    return time_slice
+
+
+def feature_from_record(record: tuple) -> AIXMFeature:
+    """
+    Builds the feature flattened by `feature_to_record`. The names of its fields are interned as
+    if it had been parsed in this process.
+
+    :param record:
+    :return:
+    """
+    field_record, feature_id, identifier, time_slice_records = record
+
+    feature = _set_field(new_feature(field_record[0]), field_record)
+    feature.id = feature_id
+    feature.identifier = identifier
+    feature.position = None
+    feature.time_slices = [_time_slice_from_record(time_slice_record)
+                           for time_slice_record in time_slice_records]
+
+    return feature
@@ -0,0 +1,93 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+from typing import Dict, Any, Optional
+
+
+class ProcessingProgress:
+    QUEUED = 'queued'
+    LOAD = 'load'
+    PARSE = 'parse'
+    REVERSE_ASSOCIATIONS = 'reverse_associations'
+    GRAPH_FRAGMENTS = 'graph_fragments'
+    TEXT_INDEX = 'text_index'
+    STATS = 'stats'
+    COLUMNS = 'columns'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self,
+                 phase: str = QUEUED,
+                 bytes_total: int = 0,
+                 bytes_read: int = 0,
+                 features_indexed: int = 0,
+                 error: Optional[str] = None) -> None:
+        """
+        Keeps track of the processing of a dataset, i.e. the phase it is in and how much of its
+        file has been parsed so far.
+
+        :param phase:
+        :param bytes_total: the size of the dataset file
+        :param bytes_read:
+        :param features_indexed:
+        :param error: the reason of the failure if the phase is `failed`
+        """
+        self.phase = phase
+        self.bytes_total = bytes_total
+        self.bytes_read = bytes_read
+        self.features_indexed = features_indexed
+        self.error = error
+
+    @property
+    def is_finished(self) -> bool:
+        return self.phase in (self.DONE, self.FAILED)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'phase': self.phase,
+            'bytes_total': self.bytes_total,
+            'bytes_read': self.bytes_read,
+            'features_indexed': self.features_indexed,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]):
+        """
+
+        :param data:
+        :return: ProcessingProgress
+        """
+        return cls(**data)
+
@@ -0,0 +1,100 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+from typing import BinaryIO
+
+from lxml import etree
+
+
+class StreamingTreeWriter:
+
+    def __init__(self, fileobj: BinaryIO, root: etree.Element) -> None:
+        """
+        Writes an XML document child by child, so that only one child of the root is kept in
+        memory at a time, while the output is the same as serializing the whole tree at once with
+        `etree.tostring(root, encoding='utf-8', xml_declaration=True, pretty_print=True)`.
+
+        Each child is serialized temporarily attached to the (otherwise empty) root, so that it
+        inherits its namespace declarations and indentation, and only its own part of the output
+        is written.
+
+        :param fileobj: a binary file object
+        :param root: the root element, without children
+        """
+        self._fileobj = fileobj
+        self._root = root
+        self._children_num = 0
+
+        self._start_tag = None
+        self._end_tag = f'</{self._qualified_tag(root)}>\n'.encode('utf-8')
+
+    @staticmethod
+    def _qualified_tag(element: etree.Element) -> str:
+        localname = etree.QName(element).localname
+
+        return f'{element.prefix}:{localname}' if element.prefix else localname
+
+    def __enter__(self):
+        self._fileobj.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+
+        return self
+
+    def write(self, child: etree.Element) -> None:
+        """
+
+        :param child:
+        """
+        self._root.append(child)
+        data = etree.tostring(self._root, encoding='utf-8', pretty_print=True)
+        self._root.remove(child)
+
+        # the start tag ends at the first '>' since it is escaped within attribute values
+        start_tag_end = data.index(b'>') + 1
+
+        if self._children_num == 0:
+            self._start_tag = data[:start_tag_end]
+            self._fileobj.write(self._start_tag + b'\n')
+
+        # skip the new line following the start tag of the root
+        self._fileobj.write(data[start_tag_end + 1:-len(self._end_tag)])
+        self._children_num += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            return
+
+        if self._children_num == 0:
+            self._fileobj.write(etree.tostring(self._root, encoding='utf-8', pretty_print=True))
+        else:
+            self._fileobj.write(self._end_tag)
@@ -0,0 +1,103 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import sys
+from collections import defaultdict
+from typing import Dict, List, Iterable, Optional, Set
+
+
+class TrigramIndex:
+    ngram_size = 3
+
+    def __init__(self) -> None:
+        """
+        Inverted index from the (lower cased) trigrams of a collection of texts to the positions of
+        the documents they belong to. A document is identified by its position in an external
+        sequence, i.e. the features of a type, and may consist of several texts, i.e. its fields.
+
+        Looking up a query returns the documents that contain all of its trigrams which is a
+        superset of the ones that contain the query itself, thus the candidates still need to be
+        verified by the caller.
+        """
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    @classmethod
+    def _ngrams(cls, text: str) -> Set[str]:
+        return {text[i:i + cls.ngram_size] for i in range(len(text) - cls.ngram_size + 1)}
+
+    def add(self, position: int, texts: Iterable[str]) -> None:
+        """
+        Documents are expected to be added in increasing position order so that the posting lists
+        are kept sorted without any extra cost.
+
+        :param position:
+        :param texts:
+        """
+        ngrams = set()
+        for text in texts:
+            ngrams |= self._ngrams(text.lower())
+
+        for ngram in ngrams:
+            self._postings[ngram].append(position)
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """
+        :param query:
+        :return: the sorted positions of the documents that might contain the query or None if the
+                 query is too short to be looked up in the index
+        """
+        ngrams = self._ngrams(query.lower())
+
+        if not ngrams:
+            return None
+
+        postings = sorted((self._postings.get(ngram, []) for ngram in ngrams), key=len)
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+
+        return sorted(result)
+
+    def memory_size(self) -> int:
+        """
+        The positions are not counted since they are shared with the rest of the posting lists of
+        the same document.
+
+        :return: the approximate size in bytes of the trigrams and their posting lists
+        """
+        return sys.getsizeof(self._postings) + sum(sys.getsizeof(ngram) + sys.getsizeof(positions)
+                                                   for ngram, positions in self._postings.items())
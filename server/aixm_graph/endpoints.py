@@ -32,23 +32,30 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import calendar
+import hashlib
 import logging
 import os
 from functools import wraps
-from itertools import tee
-from typing import Callable, TypeVar, Tuple, Any, Dict, Union, List
+from typing import Callable, TypeVar, Tuple, Any, Dict, Union, List, Iterator, Optional, Iterable
 
 from flask import Blueprint
-from flask import request, current_app as app, send_file
+from flask import request, current_app as app, send_file, Response, json
+from werkzeug.http import quote_etag, unquote_etag, http_date, parse_date
 from werkzeug.utils import secure_filename
 
-from aixm_graph import cache
+from aixm_graph import cache, uploads
+from aixm_graph.datasets.compression import COMPRESSION_EXTENSIONS, GZIP_EXTENSION, MIMETYPES, \
+    compressed_filepath
 from aixm_graph.errors import APIError, NotFoundError, BadRequestError
+from aixm_graph.graph import Node, SerializedNode, Edge, GraphTraversal, chunked, \
+    iter_serialized_graph
 from aixm_graph import utils
 
 _logger = logging.getLogger(__name__)
 
-ResponseType = Tuple[Union[List[Dict[str, Any]], Dict[str, Any]], int]
+ResponseType = Union[Tuple[Union[List[Dict[str, Any]], Dict[str, Any]], int],
+                     Tuple[Union[List[Dict[str, Any]], Dict[str, Any]], int, Dict[str, str]]]
 
 aixm_graph_blueprint = Blueprint('aixm_graph', __name__, url_prefix='/api')
 
@@ -61,8 +68,17 @@ def handle_response(f) -> Callable:
     @wraps(f)
     def decorator(*args, **kwargs):
         result = {}
+        headers = {}
         try:
-            result['data'], status_code = f(*args, **kwargs)
+            # the headers of the response, i.e. its validators, are optionally returned as well
+            data, status_code, *extra = f(*args, **kwargs)
+
+            # already made responses, i.e. files, are returned as they are
+            if isinstance(data, Response):
+                return data
+
+            result['data'] = data
+            headers = extra[0] if extra else {}
         except APIError as e:
             _logger.error(str(e))
             result['error'] = e.description
@@ -72,26 +88,172 @@ def handle_response(f) -> Callable:
             result['error'] = str(e)
             status_code = 500
 
-        return result, status_code
+        return result, status_code, headers
     return decorator
 
 
+def _make_validators(version: Optional[str],
+                     *query: Any,
+                     last_modified: Optional[float] = None) -> Dict[str, str]:
+    """
+    Derives the ETag of a response from the version of the data it is generated from along with
+    the query that selects them, so that it is the same among requests (and workers) as long as
+    the data remain unchanged. The clients are asked to revalidate it on every use.
+
+    :param version: i.e. `AIXMDataSet.version`. If None, the response is not validated
+    :param query:
+    :param last_modified: seconds since the epoch
+    :return: the ETag, Last-Modified (if given) and Cache-Control headers
+    """
+    if version is None:
+        return {}
+
+    headers = {
+        'ETag': quote_etag(hashlib.sha1(repr((version,) + query).encode()).hexdigest()),
+        'Cache-Control': 'no-cache'
+    }
+
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    return headers
+
+
+def _is_not_modified(validators: Dict[str, str]) -> bool:
+    """
+    Checks the conditional headers of the request against the validators of the response, so
+    that the response does not need to be generated if the client has it already. If-Modified-Since
+    is taken into account only in the absence of If-None-Match.
+
+    :param validators: as returned by `_make_validators`
+    :return:
+    """
+    if 'ETag' not in validators:
+        return False
+
+    if request.if_none_match:
+        return request.if_none_match.contains(unquote_etag(validators['ETag'])[0])
+
+    if 'Last-Modified' in validators and request.if_modified_since is not None:
+        last_modified = calendar.timegm(parse_date(validators['Last-Modified']).utctimetuple())
+
+        return last_modified <= calendar.timegm(request.if_modified_since.utctimetuple())
+
+    return False
+
+
+def _not_modified(validators: Dict[str, str]) -> ResponseType:
+    """
+
+    :param validators: as returned by `_make_validators`
+    :return: an empty 304 response
+    """
+    response = Response(status=304, headers=validators)
+
+    return response, response.status_code
+
+
+def _get_positive_int_arg(name: str, default: int) -> int:
+    """
+
+    :param name: the name of the URL query argument
+    :param default:
+    :return:
+    """
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = 0
+
+    if value < 1:
+        raise BadRequestError(f'{name} should be a positive integer')
+
+    return value
+
+
+def _iter_graph_response(data: Dict[str, Any],
+                         items: Iterable[Union[Node, SerializedNode, Edge]],
+                         trailing_data: Optional[Callable[[], Dict[str, Any]]] = None
+                         ) -> Iterator[str]:
+    """
+    Serializes incrementally the response of `handle_response` with the given data, with the graph
+    serialized on its own while its nodes and edges are being produced (see
+    `iter_serialized_graph`) under the `graph` key.
+
+    :param data: the rest of the data of the response
+    :param items: the nodes and edges of the graph
+    :param trailing_data: the data that are known only once the graph has been produced, i.e.
+                          whether it was truncated, which follow the graph in the response
+    :return:
+    """
+    data = json.dumps(data)[1:-1]
+
+    yield f'{{"data":{{{data},"graph":' if data else '{"data":{"graph":'
+    yield from iter_serialized_graph(items)
+
+    if trailing_data is not None:
+        yield f',{json.dumps(trailing_data())[1:-1]}'
+
+    yield '}}'
+
+
+def _stream_graph_response(data: Dict[str, Any],
+                           items: Iterable[Union[Node, SerializedNode, Edge]],
+                           cache_key: Optional[Tuple[Any, ...]] = None,
+                           trailing_data: Optional[Callable[[], Dict[str, Any]]] = None
+                           ) -> Response:
+    """
+    Streams the response in chunks while the graph is being created and serialized, i.e. its nodes
+    and edges are taken from the traversal that reaches them as the response is being sent, instead
+    of creating and serializing it as a whole beforehand.
+
+    :param data: the rest of the data of the response
+    :param items: the nodes and edges of the graph
+    :param cache_key: if given, the streamed response is cached in `cache.GRAPH_PAGES` unless it
+                      exceeds its size
+    :param trailing_data: see `_iter_graph_response`
+    :return:
+    """
+    def generate() -> Iterator[bytes]:
+        chunks = []
+        size = 0
+
+        for chunk in chunked(_iter_graph_response(data, items, trailing_data)):
+            chunk = chunk.encode()
+            size += len(chunk)
+
+            if cache_key is not None and size <= cache.GRAPH_PAGES.max_bytes:
+                chunks.append(chunk)
+
+            yield chunk
+
+        if cache_key is not None and size <= cache.GRAPH_PAGES.max_bytes:
+            cache.GRAPH_PAGES.put(cache_key, b''.join(chunks))
+
+    return Response(generate(), mimetype='application/json')
+
+
 @aixm_graph_blueprint.route('/datasets', methods=['GET'])
 @handle_response
 def get_datasets() -> ResponseType:
     """
-    Retrieves and the returns the id and name of all available datasets
+    Retrieves and the returns the id and name of all available datasets. If the client has them
+    already (If-None-Match) 304 is returned instead.
     :return:
     """
     datasets = cache.get_datasets()
 
+    validators = _make_validators('datasets', *((dataset.id, dataset.name) for dataset in datasets))
+    if _is_not_modified(validators):
+        return _not_modified(validators)
+
     return [
        {
            "dataset_name": dataset.name,
            "dataset_id": dataset.id
        }
        for dataset in datasets
-    ], 200
+    ], 200, validators
 
 
 @aixm_graph_blueprint.route('/datasets/<dataset_id>/feature_types', methods=['GET'])
@@ -100,6 +262,9 @@ def get_dataset_feature_types(dataset_id: str) -> ResponseType:
     """
     Retrieves info for the available feature types of the dataset i.e. name, how many features
     it has and how many of them have broken xlink references.
+
+    If the dataset is still being processed its status is returned instead with 202, while if the
+    client has them already (If-None-Match/If-Modified-Since) 304 is returned instead.
     :param dataset_id:
     :return:
     """
@@ -108,8 +273,15 @@ def get_dataset_feature_types(dataset_id: str) -> ResponseType:
     if dataset is None:
         raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
 
-    if not dataset.feature_type_stats:
-        dataset.process()
+    if not cache.ensure_processed(dataset):
+        return {
+            'status': cache.get_processing_progress(dataset).to_json()
+        }, 202
+
+    validators = _make_validators(dataset.version, 'feature_types',
+                                  last_modified=dataset.processed_at)
+    if _is_not_modified(validators):
+        return _not_modified(validators)
 
     feature_types = [
         {
@@ -123,6 +295,82 @@ def get_dataset_feature_types(dataset_id: str) -> ResponseType:
 
     return {
         "feature_types": feature_types
+    }, 200, validators
+
+
+@aixm_graph_blueprint.route('/datasets/<dataset_id>/status', methods=['GET'])
+@handle_response
+def get_dataset_status(dataset_id: str) -> ResponseType:
+    """
+    Retrieves the processing status of the dataset, i.e. its phase and how much of it has been
+    parsed so far, as well as the status of its skeleton. The processing, or else the generation
+    of the skeleton, is scheduled if it has not been already.
+
+    :param dataset_id:
+    :return:
+    """
+    dataset = cache.get_dataset_by_id(dataset_id)
+
+    if dataset is None:
+        raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
+
+    if dataset.feature_type_stats is None:
+        cache.schedule_processing(dataset)
+    elif dataset.skeleton_filepath is None:
+        cache.schedule_skeleton_generation(dataset)
+
+    return {
+        'status': cache.get_processing_progress(dataset).to_json(),
+        'skeleton': cache.get_skeleton_status(dataset)
+    }, 200
+
+
+@aixm_graph_blueprint.route('/datasets/<dataset_id>', methods=['DELETE'])
+@handle_response
+def delete_dataset(dataset_id: str) -> ResponseType:
+    """
+    Deletes the dataset so that its memory is freed along with its uploaded file and skeleton
+    (unless they are shared with another dataset).
+
+    :param dataset_id:
+    :return:
+    """
+    dataset = cache.get_dataset_by_id(dataset_id)
+
+    if dataset is None:
+        raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
+
+    is_uploaded = os.path.dirname(os.path.abspath(dataset.filepath)) == \
+        os.path.abspath(app.config['UPLOAD_FOLDER'])
+
+    cache.delete_dataset(dataset, remove_files=is_uploaded)
+
+    return {
+        'dataset_id': dataset_id
+    }, 200
+
+
+@aixm_graph_blueprint.route('/datasets/<dataset_id>/pin', methods=['PUT', 'DELETE'])
+@handle_response
+def pin_dataset(dataset_id: str) -> ResponseType:
+    """
+    Pins (PUT) or unpins (DELETE) the dataset. A pinned dataset is not evicted from memory when
+    the memory budget of the datasets is exceeded.
+
+    :param dataset_id:
+    :return:
+    """
+    dataset = cache.get_dataset_by_id(dataset_id)
+
+    if dataset is None:
+        raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
+
+    pinned = request.method == 'PUT'
+    cache.pin_dataset(dataset, pinned=pinned)
+
+    return {
+        'dataset_id': dataset_id,
+        'pinned': pinned
     }, 200
 
 
@@ -131,40 +379,120 @@ def get_dataset_feature_types(dataset_id: str) -> ResponseType:
 @handle_response
 def get_graph_for_feature_type(dataset_id: str, feature_type_name: str) -> ResponseType:
     """
-    Generates the graph for a specific feature type paginated based on the offset and limit provided
-    in the URL query.
+    Generates the graph for a specific feature type paginated based on the offset (or cursor) and
+    limit provided in the URL query. The cursors of the next and previous pages are returned along
+    with their offsets, and since they point at the position of their first feature, the pages
+    they point to are found without going through the features before them.
+
+    The response is streamed while the graph is being serialized and then cached per dataset,
+    feature type, key, offset (or cursor) and limit in order to be served from there while the
+    dataset remains unchanged. If the dataset is still being processed (or reloaded) its status is
+    returned instead with 202, while if the client has it already (If-None-Match/If-Modified-Since)
+    304 is returned before the graph is generated.
 
     :param dataset_id:
     :param feature_type_name:
     :return:
     """
-    offset = int(request.args.get('offset', 0))
+    cursor = request.args.get('cursor')
     limit = int(request.args.get('limit', app.config['PAGE_LIMIT']))
     field_value = request.args.get('key')
+    key = field_value or ''
+
+    if cursor is not None:
+        try:
+            start, offset = utils.decode_cursor(cursor, key, limit)
+        except ValueError as e:
+            raise BadRequestError(str(e))
+    else:
+        start, offset = None, int(request.args.get('offset', 0))
 
     dataset = cache.get_dataset_by_id(dataset_id)
 
     if dataset is None:
         raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
 
+    if not cache.ensure_processed(dataset):
+        return {
+            'status': cache.get_processing_progress(dataset).to_json()
+        }, 202
+
     if not dataset.has_feature_type_name(feature_type_name):
         raise NotFoundError(f'Dataset has not feature type with name {feature_type_name}')
 
-    # filter features returns a generator and we need it twice here, hence the use of tee
-    features, _features = tee(dataset.filter_features(name=feature_type_name,
-                                                      field_value=field_value))
+    page_key = (dataset_id, feature_type_name, key, cursor or offset, limit)
 
-    graph = dataset.get_graph(features=features, offset=offset, limit=limit + offset)
+    validators = _make_validators(dataset.version, *page_key[1:],
+                                  last_modified=dataset.processed_at)
+    if _is_not_modified(validators):
+        return _not_modified(validators)
 
-    size = sum(1 for _ in _features)
+    page = cache.GRAPH_PAGES.get(page_key)
 
-    return {
+    if page is not None:
+        response = Response(page, mimetype='application/json', headers=validators)
+
+        return response, response.status_code
+
+    if start is None:
+        start = dataset.get_page_start(feature_type_name, field_value, offset)
+
+    features, next_start = dataset.get_features_page(feature_type_name, field_value, start, limit)
+    prev_start = dataset.get_prev_page_start(feature_type_name, field_value, start, limit)
+
+    size = dataset.count_features(feature_type_name, field_value)
+
+    response = _stream_graph_response({
         'offset': offset,
         'limit': limit,
         'size': size,
-        'graph': graph.to_json(),
         'next_offset': utils.get_next_offset(offset, limit, size),
         'prev_offset': utils.get_prev_offset(offset, limit),
+        'next_cursor': utils.encode_cursor(next_start, offset + limit, key, limit)
+        if next_start is not None else None,
+        'prev_cursor': utils.encode_cursor(prev_start, max(offset - limit, 0), key, limit)
+        if prev_start is not None else None,
+    }, dataset.iter_graph(features), cache_key=page_key)
+    response.headers.update(validators)
+
+    return response, response.status_code
+
+
+@aixm_graph_blueprint.route('/graph_cache', methods=['GET'])
+@handle_response
+def get_graph_cache_stats() -> ResponseType:
+    """
+    Retrieves the stats of the cache of the graph pages, i.e. its hits, misses, number of entries
+    and total size along with their limits.
+
+    :return:
+    """
+    return cache.GRAPH_PAGES.stats(), 200
+
+
+@aixm_graph_blueprint.route('/memory', methods=['GET'])
+@handle_response
+def get_memory_stats() -> ResponseType:
+    """
+    Retrieves the memory budget of the datasets and their (approximate) memory usage, in total and
+    per processed dataset from the least to the most recently used one.
+
+    :return:
+    """
+    pinned_ids = cache.get_pinned_ids()
+
+    return {
+        'budget': cache.MEMORY_BUDGET,
+        'usage': cache.get_memory_usage(),
+        'datasets': [
+            {
+                'dataset_id': dataset.id,
+                'memory_size': dataset.memory_size,
+                'pinned': dataset.id in pinned_ids
+            }
+            for dataset in cache.get_datasets_by_last_use()
+            if dataset.feature_type_stats is not None
+        ]
     }, 200
 
 
@@ -172,34 +500,133 @@ def get_graph_for_feature_type(dataset_id: str, feature_type_name: str) -> Respo
 @handle_response
 def get_graph_for_feature(dataset_id: str, feature_id: str) -> ResponseType:
     """
-    Generates the graph for a specific feature of the dataset
+    Generates the graph for a specific feature of the dataset which is streamed while being
+    serialized. If the client has it already (If-None-Match/If-Modified-Since) 304 is returned
+    before the graph is generated.
+
+    The neighbourhood of the feature can be requested as well via the URL query:
+        - depth: how many associations away from the feature the graph expands (default 1)
+        - max_nodes: the max number of nodes of the graph (default and upper bound
+          `MAX_GRAPH_NODES`), beyond which it is truncated
+        - feature_types: comma separated feature types the graph is limited to
 
     :param dataset_id:
     :param feature_id:
     :return:
     """
+    neighbourhood_query = {'depth', 'max_nodes', 'feature_types'} & set(request.args)
+
+    depth = _get_positive_int_arg('depth', 1)
+    max_nodes = min(_get_positive_int_arg('max_nodes', app.config['MAX_GRAPH_NODES']),
+                    app.config['MAX_GRAPH_NODES'])
+    feature_types = request.args.get('feature_types')
+    feature_types = set(feature_types.split(',')) if feature_types else None
+
     dataset = cache.get_dataset_by_id(dataset_id)
 
     if dataset is None:
         raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
 
+    if not cache.ensure_processed(dataset):
+        return {
+            'status': cache.get_processing_progress(dataset).to_json()
+        }, 202
+
     feature = dataset.get_feature_by_id(feature_id)
 
     if feature is None:
         raise NotFoundError(f'Feature with id {feature_id} does not exist')
 
-    graph = dataset.get_graph_for_feature(feature=feature)
+    # the graph of the feature itself is not bounded, thus neither is it shaped by the query
+    if neighbourhood_query:
+        query = ('neighbourhood', depth, max_nodes, sorted(feature_types or []))
+    else:
+        query = ('feature',)
+
+    validators = _make_validators(dataset.version, feature_id, *query,
+                                  last_modified=dataset.processed_at)
+    if _is_not_modified(validators):
+        return _not_modified(validators)
+
+    if neighbourhood_query:
+        # whether the graph is truncated is known once it has been traversed
+        traversal = GraphTraversal(dataset.iter_neighbourhood_graph(feature=feature,
+                                                                    depth=depth,
+                                                                    max_nodes=max_nodes,
+                                                                    feature_types=feature_types))
+        response = _stream_graph_response({'depth': depth}, traversal,
+                                          trailing_data=lambda: {'truncated': traversal.outcome})
+    else:
+        response = _stream_graph_response({}, dataset.iter_graph_for_feature(feature=feature))
+    response.headers.update(validators)
+
+    return response, response.status_code
+
+
+@aixm_graph_blueprint.route('/datasets/<dataset_id>/paths', methods=['GET'])
+@handle_response
+def get_path_graph(dataset_id: str) -> ResponseType:
+    """
+    Generates the graph of one of the shortest paths between the features given in the `from` and
+    `to` arguments of the URL query via their associations (either way). The path can be up to
+    `max_depth` associations long (default and upper bound `PATH_MAX_DEPTH`) and is searched for
+    up to `PATH_TIME_BUDGET` seconds.
 
-    return {
-        'graph': graph.to_json()
-    }, 200
+    :param dataset_id:
+    :return:
+    """
+    source_id = request.args.get('from')
+    target_id = request.args.get('to')
+
+    if not source_id or not target_id:
+        raise BadRequestError('Both from and to features should be provided')
+
+    max_depth = min(_get_positive_int_arg('max_depth', app.config['PATH_MAX_DEPTH']),
+                    app.config['PATH_MAX_DEPTH'])
+
+    dataset = cache.get_dataset_by_id(dataset_id)
+
+    if dataset is None:
+        raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
+
+    if not cache.ensure_processed(dataset):
+        return {
+            'status': cache.get_processing_progress(dataset).to_json()
+        }, 202
+
+    source, target = dataset.get_feature_by_id(source_id), dataset.get_feature_by_id(target_id)
+
+    for feature_id, feature in ((source_id, source), (target_id, target)):
+        if feature is None:
+            raise NotFoundError(f'Feature with id {feature_id} does not exist')
+
+    validators = _make_validators(dataset.version, 'paths', source_id, target_id, max_depth,
+                                  last_modified=dataset.processed_at)
+    if _is_not_modified(validators):
+        return _not_modified(validators)
+
+    path, timed_out = dataset.find_path(source, target,
+                                        max_depth=max_depth,
+                                        time_budget=app.config['PATH_TIME_BUDGET'])
+
+    response = _stream_graph_response({
+        'found': path is not None,
+        'length': len(path) - 1 if path is not None else None,
+        'timed_out': timed_out,
+    }, dataset.iter_path_graph(path) if path is not None else [])
+
+    # a search that ran out of time might succeed if repeated
+    if not timed_out:
+        response.headers.update(validators)
+
+    return response, response.status_code
 
 
 @aixm_graph_blueprint.route('/upload', methods=['POST'])
 @handle_response
 def upload_aixm_dataset() -> ResponseType:
     """
-    Uploads a dataset after applying some validation.
+    Uploads a dataset after applying some validation and schedules its processing.
     The max size of the file is handled by nginx.
 
     :return:
@@ -214,9 +641,22 @@ def upload_aixm_dataset() -> ResponseType:
 
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
+    dataset_options = uploads.get_dataset_options()
 
-    dataset = cache.create_dataset(filepath)
+    # the dataset might have been parsed already while being uploaded
+    if isinstance(file.stream, uploads.ParsingUploadStream):
+        parsed_dataset = file.stream.save()
+    else:
+        file.save(filepath)
+        parsed_dataset = None
+
+    if parsed_dataset is not None:
+        dataset = cache.add_dataset(parsed_dataset, **dataset_options)
+    else:
+        dataset = cache.create_dataset(filepath, **dataset_options)
+
+    # the processing is done in the background and its progress can be followed via the status
+    cache.schedule_processing(dataset)
 
     return {
         'dataset_name': dataset.name,
@@ -225,16 +665,72 @@ def upload_aixm_dataset() -> ResponseType:
 
 
 @aixm_graph_blueprint.route('/datasets/<dataset_id>/download', methods=['GET'])
-def download_skeleton(dataset_id: str):
+@handle_response
+def download_skeleton(dataset_id: str) -> ResponseType:
     """
     Returns the generated skeleton of the dataset as an attachment in the response so it can be
-    downloaded as a file in the browser.
+    downloaded as a file in the browser. The file is served conditionally (ETag) and partially
+    (Range) so that downloads can be resumed, and its gzipped copy is served instead (if it
+    exists) to the clients that accept it.
+
+    A compressed copy of the skeleton can be requested as well via the `compression` query
+    parameter (gz, bz2, xz or zip).
+
+    If the dataset or its skeleton are still being generated the respective status is returned
+    instead with 202.
 
     :param dataset_id:
     :return:
     """
+    compression = request.args.get('compression')
+
+    if compression is not None:
+        compression = f'.{compression}'
+
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise BadRequestError(f'Compression not supported. Supported compressions: '
+                                  f'[{", ".join(ext[1:] for ext in COMPRESSION_EXTENSIONS)}]')
+
     dataset = cache.get_dataset_by_id(dataset_id)
 
-    skeleton_filepath = dataset.generate_skeleton()
+    if dataset is None:
+        raise NotFoundError(f'Dataset with id {dataset_id} does not exist')
+
+    if not cache.ensure_processed(dataset):
+        return {
+            'status': cache.get_processing_progress(dataset).to_json(),
+            'skeleton': cache.get_skeleton_status(dataset)
+        }, 202
+
+    skeleton_filepath = cache.ensure_skeleton(dataset, compression)
+
+    if skeleton_filepath is None:
+        return {
+            'status': dataset.progress.to_json(),
+            'skeleton': cache.get_skeleton_status(dataset)
+        }, 202
+
+    if compression is not None:
+        response = send_file(skeleton_filepath,
+                             mimetype=MIMETYPES[compression],
+                             as_attachment=True,
+                             conditional=True)
+        response.headers.set('Content-Disposition', 'attachment',
+                             filename=compressed_filepath(dataset.skeleton_name, compression))
+
+        return response, response.status_code
+
+    gzip_filepath = compressed_filepath(skeleton_filepath, GZIP_EXTENSION)
+    serve_gzip = request.accept_encodings['gzip'] > 0 and os.path.exists(gzip_filepath)
+
+    response = send_file(gzip_filepath if serve_gzip else skeleton_filepath,
+                         mimetype='application/xml',
+                         as_attachment=True,
+                         conditional=True)
+
+    response.headers.set('Content-Disposition', 'attachment', filename=dataset.skeleton_name)
+    response.vary.add('Accept-Encoding')
+    if serve_gzip:
+        response.content_encoding = 'gzip'
 
-    return send_file(skeleton_filepath, as_attachment=True), 200
+    return response, response.status_code
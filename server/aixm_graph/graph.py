@@ -32,12 +32,46 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
-from itertools import chain
-from typing import List, Optional, Union, Any, Dict
+import json
+from typing import List, Optional, Union, Dict, Tuple, FrozenSet, Iterator, Iterable, Generator, \
+    Any
 
 from aixm_graph.datasets.features import AIXMFeature
 from aixm_graph.datasets.fields import XLinkField
 
+"""Serializes the nodes and edges in compact form. It is created once since the nodes and edges
+   are serialized one by one.
+"""
+_encoder = json.JSONEncoder(separators=(',', ':'), check_circular=False)
+
+"""The min size (in characters) of the chunks the graphs are serialized in while streamed"""
+SERIALIZATION_CHUNK_SIZE = 64 * 1024
+
+
+def chunked(parts: Iterable[str], chunk_size: int = SERIALIZATION_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins the given parts in chunks of at least `chunk_size` characters (except for the last one)
+    so that they are not written one by one when streamed.
+
+    :param parts:
+    :param chunk_size:
+    :return:
+    """
+    buffer = []
+    buffer_size = 0
+
+    for part in parts:
+        buffer.append(part)
+        buffer_size += len(part)
+
+        if buffer_size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            buffer_size = 0
+
+    if buffer:
+        yield ''.join(buffer)
+
 
 class Node:
 
@@ -79,21 +113,37 @@ class Node:
     def __eq__(self, other):
         return self.id == other.id
 
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def key(self) -> str:
+        return self.id
+
     @classmethod
-    def from_feature(cls, feature: AIXMFeature):
+    def from_feature(cls, feature: AIXMFeature, extensions_count: int = 0):
+        """
+
+        :param feature:
+        :param extensions_count: the number of extensions of the feature across its time slices
+        :return: Node
+        """
+        # the time slices might be read from columns on each access (see `AIXMFeature.time_slices`)
+        time_slices = feature.time_slices
+
         return cls(
             id=feature.id,
             name=feature.name,
             abbrev=feature.config['abbrev'],
             fields=[
                 {field.name: field.text}
-                for ts in feature.time_slices
+                for ts in time_slices
                 for field in ts.data_fields
             ],
             color=feature.config['color'],
             shape=feature.config['shape'],
             fields_concat=feature.config['fields']['concat'],
-            assoc_count=sum(1 for _ in chain(feature.xlinks, feature.extensions))
+            assoc_count=sum(1 for ts in time_slices for _ in ts.xlinks) + extensions_count
         )
 
     @classmethod
@@ -122,6 +172,40 @@ class Node:
             'assoc_count': self.assoc_count
         }
 
+    def serialize(self) -> str:
+        return _encoder.encode(self.to_json())
+
+
+class SerializedNode:
+    __slots__ = ('id', 'serialized')
+
+    def __init__(self, id: str, serialized: str):
+        """
+        A node whose JSON has been serialized beforehand so that it can be added as it is in the
+        serialized graph, i.e. without being created and serialized again.
+
+        :param id:
+        :param serialized: as returned by `Node.serialize`
+        """
+        self.id = id
+        self.serialized = serialized
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def key(self) -> str:
+        return self.id
+
+    def to_json(self):
+        return json.loads(self.serialized)
+
+    def serialize(self) -> str:
+        return self.serialized
+
 
 class Edge:
     _directions = ['source', 'target']
@@ -161,6 +245,17 @@ class Edge:
                 and self.target == other.source
                 and self.name == other.name)
 
+    def __hash__(self):
+        return hash(self.key)
+
+    @property
+    def key(self) -> Tuple[FrozenSet[str], str]:
+        """
+        Canonical representation of the edge consistent with `__eq__`, i.e. the endpoints are
+        unordered so that A->B and B->A with the same name are considered the same edge.
+        """
+        return frozenset((self.source, self.target)), self.name
+
     def to_json(self):
         return {
             'source': self.source,
@@ -170,16 +265,28 @@ class Edge:
             'is_broken': self.is_broken
         }
 
+    def serialize(self) -> str:
+        return _encoder.encode(self.to_json())
+
 
 class Graph:
 
-    def __init__(self, nodes: Optional[List[Node]] = None, edges: Optional[List[Edge]] = None):
+    def __init__(self,
+                 nodes: Optional[List[Union[Node, SerializedNode]]] = None,
+                 edges: Optional[List[Edge]] = None):
         """
+        Nodes and edges are indexed by their key (see `Node.key` and `Edge.key`) so that adding
+        an item which already exists in the graph is a constant time check. Since dicts keep the
+        insertion order, the order of the items is the one they were first added.
+
         :param nodes:
         :param edges:
         """
-        self.nodes = nodes or []
-        self.edges = edges or []
+        self._nodes: Dict[str, Node] = {}
+        self._edges: Dict[Tuple[FrozenSet[str], str], Edge] = {}
+
+        self.add_nodes(nodes or [])
+        self.add_edges(edges or [])
 
     def __add__(self, other):
         self.add_nodes(other.nodes)
@@ -187,23 +294,148 @@ class Graph:
 
         return self
 
+    @property
+    def nodes(self) -> List[Union[Node, SerializedNode]]:
+        return list(self._nodes.values())
+
+    @property
+    def edges(self) -> List[Edge]:
+        return list(self._edges.values())
+
+    @property
+    def nodes_count(self) -> int:
+        return len(self._nodes)
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self._nodes
+
     @staticmethod
-    def _add_items_to_list(item_list: List[Any], items: Any):
+    def _add_items_to_index(item_index: Dict, items: Union[List[Union[Node, Edge]], Node, Edge]):
         if not isinstance(items, list):
             items = [items]
 
         for item in items:
-            if item not in item_list:
-                item_list.append(item)
+            item_index.setdefault(item.key, item)
 
-    def add_nodes(self, nodes: Union[List[Node], Node]):
-        self._add_items_to_list(item_list=self.nodes, items=nodes)
+    def add_nodes(self, nodes: Union[List[Union[Node, SerializedNode]], Node, SerializedNode]):
+        self._add_items_to_index(item_index=self._nodes, items=nodes)
 
     def add_edges(self, edges: Union[List[Edge], Edge]):
-        self._add_items_to_list(item_list=self.edges, items=edges)
+        self._add_items_to_index(item_index=self._edges, items=edges)
+
+    def add_items(self, items: Iterable[Union[Node, SerializedNode, Edge]]):
+        """
+
+        :param items: nodes and edges in any order, i.e. as they are produced by a traversal
+        """
+        for item in items:
+            item_index = self._edges if isinstance(item, Edge) else self._nodes
+            item_index.setdefault(item.key, item)
 
     def to_json(self):
         return {
-            'nodes': [node.to_json() for node in self.nodes],
-            'edges': [edge.to_json() for edge in self.edges]
+            'nodes': [node.to_json() for node in self._nodes.values()],
+            'edges': [edge.to_json() for edge in self._edges.values()]
         }
+
+    def serialize(self) -> str:
+        """
+        Serializes the graph by concatenating the serialized nodes and edges, so that the nodes
+        that have been serialized beforehand are not serialized again.
+
+        :return: the same JSON as `to_json`
+        """
+        return ''.join(self.iter_serialized())
+
+    def iter_serialized(self) -> Iterator[str]:
+        """
+        Serializes the graph incrementally, a batch of nodes or edges at a time, so that it can be
+        streamed without holding its whole JSON in memory.
+
+        :return: the parts of the same JSON as `to_json`
+        """
+        yield '{"nodes":['
+        yield from self._iter_serialized_items(self._nodes.values())
+        yield '],"edges":['
+        yield from self._iter_serialized_items(self._edges.values())
+        yield ']}'
+
+    @staticmethod
+    def _iter_serialized_items(items: Iterable[Union[Node, SerializedNode, Edge]],
+                               batch_size: int = 256) -> Iterator[str]:
+        """
+        The items are serialized in batches, since encoding a list at once is much faster than
+        encoding its items one by one, while the already serialized nodes are passed as they are.
+
+        :param items:
+        :param batch_size:
+        :return: the comma separated serialized items
+        """
+        separator = ''
+        batch = []
+
+        for item in items:
+            if isinstance(item, SerializedNode):
+                if batch:
+                    yield separator + _encoder.encode(batch)[1:-1]
+                    separator = ','
+                    batch = []
+
+                yield separator + item.serialized
+                separator = ','
+            else:
+                batch.append(item.to_json())
+
+                if len(batch) == batch_size:
+                    yield separator + _encoder.encode(batch)[1:-1]
+                    separator = ','
+                    batch = []
+
+        if batch:
+            yield separator + _encoder.encode(batch)[1:-1]
+
+
+class GraphTraversal:
+
+    def __init__(self, items: Generator[Union[Node, SerializedNode, Edge], None, Any]) -> None:
+        """
+        Wraps a traversal that yields the nodes and edges of a graph as they are reached and returns
+        its outcome once it is exhausted (i.e. whether it was truncated), so that the outcome can
+        be looked up after its items have been consumed, i.e. serialized.
+
+        :param items:
+        """
+        self._items = items
+        self.outcome: Any = None
+
+    def __iter__(self) -> Iterator[Union[Node, SerializedNode, Edge]]:
+        self.outcome = yield from self._items
+
+
+def iter_serialized_graph(items: Iterable[Union[Node, SerializedNode, Edge]]) -> Iterator[str]:
+    """
+    Serializes a graph while its nodes and edges are being produced, i.e. by a traversal, so that
+    it can be streamed before it is complete. The nodes are serialized as they come, except for the
+    ones that have been already, while the edges are kept until the items are exhausted since they
+    follow the nodes in the JSON.
+
+    :param items: nodes and edges in any order
+    :return: the parts of the same JSON as the `Graph` of the items
+    """
+    edges: Dict[Tuple[FrozenSet[str], str], Edge] = {}
+
+    def iter_nodes() -> Iterator[Union[Node, SerializedNode]]:
+        node_ids = set()
+
+        for item in items:
+            if isinstance(item, Edge):
+                edges.setdefault(item.key, item)
+            elif item.key not in node_ids:
+                node_ids.add(item.key)
+                yield item
+
+    yield '{"nodes":['
+    yield from Graph._iter_serialized_items(iter_nodes())
+    yield '],"edges":['
+    yield from Graph._iter_serialized_items(edges.values())
+    yield ']}'
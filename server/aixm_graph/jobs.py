@@ -0,0 +1,127 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class SynchronousExecutor(Executor):
+    """Runs the submitted jobs in the calling thread, i.e. when no background workers are used"""
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+
+"""Runs the long lasting jobs, e.g. the processing of the datasets, in the background"""
+EXECUTOR: Executor = SynchronousExecutor()
+
+"""Holds the jobs that have been submitted per job id"""
+JOBS: Dict[str, Future] = {}
+
+# guards only the registry of the jobs, which are run after it is released
+_jobs_lock = threading.Lock()
+
+
+def init_executor(max_workers: int) -> None:
+    """
+
+    :param max_workers: the number of background threads. If 0 the jobs are run synchronously
+    """
+    global EXECUTOR
+    EXECUTOR = ThreadPoolExecutor(max_workers=max_workers) if max_workers \
+        else SynchronousExecutor()
+
+
+def submit(job_id: str, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Submits a job unless there is already one with the same id. The job is registered before
+    being submitted so that, when it is run synchronously, the lock of the jobs is not held
+    while it runs.
+
+    :param job_id:
+    :param fn:
+    :return:
+    """
+    with _jobs_lock:
+        job = JOBS.get(job_id)
+
+        if job is not None:
+            return job
+
+        job = JOBS[job_id] = Future()
+
+    try:
+        EXECUTOR.submit(_run, job, fn, *args, **kwargs)
+    except Exception as e:
+        job.set_exception(e)
+
+    return job
+
+
+def _run(job: Future, fn: Callable, *args, **kwargs) -> None:
+    if not job.set_running_or_notify_cancel():
+        return
+
+    try:
+        job.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        job.set_exception(e)
+
+
+def get_job(job_id: str) -> Optional[Future]:
+    """
+
+    :param job_id:
+    :return:
+    """
+    return JOBS.get(job_id)
+
+
+def discard(job_id: str) -> None:
+    """
+    Removes the job so that it can be submitted again
+
+    :param job_id:
+    """
+    with _jobs_lock:
+        JOBS.pop(job_id, None)
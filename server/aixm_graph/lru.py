@@ -0,0 +1,142 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Dict, Tuple
+
+
+class LRUCache:
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """
+        Keeps serialized responses, i.e. bytes, up to a number of entries and a total size. When
+        either is exceeded the least recently used entries are evicted.
+
+        The keys are tuples whose first item identifies the dataset the response belongs to so
+        that all its entries can be invalidated at once.
+
+        :param max_entries: if 0 nothing is cached
+        :param max_bytes: responses larger than this are not cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict = OrderedDict()
+        self._size: int = 0
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """The total size of the cached responses in bytes"""
+        return self._size
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[bytes]:
+        """
+
+        :param key:
+        :return: the cached value or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+
+            return value
+
+    def put(self, key: Tuple[Hashable, ...], value: bytes) -> None:
+        """
+
+        :param key:
+        :param value:
+        """
+        if self.max_entries <= 0 or len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._pop(key)
+
+            self._entries[key] = value
+            self._size += len(value)
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self, dataset_id: Hashable) -> None:
+        """
+        Removes all the entries of the dataset
+
+        :param dataset_id:
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_id]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def _pop(self, key: Tuple[Hashable, ...]) -> None:
+        value = self._entries.pop(key, None)
+
+        if value is not None:
+            self._size -= len(value)
+
+    def stats(self) -> Dict[str, int]:
+        """
+
+        :return:
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,247 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import fcntl
+import json
+import logging
+import os
+import pickle
+import stat
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
+
+_logger = logging.getLogger(__name__)
+
+
+def _is_trusted(st: os.stat_result) -> bool:
+    """Whether a file (or folder) can have been written only by the user of the server"""
+    return st.st_uid == os.geteuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class DatasetStore:
+    catalog_filename = 'datasets.json'
+
+    """Should be increased whenever the structure of the processed datasets changes so that
+       snapshots of older versions are ignored
+    """
+    snapshot_version = 8
+
+    def __init__(self, folder: str) -> None:
+        """
+        Persists on disk the information of the uploaded datasets so that they survive a restart of
+        the server:
+            - a catalog with an entry (id, filepath, content hash, options) per dataset
+            - a snapshot of the processed state of each dataset keyed by the hash of its file
+              content, so that it can be loaded instead of processing the file again
+
+        Since the store is the only state shared among the processes of the server (i.e. the
+        gunicorn workers) every change is done under a file lock and every read goes to disk, so
+        that a dataset uploaded to one worker is visible to the rest.
+
+        Since the snapshots are unpickled, the folder is created accessible only by the user of the
+        server and is refused if anyone else could write in it.
+
+        :param folder:
+        :raises PermissionError: if the folder is not owned by the user of the server or it is
+                                 writable by others
+        """
+        self.folder = folder
+        os.makedirs(self.folder, mode=0o700, exist_ok=True)
+
+        if not _is_trusted(os.stat(self.folder)):
+            raise PermissionError(f'The store folder {self.folder} should be owned by the user of '
+                                  f'the server and writable only by it')
+
+    @property
+    def catalog_path(self) -> str:
+        return os.path.join(self.folder, self.catalog_filename)
+
+    @contextmanager
+    def lock(self, name: str):
+        """
+        An exclusive lock among all the processes using the store
+
+        :param name:
+        """
+        with open(os.path.join(self.folder, f'{name}.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_atomically(self, path: str, data: bytes) -> None:
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_catalog(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.catalog_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_catalog(self, catalog: Dict[str, Dict[str, Any]]) -> None:
+        self._write_atomically(self.catalog_path, json.dumps(catalog, indent=2).encode('utf-8'))
+
+    def add_entry(self,
+                  dataset_id: str,
+                  filepath: str,
+                  content_hash: str,
+                  options: Optional[Dict[str, Any]] = None) -> None:
+        """
+
+        :param dataset_id:
+        :param filepath:
+        :param content_hash:
+        :param options: the options the dataset was created with
+        """
+        with self.lock('catalog'):
+            catalog = self._read_catalog()
+            catalog[dataset_id] = {
+                'id': dataset_id,
+                'filepath': filepath,
+                'content_hash': content_hash,
+                'options': options or {}
+            }
+            self._write_catalog(catalog)
+
+    def update_entry(self, dataset_id: str, **kwargs) -> None:
+        """
+
+        :param dataset_id:
+        :param kwargs: the values to set in the entry (if it exists)
+        """
+        with self.lock('catalog'):
+            catalog = self._read_catalog()
+            if dataset_id in catalog:
+                catalog[dataset_id].update(kwargs)
+                self._write_catalog(catalog)
+
+    def remove_entry(self, dataset_id: str) -> None:
+        """
+
+        :param dataset_id:
+        """
+        with self.lock('catalog'):
+            catalog = self._read_catalog()
+            if catalog.pop(dataset_id, None) is not None:
+                self._write_catalog(catalog)
+
+    def get_entry(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """
+
+        :param dataset_id:
+        :return:
+        """
+        return self._read_catalog().get(dataset_id)
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """
+
+        :return:
+        """
+        return list(self._read_catalog().values())
+
+    def status_path(self, content_hash: str) -> str:
+        return os.path.join(self.folder, f'{content_hash}.status.json')
+
+    def save_status(self, content_hash: str, status: Dict[str, Any]) -> None:
+        """
+        Saves the processing status of a dataset so that it can be reported by any process
+
+        :param content_hash:
+        :param status:
+        """
+        self._write_atomically(self.status_path(content_hash), json.dumps(status).encode('utf-8'))
+
+    def load_status(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+
+        :param content_hash:
+        :return:
+        """
+        try:
+            with open(self.status_path(content_hash)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def snapshot_path(self, content_hash: str) -> str:
+        return os.path.join(self.folder, f'{content_hash}.v{self.snapshot_version}.pickle')
+
+    def has_snapshot(self, content_hash: str) -> bool:
+        return os.path.exists(self.snapshot_path(content_hash))
+
+    def save_snapshot(self, content_hash: str, snapshot: Dict[str, Any]) -> None:
+        """
+
+        :param content_hash:
+        :param snapshot:
+        """
+        self._write_atomically(self.snapshot_path(content_hash),
+                               pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def remove_snapshot(self, content_hash: str) -> None:
+        """
+        Removes the snapshot along with the processing status of a dataset content
+
+        :param content_hash:
+        """
+        for path in (self.snapshot_path(content_hash), self.status_path(content_hash)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def load_snapshot(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        The snapshot is ignored unless it can have been written only by the user of the server,
+        since unpickling it could run arbitrary code.
+
+        :param content_hash:
+        :return:
+        """
+        try:
+            with open(self.snapshot_path(content_hash), 'rb') as f:
+                if not _is_trusted(os.fstat(f.fileno())):
+                    _logger.warning(f'Ignoring the snapshot {f.name} since it is not owned by the '
+                                    f'user of the server or it is writable by others')
+                    return None
+
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,162 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional, Dict, Any, BinaryIO
+
+from flask import Request, current_app as app
+from werkzeug.utils import secure_filename
+
+from aixm_graph import utils
+from aixm_graph.datasets.compression import IncrementalDecompressor, get_compression, \
+    INCREMENTAL_DECOMPRESSORS
+from aixm_graph.datasets.datasets import AIXMDataSet
+
+_logger = logging.getLogger(__name__)
+
+
+class ParsingUploadStream:
+
+    def __init__(self,
+                 filepath: str,
+                 total_content_length: Optional[int],
+                 **dataset_options) -> None:
+        """
+        Receives an uploaded dataset file. The file is written in a temporary file next to its final
+        path while its content is fed to the dataset as it arrives, so that it is parsed by the time
+        the upload completes. If the content cannot be parsed the file is still received and the
+        dataset is left to be processed as usual, which will report the error.
+
+        :param filepath: the path where the file will be saved
+        :param total_content_length: the length of the request in order to report the progress
+        :param dataset_options:
+        """
+        self.filepath = filepath
+        self._file: BinaryIO = tempfile.NamedTemporaryFile(dir=os.path.dirname(filepath),
+                                                           prefix='.upload_',
+                                                           delete=False)
+        self._decompressor = IncrementalDecompressor(get_compression(filepath))
+        self._sha256 = hashlib.sha256()
+        self._bytes_written = 0
+        self._saved = False
+
+        """The dataset being parsed or None if parsing has failed"""
+        self.dataset: Optional[AIXMDataSet] = AIXMDataSet(filepath, **dataset_options)
+        self.dataset.progress.bytes_total = total_content_length or 0
+
+    def write(self, data: bytes) -> int:
+        written = self._file.write(data)
+        self._sha256.update(data)
+        self._bytes_written += len(data)
+
+        if self.dataset is not None:
+            try:
+                self.dataset.feed(self._decompressor.decompress(data),
+                                  bytes_read=self._bytes_written)
+            except Exception as e:
+                _logger.warning(f'Parsing of {self.filepath} while uploading failed: {str(e)}')
+                self.dataset = None
+
+        return written
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def save(self) -> Optional[AIXMDataSet]:
+        """
+        Moves the received file to its final path
+
+        :return: the parsed dataset (if parsing has not failed) which is to be processed
+        """
+        self._file.close()
+        os.replace(self._file.name, self.filepath)
+        self._saved = True
+
+        if self.dataset is not None:
+            self.dataset.content_hash = self._sha256.hexdigest()
+
+        return self.dataset
+
+    def close(self) -> None:
+        self._file.close()
+
+        if not self._saved and os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+
+class ParsingUploadRequest(Request):
+    """If enabled via `PARSE_UPLOADS`, the uploaded datasets are parsed while being received"""
+
+    def _get_file_stream(self,
+                         total_content_length: Optional[int],
+                         content_type: Optional[str],
+                         filename: Optional[str] = None,
+                         content_length: Optional[int] = None):
+        # the outlined datasets (see `LAZY_FEATURES`) are not parsed at all
+        if app.config.get('PARSE_UPLOADS') and not app.config.get('LAZY_FEATURES') \
+                and filename and utils.filename_is_valid(filename):
+            compression = get_compression(filename)
+
+            if compression is None or compression in INCREMENTAL_DECOMPRESSORS:
+                return ParsingUploadStream(
+                    filepath=os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename)),
+                    total_content_length=total_content_length,
+                    **get_dataset_options())
+
+        return super()._get_file_stream(total_content_length, content_type, filename,
+                                        content_length)
+
+
+def get_dataset_options() -> Dict[str, Any]:
+    """
+
+    :return: the options of the uploaded datasets according to the configuration
+    """
+    return dict(text_index=app.config['TEXT_INDEX'],
+                parse_workers=app.config['PARSE_WORKERS'],
+                precompute_graphs=app.config['PRECOMPUTE_GRAPHS'],
+                columnar=app.config['COLUMNAR_FEATURES'],
+                lazy=app.config['LAZY_FEATURES'])
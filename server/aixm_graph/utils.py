@@ -32,12 +32,21 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import base64
+import binascii
+import hashlib
 import io
-from typing import Optional, Dict, List, Any, Iterable
+import sys
+from typing import Optional, Dict, List, Any, Iterable, Tuple, Set
 
 import yaml
 from lxml import etree
 
+"""The extensions of the dataset files that can be uploaded. Compressed files are decompressed on
+   the fly while being read (see `aixm_graph.datasets.compression`)
+"""
+ALLOWED_EXTENSIONS = ('.xml', '.xml.gz', '.xml.bz2', '.xml.xz', '.zip')
+
 
 def get_attrib_value(attribs: Dict[str, str],
                      name: str,
@@ -122,6 +131,50 @@ def get_prev_offset(offset, limit):
         return pref_offset
 
 
+def _cursor_key_digest(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()[:8]
+
+
+def encode_cursor(position: int, offset: int, key: str, limit: int) -> str:
+    """
+    Creates an opaque token pointing at a page of the features of a type. The token is bound to
+    the key and the limit of the page so that it cannot point at a page of another query.
+
+    :param position: the position, among the features of the type, of the first feature of the page
+    :param offset: the offset of the page among the (filtered) features of the type
+    :param key: the field value the features are filtered by (empty if they are not)
+    :param limit: the size of the page
+    :return:
+    """
+    token = f'{position}:{offset}:{limit}:{_cursor_key_digest(key)}'
+
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, key: str, limit: int) -> Tuple[int, int]:
+    """
+
+    :param cursor: as returned by `encode_cursor`
+    :param key: the field value of the query the cursor is used with
+    :param limit: the page size of the query the cursor is used with
+    :return: position, offset
+    """
+    try:
+        position, offset, cursor_limit, key_digest = \
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).split(b':')
+        position, offset, cursor_limit = int(position), int(offset), int(cursor_limit)
+    except (ValueError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+    if position < 0 or offset < 0:
+        raise ValueError('Invalid cursor')
+
+    if cursor_limit != limit or key_digest.decode() != _cursor_key_digest(key):
+        raise ValueError('The cursor does not match the key or the limit of the query')
+
+    return position, offset
+
+
 def validate_file_form(file_form: Dict):
     """
 
@@ -136,7 +189,7 @@ def validate_file_form(file_form: Dict):
         raise ValueError('No selected file')
 
     if not filename_is_valid(file.filename):
-        raise ValueError('File not allowed. Allowed files: [.xml]')
+        raise ValueError(f'File not allowed. Allowed files: [{", ".join(ALLOWED_EXTENSIONS)}]')
 
     return file
 
@@ -147,4 +200,61 @@ def filename_is_valid(filename):
     :param filename:
     :return:
     """
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'xml'
+    return any(len(filename) > len(ext) and filename.lower().endswith(ext)
+               for ext in ALLOWED_EXTENSIONS)
+
+
+def file_content_hash(filepath: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calculates the SHA-256 hex digest of the content of a file by reading it in chunks
+
+    :param filepath:
+    :param chunk_size:
+    :return:
+    """
+    sha256 = hashlib.sha256()
+
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def deep_getsizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Approximates the memory used by an object along with the objects it refers to, i.e. the items
+    of the containers and the attributes (slotted or not) of the instances. Every object is counted
+    once, so the objects shared with others already counted can be excluded via `seen`.
+
+    :param obj:
+    :param seen: the ids of the objects that have been counted already
+    :return: the size in bytes
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+
+    while stack:
+        obj = stack.pop()
+
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float)):
+            stack.extend(getattr(obj, slot)
+                         for cls in type(obj).__mro__
+                         for slot in getattr(cls, '__slots__', ())
+                         if hasattr(obj, slot))
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+
+    return size
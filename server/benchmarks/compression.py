@@ -0,0 +1,94 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import os
+import tempfile
+import time
+
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.compression import COMPRESSION_EXTENSIONS, compress_file
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeatureClassRegistry
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory): python -m benchmarks.compression --features 100000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reports the parsing throughput of a dataset for each supported compression.')
+    parser.add_argument('--features', type=int, default=100000)
+    parser.add_argument('--time-slices', type=int, default=1, help='time slices per feature')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--file', help='an AIXM dataset to use instead of the generated one')
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = args.file
+        if filepath is None:
+            filepath = os.path.join(tmp_dir, 'dataset.xml')
+            generate_dataset(filepath,
+                             features_num=args.features,
+                             time_slices_num=args.time_slices,
+                             seed=args.seed)
+
+        size = os.path.getsize(filepath)
+        print(f'dataset: {size / 1024 / 1024:.1f} MiB')
+        print(f'{"compression":<12}{"file MiB":>10}{"parse s":>10}{"XML MiB/s":>12}')
+
+        for compression in (None,) + COMPRESSION_EXTENSIONS:
+            source_filepath = filepath if compression is None else \
+                compress_file(filepath, compression)
+
+            start = time.perf_counter()
+            AIXMDataSet(source_filepath).process()
+            elapsed = time.perf_counter() - start
+
+            print(f'{compression or "none":<12}'
+                  f'{os.path.getsize(source_filepath) / 1024 / 1024:>10.1f}'
+                  f'{elapsed:>10.2f}'
+                  f'{size / 1024 / 1024 / elapsed:>12.1f}')
+
+            if source_filepath != filepath:
+                os.remove(source_filepath)
+
+
+if __name__ == '__main__':
+    main()
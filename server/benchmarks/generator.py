@@ -0,0 +1,231 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import math
+import random
+import uuid
+from typing import Dict, List, NamedTuple, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from pkg_resources import resource_filename
+
+from aixm_graph.utils import load_config
+
+# Usage (from the server directory):
+#   python -m benchmarks.generator dataset.xml --features 100000 --fan-out 3 --broken-ratio 0.05
+
+MESSAGE_START = '''<?xml version="1.0" encoding="UTF-8"?>
+<message:AIXMBasicMessage xmlns:message="http://www.aixm.aero/schema/5.1.1/message"
+	xmlns:gml="http://www.opengis.net/gml/3.2"
+	xmlns:aixm="http://www.aixm.aero/schema/5.1.1"
+	xmlns:xlink="http://www.w3.org/1999/xlink"
+	gml:id="M0000001">
+'''
+MESSAGE_END = '</message:AIXMBasicMessage>\n'
+
+
+class GeneratedDataset(NamedTuple):
+    features_num: int
+    time_slices_num: int
+    xlinks_num: int
+    broken_xlinks_num: int
+
+
+class _Feature(NamedTuple):
+    name: str
+    id: str
+    field_names: List[str]
+
+
+def _make_uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _lower_first(name: str) -> str:
+    return name[:1].lower() + name[1:]
+
+
+def _write_member(f,
+                  feature: _Feature,
+                  abbrev: str,
+                  index: int,
+                  time_slices_num: int,
+                  references: List[_Feature]) -> None:
+    f.write(f'\t<message:hasMember>\n'
+            f'\t\t<aixm:{feature.name} gml:id="uuid.{feature.id}">\n'
+            f'\t\t\t<gml:identifier codeSpace="urn:uuid:">{feature.id}</gml:identifier>\n')
+
+    for ts_index in range(time_slices_num):
+        ts_id = f'{abbrev}{index}_{ts_index}'
+
+        f.write(f'\t\t\t<aixm:timeSlice>\n'
+                f'\t\t\t\t<aixm:{feature.name}TimeSlice gml:id="{ts_id}">\n'
+                f'\t\t\t\t\t<gml:validTime>\n'
+                f'\t\t\t\t\t\t<gml:TimePeriod gml:id="vt{ts_id}">\n'
+                f'\t\t\t\t\t\t\t<gml:beginPosition>2020-01-01T00:00:00Z</gml:beginPosition>\n'
+                f'\t\t\t\t\t\t\t<gml:endPosition indeterminatePosition="unknown"/>\n'
+                f'\t\t\t\t\t\t</gml:TimePeriod>\n'
+                f'\t\t\t\t\t</gml:validTime>\n'
+                f'\t\t\t\t\t<aixm:interpretation>'
+                f'{"BASELINE" if ts_index == 0 else "TEMPDELTA"}</aixm:interpretation>\n'
+                f'\t\t\t\t\t<aixm:sequenceNumber>1</aixm:sequenceNumber>\n')
+
+        if ts_index:
+            f.write(f'\t\t\t\t\t<aixm:correctionNumber>{ts_index}</aixm:correctionNumber>\n')
+
+        for field_name in feature.field_names:
+            f.write(f'\t\t\t\t\t<aixm:{field_name}>'
+                    f'{escape(f"{abbrev}{field_name.upper()[:3]}{index}")}</aixm:{field_name}>\n')
+
+        for reference in references:
+            f.write(f'\t\t\t\t\t<aixm:{_lower_first(reference.name)} '
+                    f'xlink:href="urn:uuid:{reference.id}" '
+                    f'xlink:title={quoteattr(reference.name)}/>\n')
+
+        f.write(f'\t\t\t\t</aixm:{feature.name}TimeSlice>\n'
+                f'\t\t\t</aixm:timeSlice>\n')
+
+    f.write(f'\t\t</aixm:{feature.name}>\n'
+            f'\t</message:hasMember>\n')
+
+
+def generate_dataset(filepath: str,
+                     features_num: int,
+                     time_slices_num: int = 1,
+                     fan_out: int = 2,
+                     fan_in: float = 2.0,
+                     broken_ratio: float = 0.0,
+                     seed: int = 0,
+                     feature_config: Optional[Dict] = None) -> GeneratedDataset:
+    """
+    Writes an AIXMBasicMessage of features whose types, along with their fields, are drawn from the
+    configured ones, so that it can be processed as any uploaded dataset.
+
+    Each feature refers via xlinks to `fan_out` distinct features, repeated in each of its time
+    slices. The referred features are drawn from a pool sized so that each of them is referred by
+    `fan_in` features on average, while `broken_ratio` of the references point to features that do
+    not exist in the dataset.
+
+    :param filepath:
+    :param features_num:
+    :param time_slices_num: the number of time slices of each feature
+    :param fan_out: the number of features each feature refers to
+    :param fan_in: the average number of features that refer to a referred feature
+    :param broken_ratio: the ratio of the references that cannot be resolved
+    :param seed: the seed of the random generator, so that the same dataset is generated each time
+    :param feature_config: the config of the feature types (`FEATURES`), defaults to `config.yml`
+    :return:
+    """
+    if feature_config is None:
+        feature_config = load_config(resource_filename('aixm_graph', 'config.yml'))['FEATURES']
+
+    rnd = random.Random(seed)
+    names = sorted(feature_config)
+    features = [
+        _Feature(name=name,
+                 id=_make_uuid(rnd),
+                 field_names=feature_config[name]['fields'].get('names') or [])
+        for name in (rnd.choice(names) for _ in range(features_num))
+    ]
+
+    fan_out = min(fan_out, features_num - 1) if features_num else 0
+    references_num = features_num * fan_out
+    pool = rnd.sample(features, max(1, min(features_num, math.ceil(
+        references_num * (1 - broken_ratio) / max(fan_in, 1))))) if features else []
+
+    xlinks_num = broken_xlinks_num = 0
+
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(MESSAGE_START)
+
+        for index, feature in enumerate(features):
+            references = []
+            while len(references) < fan_out:
+                if rnd.random() < broken_ratio:
+                    reference = _Feature(name=rnd.choice(names), id=_make_uuid(rnd),
+                                         field_names=[])
+                    broken_xlinks_num += time_slices_num
+                else:
+                    reference = rnd.choice(pool)
+
+                    # a feature does not refer to itself nor twice to the same one, unless the
+                    # pool is too small to avoid it
+                    if (reference is feature or reference in references) \
+                            and len(pool) > fan_out:
+                        continue
+
+                references.append(reference)
+
+            xlinks_num += len(references) * time_slices_num
+
+            _write_member(f, feature, feature_config[feature.name].get('abbrev', 'F'), index,
+                          time_slices_num, references)
+
+        f.write(MESSAGE_END)
+
+    return GeneratedDataset(features_num=features_num,
+                            time_slices_num=features_num * time_slices_num,
+                            xlinks_num=xlinks_num,
+                            broken_xlinks_num=broken_xlinks_num)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generates a synthetic AIXM dataset out of the configured feature types.')
+    parser.add_argument('filepath')
+    parser.add_argument('--features', type=int, default=10000)
+    parser.add_argument('--time-slices', type=int, default=1, help='time slices per feature')
+    parser.add_argument('--fan-out', type=int, default=2,
+                        help='how many features each feature refers to')
+    parser.add_argument('--fan-in', type=float, default=2.0,
+                        help='how many features refer to each referred feature on average')
+    parser.add_argument('--broken-ratio', type=float, default=0.0,
+                        help='the ratio of the xlinks that cannot be resolved')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generated = generate_dataset(args.filepath,
+                                 features_num=args.features,
+                                 time_slices_num=args.time_slices,
+                                 fan_out=args.fan_out,
+                                 fan_in=args.fan_in,
+                                 broken_ratio=args.broken_ratio,
+                                 seed=args.seed)
+
+    print(f'features: {generated.features_num}, time slices: {generated.time_slices_num}, '
+          f'xlinks: {generated.xlinks_num} ({generated.broken_xlinks_num} broken)')
+
+
+if __name__ == '__main__':
+    main()
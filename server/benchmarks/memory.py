@@ -0,0 +1,100 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeatureClassRegistry
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory): python -m benchmarks.memory --features 100000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reports the memory held by a processed dataset per feature.')
+    parser.add_argument('--features', type=int, default=100000)
+    parser.add_argument('--time-slices', type=int, default=1, help='time slices per feature')
+    parser.add_argument('--fan-out', type=int, default=2,
+                        help='how many features each feature refers to')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--file', help='an AIXM dataset to use instead of the generated one')
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = args.file
+        if filepath is None:
+            filepath = os.path.join(tmp_dir, 'dataset.xml')
+            generate_dataset(filepath,
+                             features_num=args.features,
+                             time_slices_num=args.time_slices,
+                             fan_out=args.fan_out,
+                             seed=args.seed)
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        dataset = AIXMDataSet(filepath).process()
+
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    features_num = sum(1 for _ in dataset.features)
+    fields_num = sum(1 for feature in dataset.features
+                     for _ in feature.data_fields) + \
+        sum(1 for feature in dataset.features for _ in feature.xlinks) + \
+        sum(dataset.get_extensions_count(feature) for feature in dataset.features)
+
+    print(f'features: {features_num}, fields (data, xlinks, extensions): {fields_num}')
+    print(f'processed in {elapsed:.2f}s')
+    print(f'retained: {current / 1024 / 1024:.1f} MiB ({current / features_num:.0f} bytes/feature)')
+    print(f'peak:     {peak / 1024 / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
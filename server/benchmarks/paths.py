@@ -0,0 +1,136 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from typing import Optional
+
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureClassRegistry
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory): python -m benchmarks.paths --features 500000
+
+
+def bfs_path_length(dataset: AIXMDataSet, source: AIXMFeature, target: AIXMFeature,
+                    max_depth: int) -> Optional[int]:
+    """
+    The length of the shortest path via a plain (unidirectional) breadth first search over the same
+    associations `find_path` walks, so that only the two searches are compared.
+    """
+    distances = {source.position: 0}
+    queue = deque([source.position])
+
+    while queue:
+        position = queue.popleft()
+
+        if position == target.position:
+            return distances[position]
+
+        if distances[position] == max_depth:
+            continue
+
+        for neighbour in dataset._iter_neighbour_positions(position):
+            if neighbour not in distances:
+                distances[neighbour] = distances[position] + 1
+                queue.append(neighbour)
+
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compares finding the shortest paths between features with a bidirectional '
+                    'and a plain breadth first search on a large synthetic dataset.')
+    parser.add_argument('--features', type=int, default=500000)
+    parser.add_argument('--fan-out', type=int, default=2,
+                        help='how many features each feature refers to')
+    parser.add_argument('--fan-in', type=float, default=2.0,
+                        help='how many features refer to each referred feature on average')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, 'dataset.xml')
+        generate_dataset(filepath,
+                         features_num=args.features,
+                         fan_out=args.fan_out,
+                         fan_in=args.fan_in,
+                         seed=args.seed)
+
+        start = time.perf_counter()
+        dataset = AIXMDataSet(filepath).process()
+        build_time = time.perf_counter() - start
+
+    rnd = random.Random(args.seed)
+    features = list(dataset.features)
+    queries = [(rnd.choice(features), rnd.choice(features)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    expected = [bfs_path_length(dataset, source, target, args.max_depth)
+                for source, target in queries]
+    bfs_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    paths = [dataset.find_path(source, target, max_depth=args.max_depth)[0]
+             for source, target in queries]
+    bidirectional_time = time.perf_counter() - start
+
+    assert expected == [len(path) - 1 if path is not None else None for path in paths], \
+        'the paths of the bidirectional search are not the shortest'
+
+    lengths = [length for length in expected if length is not None]
+
+    print(f'features: {args.features}, xlinks per feature: {args.fan_out}, '
+          f'queries: {args.queries}')
+    print(f'dataset processed in {build_time:.2f}s')
+    print(f'paths found: {len(lengths)}, mean length: {sum(lengths) / max(len(lengths), 1):.1f}')
+    print(f'plain BFS:         {bfs_time * 1000 / args.queries:.3f} ms/query')
+    print(f'bidirectional BFS: {bidirectional_time * 1000 / args.queries:.3f} ms/query')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import os
+import tempfile
+import time
+
+from pkg_resources import resource_filename
+
+from aixm_graph import cache, jobs
+from aixm_graph.datasets.features import AIXMFeatureClassRegistry
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory): python -m benchmarks.reopen --features 100000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reports how long a persisted dataset takes to be reopened, i.e. until its '
+                    'first request is answered and until its snapshot is loaded.')
+    parser.add_argument('--features', type=int, default=100000)
+    parser.add_argument('--time-slices', type=int, default=1, help='time slices per feature')
+    parser.add_argument('--precompute-graphs', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--file', help='an AIXM dataset to use instead of the generated one')
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+    jobs.init_executor(1)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = args.file
+        if filepath is None:
+            filepath = os.path.join(tmp_dir, 'dataset.xml')
+            generate_dataset(filepath,
+                             features_num=args.features,
+                             time_slices_num=args.time_slices,
+                             seed=args.seed)
+
+        cache.init_store(os.path.join(tmp_dir, 'store'))
+        try:
+            dataset = cache.create_dataset(filepath, precompute_graphs=args.precompute_graphs)
+
+            start = time.perf_counter()
+            cache.process_dataset(dataset)
+            processed_in = time.perf_counter() - start
+
+            snapshot_size = os.path.getsize(cache.STORE.snapshot_path(dataset.content_hash))
+
+            # the skeleton is generated in the background too
+            while cache.get_skeleton_status(dataset) == 'generating':
+                time.sleep(0.01)
+
+            # simulate a restart
+            cache.CACHE['datasets'].clear()
+            jobs.JOBS.clear()
+
+            start = time.perf_counter()
+            dataset = cache.get_dataset_by_id(dataset.id)
+            cache.ensure_processed(dataset)
+            answered_in = time.perf_counter() - start
+
+            while not cache.ensure_processed(dataset):
+                time.sleep(0.001)
+            loaded_in = time.perf_counter() - start
+        finally:
+            cache.init_store(None)
+            jobs.init_executor(0)
+
+    print(f'snapshot: {snapshot_size / 1024 / 1024:.1f} MiB')
+    print(f'processed in:      {processed_in:.3f}s')
+    print(f'first response in: {answered_in:.3f}s')
+    print(f'loaded in:         {loaded_in:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeatureClassRegistry
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory):
+#   python -m benchmarks.suite                    compares against the stored baseline
+#   python -m benchmarks.suite --save-baseline    stores the results as the new baseline
+#
+# The timings of the baseline are absolute, i.e. they hold for the machine they were measured on.
+# They are compared after being scaled by how fast a fixed workload runs on each machine (see
+# `calibrate`), which evens out the speed of the CPUs but not all of their differences, so the
+# baseline should be saved again whenever the suite runs elsewhere (e.g. on a new CI runner). The
+# peak memory does not depend on the machine but on the versions of Python and of the dependencies.
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+PAGE_LIMIT = 20
+
+
+def _create_graph_pages(dataset: AIXMDataSet) -> None:
+    """Creates and serializes the graphs of all the pages of all the feature types"""
+    for name in dataset.feature_type_stats:
+        start = 0
+        while start is not None:
+            features, start = dataset.get_features_page(name, None, start, PAGE_LIMIT)
+            dataset.get_graph(features=features, offset=0, limit=len(features)).serialize()
+
+
+def _filter_features(dataset: AIXMDataSet) -> None:
+    for name in dataset.feature_type_stats:
+        dataset.count_features(name, 'A1')
+
+
+class _PhaseRecorder:
+
+    def __init__(self, trace_memory: bool) -> None:
+        """
+        Measures either the time of each phase or the peak of the memory allocated during it, since
+        tracing the allocations slows the phases down. Only the allocations made by Python are
+        traced, i.e. not the ones of libxml2 while parsing.
+
+        :param trace_memory:
+        """
+        self.trace_memory = trace_memory
+
+        """the seconds or the peak bytes per phase"""
+        self.measurements: Dict[str, float] = {}
+
+        self._phase: Optional[str] = None
+        self._start: float = 0.0
+
+    def start(self, phase: str) -> None:
+        self.stop()
+        gc.collect()
+        self._phase = phase
+
+        if self.trace_memory:
+            tracemalloc.start()
+        else:
+            self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._phase is None:
+            return
+
+        if self.trace_memory:
+            self.measurements[self._phase] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            self.measurements[self._phase] = time.perf_counter() - self._start
+
+        self._phase = None
+
+    def on_progress(self, progress: ProcessingProgress) -> None:
+        """Follows the phases of processing a dataset as they are reported by its progress"""
+        if progress.phase == self._phase:
+            return
+
+        if progress.is_finished:
+            self.stop()
+        else:
+            self.start(progress.phase)
+
+    def measure(self, phase: str, fn: Callable) -> None:
+        self.start(phase)
+        fn()
+        self.stop()
+
+
+def measure_phases(filepath: str, trace_memory: bool) -> Dict[str, float]:
+    """
+    Processes a new dataset, measuring each of the phases of `AIXMDataSet.process` via the progress
+    it reports, and then serves it, measuring each of the ways it is served.
+
+    :param filepath:
+    :param trace_memory: whether the peak memory is measured instead of the time
+    :return: the seconds or the peak bytes per phase, in the order they run
+    """
+    recorder = _PhaseRecorder(trace_memory)
+
+    dataset = AIXMDataSet(filepath, text_index=True)
+    dataset.progress_callback = recorder.on_progress
+    dataset.process()
+    dataset.progress_callback = None
+
+    recorder.measure('graph_pages', lambda: _create_graph_pages(dataset))
+    recorder.measure('filter', lambda: _filter_features(dataset))
+    recorder.measure('skeleton', dataset.generate_skeleton)
+
+    return recorder.measurements
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Times a fixed workload that does not depend on the code measured, so that the timings of the
+    phases can be compared with a baseline measured on another machine (see `compare`).
+
+    :param repeat: how many times the workload is timed, keeping the fastest time
+    :return: seconds
+    """
+    rnd = random.Random(0)
+    items = [(str(rnd.random()), rnd.random()) for _ in range(200000)]
+    times = []
+
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            index = {}
+            for key, value in sorted(items):
+                index.setdefault(key[:4], []).append(value)
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    return min(times)
+
+
+def run(params: Dict, repeat: int) -> Dict:
+    """
+
+    :param params: the parameters of the generated dataset (see `generate_dataset`)
+    :param repeat: how many times the phases are timed, keeping the fastest time of each
+    :return: the seconds and peak bytes per phase along with the parameters and the machine
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, 'dataset.xml')
+        generate_dataset(filepath, **params)
+
+        times = [measure_phases(filepath, trace_memory=False) for _ in range(repeat)]
+        peaks = measure_phases(filepath, trace_memory=True)
+
+    return {
+        'params': params,
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'calibration_seconds': round(calibrate(), 4)
+        },
+        'phases': {
+            name: {
+                'seconds': round(min(t[name] for t in times), 4),
+                'peak_bytes': peak
+            }
+            for name, peak in peaks.items()
+        }
+    }
+
+
+def get_time_scale(results: Dict, baseline: Dict) -> float:
+    """
+    How much slower the machine of the results is than the one of the baseline, according to the
+    time of the calibration workload on each of them
+
+    :param results:
+    :param baseline:
+    :return: the factor the timings of the baseline are multiplied by before being compared
+    """
+    seconds = results.get('machine', {}).get('calibration_seconds')
+    expected_seconds = baseline.get('machine', {}).get('calibration_seconds')
+
+    if not seconds or not expected_seconds:
+        return 1.0
+
+    return seconds / expected_seconds
+
+
+def compare(results: Dict,
+            baseline: Dict,
+            time_tolerance: float,
+            memory_tolerance: float,
+            min_seconds: float,
+            min_bytes: int) -> List[str]:
+    """
+    Compares the results with the baseline phase by phase. A phase has regressed if it is slower
+    than its baseline, scaled to the machine of the results (see `get_time_scale`), by more than
+    `time_tolerance` (and `min_seconds`, in order to ignore the noise of the fast phases) or its
+    peak memory is higher by more than `memory_tolerance` (and `min_bytes`).
+
+    :param results:
+    :param baseline:
+    :param time_tolerance: i.e. 0.2 for 20%
+    :param memory_tolerance:
+    :param min_seconds:
+    :param min_bytes:
+    :return: the regressions found
+    """
+    regressions = []
+    time_scale = get_time_scale(results, baseline)
+
+    for name, measurement in results['phases'].items():
+        expected = baseline['phases'].get(name)
+        if expected is None:
+            continue
+
+        seconds, expected_seconds = measurement['seconds'], expected['seconds'] * time_scale
+        if seconds > expected_seconds * (1 + time_tolerance) \
+                and seconds - expected_seconds > min_seconds:
+            regressions.append(f'{name}: {seconds:.3f}s instead of {expected_seconds:.3f}s')
+
+        peak, expected_peak = measurement['peak_bytes'], expected['peak_bytes']
+        if peak > expected_peak * (1 + memory_tolerance) and peak - expected_peak > min_bytes:
+            regressions.append(f'{name}: {peak / 1024 / 1024:.1f} MiB instead of '
+                               f'{expected_peak / 1024 / 1024:.1f} MiB')
+
+    return regressions
+
+
+def print_results(results: Dict, baseline: Dict) -> None:
+    time_scale = get_time_scale(results, baseline)
+    if time_scale != 1.0:
+        print(f'the timings of the baseline are scaled by {time_scale:.2f} to this machine')
+
+    print(f'{"phase":<22}{"seconds":>10}{"baseline":>10}{"peak MiB":>10}{"baseline":>10}')
+
+    for name, measurement in results['phases'].items():
+        expected = baseline.get('phases', {}).get(name, {})
+
+        print(f'{name:<22}'
+              f'{measurement["seconds"]:>10.3f}'
+              f'{expected.get("seconds", float("nan")) * time_scale:>10.3f}'
+              f'{measurement["peak_bytes"] / 1024 / 1024:>10.1f}'
+              f'{expected.get("peak_bytes", float("nan")) / 1024 / 1024:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measures the time and the peak memory of each phase of processing and serving '
+                    'a synthetic dataset and compares them with the stored baseline.')
+    parser.add_argument('--features', type=int, default=10000)
+    parser.add_argument('--time-slices', type=int, default=2, help='time slices per feature')
+    parser.add_argument('--fan-out', type=int, default=2,
+                        help='how many features each feature refers to')
+    parser.add_argument('--fan-in', type=float, default=4.0,
+                        help='how many features refer to each referred feature on average')
+    parser.add_argument('--broken-ratio', type=float, default=0.05,
+                        help='the ratio of the xlinks that cannot be resolved')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='how many times the phases are timed, keeping the fastest time')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.1)
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='the slowdowns below this are not considered regressions')
+    parser.add_argument('--min-bytes', type=int, default=4 * 1024 * 1024,
+                        help='the memory increases below this are not considered regressions')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the baseline instead of comparing with it')
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+
+    params = dict(features_num=args.features,
+                  time_slices_num=args.time_slices,
+                  fan_out=args.fan_out,
+                  fan_in=args.fan_in,
+                  broken_ratio=args.broken_ratio,
+                  seed=args.seed)
+
+    results = run(params, repeat=args.repeat)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+        print(f'baseline saved in {args.baseline}')
+    elif not baseline:
+        print('no baseline to compare with, run with --save-baseline to store one')
+    elif baseline['params'] != params:
+        print(f'the baseline was measured with other parameters: {baseline["params"]}')
+    else:
+        python_version = baseline.get('machine', {}).get('python')
+        if python_version != results['machine']['python']:
+            print(f'the baseline was measured with Python {python_version}, '
+                  f'its peak memory may not apply')
+
+        regressions = compare(results, baseline,
+                              time_tolerance=args.time_tolerance,
+                              memory_tolerance=args.memory_tolerance,
+                              min_seconds=args.min_seconds,
+                              min_bytes=args.min_bytes)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        if regressions:
+            sys.exit(1)
+
+        print('no regressions')
+
+
+if __name__ == '__main__':
+    main()
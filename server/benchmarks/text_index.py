@@ -0,0 +1,120 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeatureClassRegistry
+from aixm_graph.utils import load_config
+from benchmarks.generator import generate_dataset
+
+# Usage (from the server directory): python -m benchmarks.text_index --features 200000
+
+
+def make_queries(rnd: random.Random, dataset: AIXMDataSet, queries_num: int):
+    """Parts of the values of the fields of random features, each along with its feature type"""
+    values = [(feature.name, field.text)
+              for feature in dataset.features for field in feature.data_fields if field.text]
+
+    queries = []
+    for _ in range(queries_num):
+        name, value = rnd.choice(values)
+        start = rnd.randrange(len(value))
+        queries.append((name, value[start:start + rnd.randint(3, 6)]))
+
+    return queries
+
+
+def run_queries(dataset: AIXMDataSet, queries):
+    return [
+        [feature.id for feature in dataset.filter_features(name, query)]
+        for name, query in queries
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compares filtering features by field value with and without the trigram '
+                    'text index on a large synthetic dataset.')
+    parser.add_argument('--features', type=int, default=200000)
+    parser.add_argument('--time-slices', type=int, default=2, help='time slices per feature')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = load_config(resource_filename('aixm_graph', 'config.yml'))
+    AIXMFeatureClassRegistry.load_feature_classes(config['FEATURES'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, 'dataset.xml')
+        generate_dataset(filepath,
+                         features_num=args.features,
+                         time_slices_num=args.time_slices,
+                         seed=args.seed)
+
+        start = time.perf_counter()
+        plain_dataset = AIXMDataSet(filepath).process()
+        plain_build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed_dataset = AIXMDataSet(filepath, text_index=True).process()
+        build_time = time.perf_counter() - start
+
+    queries = make_queries(random.Random(args.seed), plain_dataset, args.queries)
+
+    start = time.perf_counter()
+    expected = run_queries(plain_dataset, queries)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = run_queries(indexed_dataset, queries)
+    index_time = time.perf_counter() - start
+
+    assert expected == result, 'indexed results differ from the full scan'
+
+    print(f'features: {args.features}, queries: {args.queries}')
+    print(f'dataset processed in {plain_build_time:.2f}s, '
+          f'with text index in {build_time:.2f}s')
+    print(f'full scan:  {scan_time * 1000 / args.queries:.3f} ms/query')
+    print(f'text index: {index_time * 1000 / args.queries:.3f} ms/query')
+
+
+if __name__ == '__main__':
+    main()
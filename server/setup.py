@@ -39,7 +39,7 @@ setup(
     description='AIXM Graph',
     author='EUROCONTROL (SWIM)',
     author_email='',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     url='https://github.com/eurocontrol-swim/aixm-graph',
     install_requires=[
     ],
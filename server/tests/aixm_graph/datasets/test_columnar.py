@@ -0,0 +1,127 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+
+import os
+import pickle
+import shutil
+
+import pytest
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.columnar import write_columns, FeatureColumns
+from aixm_graph.datasets.datasets import AIXMDataSet
+
+
+def _time_slice_state(time_slice):
+    return (
+        time_slice.name, time_slice.prefix, time_slice.text, time_slice.attrib, time_slice.version,
+        [(f.name, f.prefix, f.text, f.attrib) for f in time_slice.data_fields],
+        [(x.name, x.prefix, x.text, x.attrib, x.href, x.title, x.is_broken)
+         for x in time_slice.xlinks],
+        [(g.id, g.name, g.serializable) for g in time_slice.gml_properties],
+    )
+
+
+@pytest.fixture
+def test_dataset(tmp_path, test_config):
+    filepath = tmp_path / 'dataset.xml'
+    shutil.copy(resource_filename(__name__, '../../static/dataset.xml'), filepath)
+
+    return AIXMDataSet(str(filepath)).process()
+
+
+def test_feature_columns__same_time_slices_as_written(test_dataset, tmp_path):
+    features = list(test_dataset._features_per_position)
+    features[0].time_slices[0].version = None
+    list(features[0].xlinks)[0].set_broken()
+
+    columns = FeatureColumns(write_columns(str(tmp_path / 'dataset.columns'), features))
+
+    assert len(features) == len(columns)
+
+    for feature in features:
+        assert [_time_slice_state(ts) for ts in feature.time_slices] == \
+            [_time_slice_state(ts) for ts in columns.get_time_slices(feature.position)]
+        assert feature.time_slices_count == columns.get_time_slices_count(feature.position)
+
+
+def test_feature_columns__pickled__mapped_again(test_dataset, tmp_path):
+    features = list(test_dataset._features_per_position)
+    columns = FeatureColumns(write_columns(str(tmp_path / 'dataset.columns'), features))
+
+    unpickled_columns = pickle.loads(pickle.dumps(columns))
+
+    assert columns.path == unpickled_columns.path
+    assert [_time_slice_state(ts) for ts in columns.get_time_slices(0)] == \
+        [_time_slice_state(ts) for ts in unpickled_columns.get_time_slices(0)]
+
+
+def test_feature_columns__not_a_columns_file__raises_value_error(tmp_path):
+    path = tmp_path / 'dataset.columns'
+    path.write_bytes(b'<xml/>' * 10)
+
+    with pytest.raises(ValueError):
+        FeatureColumns(str(path))
+
+
+def test_dataset__columnar__same_graphs_and_skeleton(test_dataset, test_config):
+    columnar_dataset = AIXMDataSet(test_dataset.filepath, columnar=True).process()
+
+    assert os.path.exists(columnar_dataset.make_columns_path())
+    assert columnar_dataset.memory_size < test_dataset.memory_size
+
+    for feature in test_dataset.features:
+        columnar_feature = columnar_dataset.get_feature_by_id(feature.id)
+
+        assert not isinstance(columnar_feature._time_slices, list)
+        assert test_dataset.get_graph_for_feature(feature).serialize() == \
+            columnar_dataset.get_graph_for_feature(columnar_feature).serialize()
+
+    for feature_name in test_config['FEATURES']:
+        assert [f.id for f in test_dataset.filter_features(feature_name, 'EA')] == \
+            [f.id for f in columnar_dataset.filter_features(feature_name, 'EA')]
+
+    with open(test_dataset.generate_skeleton()) as skeleton:
+        expected_skeleton = skeleton.read()
+
+    with open(columnar_dataset.generate_skeleton()) as skeleton:
+        assert expected_skeleton == skeleton.read()
+
+    # the snapshot refers to the columns which are mapped again once it is loaded
+    loaded_dataset = AIXMDataSet(test_dataset.filepath).load_snapshot(
+        pickle.loads(pickle.dumps(columnar_dataset.to_snapshot())))
+
+    for feature in test_dataset.features:
+        assert test_dataset.get_graph_for_feature(feature).serialize() == \
+            loaded_dataset.get_graph_for_feature(
+                loaded_dataset.get_feature_by_id(feature.id)).serialize()
@@ -0,0 +1,154 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import os
+import shutil
+from array import array
+from unittest import mock
+
+import pytest
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.compression import get_compression, strip_compression, compress_file, \
+    open_dataset_file, compressed_filepath, COMPRESSION_EXTENSIONS, IncrementalDecompressor, \
+    INCREMENTAL_DECOMPRESSORS
+from aixm_graph.datasets import datasets
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.parallel import find_member_offsets
+
+
+@pytest.fixture
+def test_filepath(tmp_path):
+    filepath = tmp_path / 'dataset.xml'
+    shutil.copy(resource_filename(__name__, '../../static/dataset.xml'), filepath)
+
+    return str(filepath)
+
+
+@pytest.fixture
+def test_skeleton_path():
+    return resource_filename(__name__, '../../static/skeleton.xml')
+
+
+@pytest.mark.parametrize('filepath, compression, decompressed_filepath', [
+    ('/path/dataset.xml', None, '/path/dataset.xml'),
+    ('/path/dataset.xml.gz', '.gz', '/path/dataset.xml'),
+    ('/path/dataset.XML.BZ2', '.bz2', '/path/dataset.XML'),
+    ('/path/dataset.xml.xz', '.xz', '/path/dataset.xml'),
+    ('/path/dataset.zip', '.zip', '/path/dataset.xml'),
+])
+def test_get_compression__strip_compression(filepath, compression, decompressed_filepath):
+    assert compression == get_compression(filepath)
+    assert decompressed_filepath == strip_compression(filepath)
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_EXTENSIONS)
+def test_compress_file__open_dataset_file__content_is_the_same(test_filepath, compression):
+    filepath = compress_file(test_filepath, compression)
+
+    assert compressed_filepath(test_filepath, compression) == filepath
+
+    with open(test_filepath, 'rb') as f, open_dataset_file(filepath) as compressed:
+        assert f.read() == compressed.read()
+
+
+@pytest.mark.parametrize('compression', [None] + list(INCREMENTAL_DECOMPRESSORS))
+def test_incremental_decompressor__concatenated_streams(test_filepath, compression):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    compressed = content
+    if compression is not None:
+        with open(compress_file(test_filepath, compression), 'rb') as f:
+            compressed = f.read()
+
+    decompressor = IncrementalDecompressor(compression)
+    data = compressed + compressed
+
+    decompressed = b''.join(decompressor.decompress(data[i:i + 100])
+                            for i in range(0, len(data), 100))
+
+    assert content + content == decompressed
+
+
+def test_incremental_decompressor__zip__raises_value_error():
+    with pytest.raises(ValueError):
+        IncrementalDecompressor('.zip')
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_EXTENSIONS)
+def test_dataset__compressed_file__same_as_plain_file(test_filepath,
+                                                      test_skeleton_path,
+                                                      test_config,
+                                                      compression):
+    dataset = AIXMDataSet(test_filepath).process()
+
+    compressed_dataset = AIXMDataSet(compress_file(test_filepath, compression)).process()
+
+    assert [f.id for f in dataset.features] == [f.id for f in compressed_dataset.features]
+    assert dataset.feature_type_stats == compressed_dataset.feature_type_stats
+    assert dataset._member_offsets == compressed_dataset._member_offsets
+
+    # the progress refers to the position within the compressed file
+    assert 0 < compressed_dataset.progress.bytes_read <= compressed_dataset.progress.bytes_total
+    assert os.path.getsize(compressed_dataset._filepath) == compressed_dataset.progress.bytes_total
+
+    for feature in dataset.features:
+        assert dataset.get_graph_for_feature(feature).to_json() == \
+            compressed_dataset.get_graph_for_feature(
+                compressed_dataset.get_feature_by_id(feature.id)).to_json()
+
+    skeleton_path = compressed_dataset.generate_skeleton()
+
+    assert os.path.join(os.path.dirname(test_filepath),
+                        f'dataset_{compressed_dataset.content_hash[:16]}_skeleton.xml') == \
+        skeleton_path
+    assert 'dataset_skeleton.xml' == compressed_dataset.skeleton_name
+
+    with open(skeleton_path, 'r') as skeleton:
+        with open(test_skeleton_path, 'r') as test_skeleton:
+            assert skeleton.read() == test_skeleton.read()
+
+
+@pytest.mark.parametrize('compression', (None,) + COMPRESSION_EXTENSIONS)
+def test_dataset__process__members_are_located_while_parsed(test_filepath, test_config,
+                                                            compression):
+    offsets, members_end = find_member_offsets(test_filepath, AIXMDataSet.sequence_tag)
+    filepath = test_filepath if compression is None else compress_file(test_filepath, compression)
+
+    # the file is not scanned in a separate pass
+    with mock.patch.object(datasets, 'find_member_offsets', side_effect=AssertionError):
+        dataset = AIXMDataSet(filepath).process()
+
+    assert array('q', offsets + [members_end]) == dataset._member_offsets
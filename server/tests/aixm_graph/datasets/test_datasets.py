@@ -33,19 +33,32 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 __author__ = "EUROCONTROL (SWIM)"
 
 import os
+import shutil
+from array import array
+from unittest import mock
 
 import pytest
+from lxml import etree
 from pkg_resources import resource_filename
 
+from aixm_graph import XLINK_NS, GML_NS
 from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureTimeSlice, GMLProperty
+from aixm_graph.datasets.fields import XLinkField, Field
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.graph import Graph
 
 TEST_FILENAME = 'dataset.xml'
 SKELETON_FILENAME = 'skeleton.xml'
 
 
 @pytest.fixture
-def test_filepath():
-    return resource_filename(__name__, f'../../static/{TEST_FILENAME}')
+def test_filepath(tmp_path):
+    # the skeletons (and their compressed copies) are generated next to the dataset
+    filepath = tmp_path / TEST_FILENAME
+    shutil.copy(resource_filename(__name__, f'../../static/{TEST_FILENAME}'), filepath)
+
+    return str(filepath)
 
 
 @pytest.fixture
@@ -86,3 +99,424 @@ def test_dataset__generate_skeleton(test_filepath, test_skeleton_path, test_conf
             assert skeleton.read() == test_skeleton.read()
 
     os.remove(skeleton_path)
+
+
+def test_dataset__generate_skeleton__fails__no_partial_file_is_left(test_filepath, test_config):
+    dataset = AIXMDataSet(test_filepath).process()
+    skeleton_path = dataset.make_skeleton_path()
+
+    # fails after a few members have been written
+    get_extensions = dataset.get_extensions
+    calls = []
+
+    def failing_get_extensions(feature):
+        calls.append(feature)
+        if len(calls) == 3:
+            raise ValueError('failed')
+
+        return get_extensions(feature)
+
+    with mock.patch.object(dataset, 'get_extensions', side_effect=failing_get_extensions):
+        with pytest.raises(ValueError):
+            dataset.generate_skeleton()
+
+    assert dataset.skeleton_filepath is None
+    assert not os.path.exists(skeleton_path)
+    assert not os.path.exists(f'{skeleton_path}.tmp')
+
+    # it can be generated again
+    assert skeleton_path == dataset.generate_skeleton()
+
+
+def test_dataset__process__is_processed_once_done(test_filepath, test_config):
+    dataset = AIXMDataSet(test_filepath, text_index=True, columnar=True)
+    processed_per_phase = []
+    dataset.progress_callback = lambda progress: processed_per_phase.append(
+        (progress.phase, dataset.feature_type_stats is not None, dataset.version is not None))
+
+    dataset.process()
+
+    assert ProcessingProgress.COLUMNS in [phase for phase, _, _ in processed_per_phase]
+    assert (ProcessingProgress.DONE, True, True) == processed_per_phase[-1]
+    assert not any(processed or version for _, processed, version in processed_per_phase[:-1])
+
+    # the graphs are precomputed before the loaded dataset is considered processed
+    loaded_dataset = AIXMDataSet(test_filepath, precompute_graphs=True)
+    precompute_graphs = loaded_dataset._precompute_graphs
+
+    def precompute_graphs_unprocessed():
+        assert loaded_dataset.feature_type_stats is None
+        precompute_graphs()
+
+    with mock.patch.object(loaded_dataset, '_precompute_graphs',
+                           side_effect=precompute_graphs_unprocessed) as mock_precompute_graphs:
+        loaded_dataset.load_snapshot(dataset.to_snapshot())
+
+    assert mock_precompute_graphs.called
+    assert dataset.feature_type_stats == loaded_dataset.feature_type_stats
+
+
+def test_dataset__process__features_are_indexed_per_type(test_filepath, test_config):
+    dataset = AIXMDataSet(test_filepath)
+
+    dataset.process()
+
+    for feature_name in test_config['FEATURES']:
+        assert dataset.has_feature_type_name(feature_name)
+
+        features_of_type = [f for f in dataset.features if f.name == feature_name]
+        assert features_of_type == list(dataset.filter_features(feature_name))
+
+    assert not dataset.has_feature_type_name('NonExistingFeature')
+    assert [] == list(dataset.filter_features('NonExistingFeature'))
+
+
+@pytest.mark.parametrize('field_value', ['EA', 'ead', 'EADH', 'donlon', 'ABOLA', 'missing'])
+def test_dataset__filter_features__text_index_returns_same_results(test_filepath, test_config,
+                                                                   field_value):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    indexed_dataset = AIXMDataSet(test_filepath, text_index=True)
+    indexed_dataset.process()
+
+    for feature_name in test_config['FEATURES']:
+        expected_ids = [f.id for f in dataset.filter_features(feature_name, field_value)]
+        ids = [f.id for f in indexed_dataset.filter_features(feature_name, field_value)]
+
+        assert expected_ids == ids
+
+
+def test_dataset__process__parse_in_parallel__same_as_sequential(test_filepath,
+                                                                 test_skeleton_path,
+                                                                 test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    parallel_dataset = AIXMDataSet(test_filepath, parse_workers=2)
+    parallel_dataset.process()
+
+    assert [f.id for f in dataset.features] == [f.id for f in parallel_dataset.features]
+    assert [type(f) for f in dataset.features] == [type(f) for f in parallel_dataset.features]
+    assert dataset.feature_type_stats == parallel_dataset.feature_type_stats
+    assert dataset._ns_map == parallel_dataset._ns_map
+    assert dataset._sequence_ns == parallel_dataset._sequence_ns
+
+    for feature in dataset.features:
+        assert dataset.get_graph_for_feature(feature).to_json() == \
+            parallel_dataset.get_graph_for_feature(
+                parallel_dataset.get_feature_by_id(feature.id)).to_json()
+
+    skeleton_path = parallel_dataset.generate_skeleton()
+
+    with open(skeleton_path, 'r') as skeleton:
+        with open(test_skeleton_path, 'r') as test_skeleton:
+            assert skeleton.read() == test_skeleton.read()
+
+    os.remove(skeleton_path)
+
+
+@pytest.mark.parametrize('parse_workers', [2, 3])
+def test_dataset__process__parse_in_parallel__commented_out_member__same_as_sequential(
+        test_filepath, test_config, parse_workers):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    with open(test_filepath, 'wb') as f:
+        last_member_start = content.rindex(b'<message:hasMember>')
+        f.write(content[:last_member_start] + b'<!-- <message:hasMember> removed -->'
+                + content[last_member_start:])
+
+    dataset = AIXMDataSet(test_filepath).process()
+    parallel_dataset = AIXMDataSet(test_filepath, parse_workers=parse_workers).process()
+
+    assert [f.id for f in dataset.features] == [f.id for f in parallel_dataset.features]
+    assert len(dataset._member_offsets) == len(parallel_dataset._member_offsets) > 0
+
+
+@pytest.mark.parametrize('block_size', [1, 100, 1024 * 1024])
+def test_dataset__feed__same_as_parsing_the_file(test_filepath, test_skeleton_path, test_config,
+                                                 block_size):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    fed_dataset = AIXMDataSet(test_filepath)
+    fed_dataset._parse = None
+
+    with open(test_filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            fed_dataset.feed(block, bytes_read=f.tell())
+
+    assert ProcessingProgress.PARSE == fed_dataset.progress.phase
+    assert len(list(dataset.features)) == fed_dataset.progress.features_indexed
+
+    fed_dataset.process()
+
+    assert [f.id for f in dataset.features] == [f.id for f in fed_dataset.features]
+    assert dataset.feature_type_stats == fed_dataset.feature_type_stats
+    assert dataset._ns_map == fed_dataset._ns_map
+    assert dataset._sequence_ns == fed_dataset._sequence_ns
+    assert dataset._member_offsets == fed_dataset._member_offsets
+
+    for feature in dataset.features:
+        assert dataset.get_graph_for_feature(feature).to_json() == \
+            fed_dataset.get_graph_for_feature(fed_dataset.get_feature_by_id(feature.id)).to_json()
+
+    skeleton_path = fed_dataset.generate_skeleton()
+
+    with open(skeleton_path, 'r') as skeleton:
+        with open(test_skeleton_path, 'r') as test_skeleton:
+            assert skeleton.read() == test_skeleton.read()
+
+    os.remove(skeleton_path)
+
+
+def test_dataset__precompute_graphs__same_graphs_as_created_on_request(test_filepath,
+                                                                      test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    precomputed_dataset = AIXMDataSet(test_filepath, precompute_graphs=True)
+    precomputed_dataset.process()
+
+    assert len(list(dataset.features)) == len(precomputed_dataset._adjacency_per_position)
+
+    with mock.patch.object(precomputed_dataset, '_node_from_feature',
+                           side_effect=AssertionError):
+        for feature in dataset.features:
+            precomputed_graph = precomputed_dataset.get_graph_for_feature(
+                precomputed_dataset.get_feature_by_id(feature.id))
+
+            assert dataset.get_graph_for_feature(feature).to_json() == precomputed_graph.to_json()
+            assert dataset.get_graph_for_feature(feature).serialize() == \
+                precomputed_graph.serialize()
+
+        for feature_name in test_config['FEATURES']:
+            features = dataset.filter_features(feature_name)
+            precomputed_features = precomputed_dataset.filter_features(feature_name)
+
+            assert dataset.get_graph(features, 0, 5).serialize() == \
+                precomputed_dataset.get_graph(precomputed_features, 0, 5).serialize()
+
+
+def test_dataset__get_neighbourhood_graph(test_filepath, test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    for feature in dataset.features:
+        graph, truncated = dataset.get_neighbourhood_graph(feature, depth=1)
+
+        assert dataset.get_graph_for_feature(feature).to_json() == graph.to_json()
+        assert not truncated
+
+        graph, truncated = dataset.get_neighbourhood_graph(feature, depth=2)
+        neighbours = [dataset.get_feature_by_id(node.id)
+                      for node in dataset.get_graph_for_feature(feature).nodes]
+        expected_graph = Graph()
+        for neighbour in [feature] + [n for n in neighbours if n is not None]:
+            expected_graph += dataset.get_graph_for_feature(neighbour)
+
+        assert {node.id for node in expected_graph.nodes} == {node.id for node in graph.nodes}
+        assert {edge.key for edge in expected_graph.edges} == {edge.key for edge in graph.edges}
+        assert not truncated
+
+        graph, truncated = dataset.get_neighbourhood_graph(feature, depth=3, max_nodes=2)
+
+        assert graph.nodes_count <= 2
+        assert all(graph.has_node(edge.source) and graph.has_node(edge.target)
+                   for edge in graph.edges)
+        assert truncated == (expected_graph.nodes_count > 2)
+
+        graph, _ = dataset.get_neighbourhood_graph(feature, depth=3,
+                                                   feature_types={'AirportHeliport'})
+
+        assert feature.id == graph.nodes[0].id
+        assert all(dataset.get_feature_by_id(node.id).name == 'AirportHeliport'
+                   for node in graph.nodes[1:])
+
+
+def test_dataset__get_neighbourhood_graph__only_the_admitted_nodes_are_created(test_filepath,
+                                                                              test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    feature = max(dataset.features,
+                  key=lambda f: dataset.get_graph_for_feature(f).nodes_count)
+
+    with mock.patch.object(dataset, '_node_from_feature',
+                           wraps=dataset._node_from_feature) as node_from_feature:
+        graph, truncated = dataset.get_neighbourhood_graph(feature, depth=3, max_nodes=2)
+
+    assert truncated
+    assert 2 == graph.nodes_count
+    assert node_from_feature.call_count <= 2
+
+    with mock.patch.object(dataset, '_node_from_feature',
+                           wraps=dataset._node_from_feature) as node_from_feature:
+        graph, _ = dataset.get_neighbourhood_graph(feature, depth=3)
+
+    assert graph.nodes_count >= node_from_feature.call_count
+
+
+def make_feature_with_xlinks(feature_id, hrefs):
+    feature = AIXMFeature('Feature')
+    feature.id = feature_id
+    feature.config = {'abbrev': 'FEA', 'color': 'blue', 'shape': 'square',
+                      'fields': {'concat': False}}
+    time_slice = AIXMFeatureTimeSlice(name='FeatureTimeSlice')
+    time_slice.version = '1'
+    time_slice._xlinks = [XLinkField(name='ref', attrib={f'{{{XLINK_NS}}}href': f'urn:uuid:{href}'})
+                          for href in hrefs]
+    feature.time_slices = [time_slice]
+
+    return feature
+
+
+def test_dataset__find_path__shortest_path_via_associations_either_way(test_config):
+    # a -> b -> c -> d <- e, a -> e, f
+    dataset = AIXMDataSet('filepath')
+    for feature_id, hrefs in [('a', ['b', 'e']), ('b', ['c']), ('c', ['d']), ('d', []),
+                              ('e', ['d', 'missing']), ('f', [])]:
+        dataset._index_feature(make_feature_with_xlinks(feature_id, hrefs))
+    dataset._create_reverse_associations()
+
+    a, b, c, d, e, f = (dataset.get_feature_by_id(feature_id) for feature_id in 'abcdef')
+
+    assert ([a, e, d], False) == dataset.find_path(a, d, max_depth=10)
+    assert ([c, d, e], False) == dataset.find_path(c, e, max_depth=10)
+    assert ([b, a, e], False) == dataset.find_path(b, e, max_depth=2)
+    assert ([a], False) == dataset.find_path(a, a, max_depth=10)
+
+    assert (None, False) == dataset.find_path(b, e, max_depth=1)
+    assert (None, False) == dataset.find_path(a, f, max_depth=10)
+    assert (None, True) == dataset.find_path(a, d, max_depth=10, time_budget=0)
+
+    graph = dataset.get_path_graph([c, d, e])
+
+    assert ['c', 'd', 'e'] == [node.id for node in graph.nodes]
+    assert [('c', 'd', 'target'), ('d', 'e', 'source')] == \
+        [(edge.source, edge.target, edge.direction) for edge in graph.edges]
+
+
+@pytest.mark.parametrize('text_index', [False, True])
+@pytest.mark.parametrize('field_value', [None, 'ABC', 'AB', 'missing'])
+@pytest.mark.parametrize('limit', [1, 3, 100])
+def test_dataset__features_page__same_as_slicing_the_filtered_features(text_index, field_value,
+                                                                       limit):
+    dataset = AIXMDataSet('filepath', text_index=text_index)
+    for i in range(20):
+        feature = AIXMFeature('Feature')
+        feature.id = str(i)
+        time_slice = AIXMFeatureTimeSlice(name='FeatureTimeSlice')
+        time_slice._data_fields = [Field(name='name', text='ABC' if i % 3 else 'XYZ')]
+        feature.time_slices = [time_slice]
+        dataset._index_feature(feature)
+    if text_index:
+        dataset._create_text_indices()
+
+    features = dataset.filter_features('Feature', field_value)
+
+    assert len(features) == dataset.count_features('Feature', field_value)
+
+    offset = 0
+    start = dataset.get_page_start('Feature', field_value, offset)
+    while start is not None:
+        page, next_start = dataset.get_features_page('Feature', field_value, start, limit)
+
+        assert features[offset:offset + limit] == page
+        assert (offset + limit < len(features)) == (next_start is not None)
+
+        prev_start = dataset.get_prev_page_start('Feature', field_value, start, limit)
+        if offset > 0:
+            assert prev_start == dataset.get_page_start('Feature', field_value, offset - limit)
+        else:
+            assert prev_start is None
+
+        offset += limit
+        start = next_start
+
+
+def test_dataset__index_feature__same_gml_id_of_another_type__replaces_it_in_its_type():
+    dataset = AIXMDataSet('filepath')
+    features = []
+    for feature_id, name in [('1', 'Feature'), ('2', 'Feature'), ('3', 'Other'), ('1', 'Other')]:
+        feature = AIXMFeature(name)
+        feature.id = feature_id
+        dataset._index_feature(feature)
+        features.append(feature)
+
+    assert [features[1]] == dataset.get_features_by_type('Feature')
+    assert [features[2], features[3]] == dataset.get_features_by_type('Other')
+    assert features[3] is dataset.get_feature_by_id('1')
+    assert [features[3], features[1], features[2]] == list(dataset.features)
+
+    # the last feature of a type is replaced
+    feature = AIXMFeature('Other')
+    feature.id = '2'
+    dataset._index_feature(feature)
+
+    assert not dataset.has_feature_type_name('Feature')
+    assert ['Other'] == list(dataset._compute_feature_type_stats().feature_type_stats)
+
+
+def test_dataset__create_reverse_associations(test_config):
+    target = AIXMFeature('Target')
+    target.id = 'target_id'
+    target_time_slice = AIXMFeatureTimeSlice(name='TargetTimeSlice')
+    target_time_slice._gml_properties = [GMLProperty(id='gml_prop_id', name='Property'),
+                                         GMLProperty(id='other_gml_prop_id', name='Property')]
+    target.time_slices = [target_time_slice, AIXMFeatureTimeSlice(name='TargetTimeSlice')]
+
+    sources = []
+    for source_id, hrefs in [('source1', ['urn:uuid:target_id', '#gml_prop_id']),
+                             ('source2', ['urn:uuid:missing_id']),
+                             ('source3', ['urn:uuid:target_id'])]:
+        source = AIXMFeature('Source')
+        source.id = source_id
+        source_time_slice = AIXMFeatureTimeSlice(name='SourceTimeSlice')
+        source_time_slice._xlinks = [XLinkField(name='ref', attrib={f'{{{XLINK_NS}}}href': href})
+                                     for href in hrefs]
+        source.time_slices = [source_time_slice]
+        sources.append(source)
+
+    dataset = AIXMDataSet('filepath')
+    for feature in [sources[0], target, sources[1], sources[2]]:
+        dataset._index_feature(feature)
+
+    dataset._create_reverse_associations()
+
+    assert [sources[0], sources[0], sources[2]] == dataset.get_referring_features(target)
+    assert [] == dataset.get_referring_features(sources[0])
+    assert 6 == dataset.get_extensions_count(target)
+
+    extensions = dataset.get_extensions(target)
+    assert ['theSource'] * 3 == [extension.name for extension in extensions]
+    assert ['source1', 'source1', 'source3'] == [extension.href for extension in extensions]
+
+    assert [True, False] == [gml_prop.serializable for gml_prop in target.gml_properties]
+    assert sources[1].has_broken_xlinks
+    assert not sources[0].has_broken_xlinks
+
+
+def test_dataset__get_gml_element__reads_only_the_member_of_the_feature(test_filepath,
+                                                                        test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+
+    expected = {gml.id: etree.tostring(dataset._find_gml_element(gml.name, gml.id))
+                for gml in dataset._gml_properties_per_id.values()}
+
+    with mock.patch.object(dataset, '_find_gml_element', side_effect=AssertionError):
+        for gml in dataset._gml_properties_per_id.values():
+            assert expected[gml.id] == etree.tostring(dataset.get_gml_element(gml.name, gml.id))
+
+
+def test_dataset__get_gml_element__unknown_member_spans__scans_the_file(test_filepath,
+                                                                        test_config):
+    dataset = AIXMDataSet(test_filepath)
+    dataset.process()
+    dataset._member_offsets = array('q')
+
+    element = dataset.get_gml_element('Point', 'pABOLA')
+
+    assert 'pABOLA' == element.attrib[f'{{{GML_NS}}}id']
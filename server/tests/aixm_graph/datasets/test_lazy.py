@@ -0,0 +1,269 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+__author__ = "EUROCONTROL (SWIM)"
+
+import gzip
+import pickle
+import shutil
+from unittest import mock
+
+import pytest
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.lazy import MemberOutliner, MemberTimeSlices
+from aixm_graph.datasets import datasets
+from aixm_graph.datasets.parallel import find_member_offsets
+
+
+@pytest.fixture
+def test_filepath(tmp_path):
+    filepath = tmp_path / 'dataset.xml'
+    shutil.copy(resource_filename(__name__, '../../static/dataset.xml'), filepath)
+
+    return str(filepath)
+
+
+@pytest.fixture
+def test_dataset(test_filepath, test_config):
+    return AIXMDataSet(test_filepath).process()
+
+
+def _get_members(filepath):
+    offsets, members_end = find_member_offsets(filepath, AIXMDataSet.sequence_tag)
+
+    with open(filepath, 'rb') as f:
+        content = f.read()
+
+    return [content[start:end] for start, end in zip(offsets, offsets[1:] + [members_end])]
+
+
+def _assert_same_graphs(dataset, other_dataset):
+    for feature in dataset.features:
+        other_feature = other_dataset.get_feature_by_id(feature.id)
+
+        assert dataset.get_graph_for_feature(feature).serialize() == \
+            other_dataset.get_graph_for_feature(other_feature).serialize()
+
+
+def test_member_outliner__same_outline_as_parsed_features(test_dataset, test_filepath):
+    outliner = MemberOutliner(gml_prefix='gml', xlink_prefix='xlink')
+    outlines = [outliner.outline(member) for member in _get_members(test_filepath)]
+
+    assert len(outlines) == len(test_dataset._features_per_position)
+
+    for outline, feature in zip(outlines, test_dataset._features_per_position):
+        assert outline.member_prefix == 'message'
+        assert (outline.name, outline.prefix) == (feature.name, feature.prefix)
+        assert (outline.id, outline.identifier) == (feature.id, feature.identifier)
+        assert list(outline.hrefs) == [xlink.href for xlink in feature.xlinks]
+        assert outline.gml_properties == [(gml.id, gml.name) for gml in feature.gml_properties]
+        assert outline.time_slices_count == feature.time_slices_count
+
+
+def test_member_outliner__comments__are_ignored(test_filepath):
+    outliner = MemberOutliner(gml_prefix='gml', xlink_prefix='xlink')
+    member = _get_members(test_filepath)[0]
+    commented_member = member.replace(
+        b'</message:hasMember>',
+        b'<!-- <aixm:theAirportHeliport xlink:href="urn:uuid:1"/> --></message:hasMember>')
+
+    assert outliner.outline(member) == outliner.outline(commented_member)
+
+
+@pytest.mark.parametrize('markup', [b'<![CDATA[<a/>]]>', b'<?pi xlink:href="1"?>'])
+def test_member_outliner__unsafe_markup__returns_none(test_filepath, markup):
+    member = _get_members(test_filepath)[0]
+    member = member.replace(b'</message:hasMember>', markup + b'</message:hasMember>')
+
+    assert MemberOutliner(gml_prefix='gml', xlink_prefix='xlink').outline(member) is None
+
+
+def test_member_time_slices__keeps_up_to_max_entries():
+    parsed_positions = []
+
+    def parse_time_slices(position):
+        parsed_positions.append(position)
+        return [position]
+
+    member_time_slices = MemberTimeSlices(max_entries=2)
+    member_time_slices.bind(parse_time_slices)
+
+    for position in [0, 1, 0, 2, 0, 1]:
+        assert member_time_slices.get_time_slices(position) == [position]
+
+    assert parsed_positions == [0, 1, 2, 1]
+    assert len(member_time_slices) == 2
+
+
+def test_dataset__lazy__same_graphs_stats_and_skeleton(test_dataset, test_config):
+    lazy_dataset = AIXMDataSet(test_dataset.filepath, lazy=True, text_index=True,
+                               precompute_graphs=True, columnar=True).process()
+
+    assert lazy_dataset._member_time_slices is not None
+    assert lazy_dataset._text_indices == {}
+    assert lazy_dataset._node_per_position == []
+    assert lazy_dataset.feature_type_stats == test_dataset.feature_type_stats
+
+    # the time slices are only parsed on access
+    assert len(lazy_dataset._member_time_slices) == 0
+    assert lazy_dataset.memory_size < test_dataset.memory_size
+
+    _assert_same_graphs(test_dataset, lazy_dataset)
+
+    for feature_name in test_config['FEATURES']:
+        assert [f.id for f in test_dataset.filter_features(feature_name, 'EA')] == \
+            [f.id for f in lazy_dataset.filter_features(feature_name, 'EA')]
+
+    with open(test_dataset.generate_skeleton()) as skeleton:
+        expected_skeleton = skeleton.read()
+
+    with open(lazy_dataset.generate_skeleton()) as skeleton:
+        assert expected_skeleton == skeleton.read()
+
+
+def test_dataset__lazy__loaded_snapshot__parses_time_slices_again(test_dataset):
+    lazy_dataset = AIXMDataSet(test_dataset.filepath, lazy=True)
+    lazy_dataset.max_parsed_features = 2
+    lazy_dataset.process()
+
+    _assert_same_graphs(test_dataset, lazy_dataset)
+    assert len(lazy_dataset._member_time_slices) == 2
+
+    loaded_dataset = AIXMDataSet(test_dataset.filepath).load_snapshot(
+        pickle.loads(pickle.dumps(lazy_dataset.to_snapshot())))
+
+    assert len(loaded_dataset._member_time_slices) == 0
+    _assert_same_graphs(test_dataset, loaded_dataset)
+
+
+def test_dataset__lazy__member_with_cdata__is_parsed(test_dataset, test_filepath):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    with open(test_filepath, 'wb') as f:
+        f.write(content.replace(b'</message:hasMember>',
+                                b'<![CDATA[<a/>]]></message:hasMember>', 1))
+
+    lazy_dataset = AIXMDataSet(test_filepath, lazy=True).process()
+    first_feature = lazy_dataset._features_per_position[0]
+
+    assert isinstance(first_feature._time_slices, list)
+    assert not isinstance(lazy_dataset._features_per_position[1]._time_slices, list)
+    assert lazy_dataset.feature_type_stats == test_dataset.feature_type_stats
+    _assert_same_graphs(test_dataset, lazy_dataset)
+
+
+def test_dataset__lazy__compressed_file__is_parsed(test_dataset, test_filepath):
+    with open(test_filepath, 'rb') as f, gzip.open(test_filepath + '.gz', 'wb') as gz:
+        gz.write(f.read())
+
+    lazy_dataset = AIXMDataSet(test_filepath + '.gz', lazy=True).process()
+
+    assert lazy_dataset._member_time_slices is None
+    _assert_same_graphs(test_dataset, lazy_dataset)
+
+
+def test_dataset__lazy__commented_out_member__same_as_parsed(test_filepath, test_config):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    with open(test_filepath, 'wb') as f:
+        last_member_start = content.rindex(b'<message:hasMember>')
+        f.write(content[:last_member_start] + b'<!-- <message:hasMember> removed -->'
+                + content[last_member_start:])
+
+    dataset = AIXMDataSet(test_filepath).process()
+    lazy_dataset = AIXMDataSet(test_filepath, lazy=True).process()
+
+    assert lazy_dataset._member_time_slices is not None
+    assert dataset.feature_type_stats == lazy_dataset.feature_type_stats
+    _assert_same_graphs(dataset, lazy_dataset)
+
+
+def test_dataset__lazy__untrusted_member_spans__is_parsed(test_dataset, test_filepath):
+    offsets, members_end = find_member_offsets(test_filepath, AIXMDataSet.sequence_tag)
+    # i.e. a member start tag that was not found by the scan
+    offsets = offsets[:1] + offsets[2:]
+
+    with mock.patch.object(datasets, 'find_member_offsets', return_value=(offsets, members_end)):
+        lazy_dataset = AIXMDataSet(test_filepath, lazy=True).process()
+
+    assert lazy_dataset._member_time_slices is None
+    assert [f.id for f in test_dataset.features] == [f.id for f in lazy_dataset.features]
+    _assert_same_graphs(test_dataset, lazy_dataset)
+
+
+def test_dataset__lazy__member_declaring_its_own_xlink_prefix__same_as_parsed(test_filepath,
+                                                                              test_config):
+    members = _get_members(test_filepath)
+    index, member = next((i, member) for i, member in enumerate(members)
+                         if b'xlink:href' in member)
+    local_member = member.replace(b'<message:hasMember>',
+                                  b'<message:hasMember xmlns:xl="http://www.w3.org/1999/xlink">', 1)
+    local_member = local_member.replace(b'xlink:href', b'xl:href')
+
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    with open(test_filepath, 'wb') as f:
+        f.write(content.replace(member, local_member, 1))
+
+    assert MemberOutliner(gml_prefix='gml', xlink_prefix='xlink').outline(local_member) is None
+
+    dataset = AIXMDataSet(test_filepath).process()
+    lazy_dataset = AIXMDataSet(test_filepath, lazy=True).process()
+    feature = dataset._features_per_position[index]
+
+    assert lazy_dataset._member_time_slices is not None
+    assert [xlink.href for xlink in feature.xlinks]
+    assert dataset._reverse_sources == lazy_dataset._reverse_sources
+    assert dataset.feature_type_stats == lazy_dataset.feature_type_stats
+    _assert_same_graphs(dataset, lazy_dataset)
+
+    with open(dataset.generate_skeleton()) as skeleton:
+        expected_skeleton = skeleton.read()
+
+    with open(lazy_dataset.generate_skeleton()) as skeleton:
+        assert expected_skeleton == skeleton.read()
+
+
+def test_member_outliner__references_outside_the_time_slices__are_ignored(test_filepath,
+                                                                           test_config):
+    outliner = MemberOutliner(gml_prefix='gml', xlink_prefix='xlink')
+    member = _get_members(test_filepath)[0]
+    outside_member = member.replace(
+        b'<aixm:timeSlice>',
+        b'<gml:boundedBy gml:id="outside_id" xlink:href="urn:uuid:outside"/><aixm:timeSlice>', 1)
+
+    assert outside_member != member
+    assert outliner.outline(member) == outliner.outline(outside_member)
@@ -0,0 +1,148 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import pickle
+
+import pytest
+from pkg_resources import resource_filename
+
+from aixm_graph.datasets.parallel import find_member_offsets, split_into_chunks, read_prolog, \
+    members_are_delimited, parse_chunk, ChunkParseError, feature_to_record, feature_from_record
+from aixm_graph.datasets.datasets import AIXMDataSet
+
+
+@pytest.fixture
+def test_filepath():
+    return resource_filename(__name__, '../../static/dataset.xml')
+
+
+@pytest.mark.parametrize('block_size', [7, 100, 8 * 1024 * 1024])
+def test_find_member_offsets(test_filepath, block_size):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    offsets, members_end = find_member_offsets(test_filepath, 'hasMember', block_size=block_size)
+
+    assert 5 == len(offsets)
+    assert all(content[offset:].startswith(b'<message:hasMember>') for offset in offsets)
+    assert content[:members_end].endswith(b'</message:hasMember>')
+    assert b'</message:AIXMBasicMessage>' == content[members_end:].strip()
+
+
+@pytest.mark.parametrize('offsets, end, chunks_num, expected_chunks', [
+    ([], 0, 2, []),
+    ([10], 20, 4, [(10, 20)]),
+    ([0, 10, 20, 30], 40, 2, [(0, 20), (20, 40)]),
+    ([0, 10, 20, 30], 40, 10, [(0, 10), (10, 20), (20, 30), (30, 40)]),
+    ([0, 5, 10, 35], 40, 2, [(0, 35), (35, 40)]),
+])
+def test_split_into_chunks(offsets, end, chunks_num, expected_chunks):
+    assert expected_chunks == split_into_chunks(offsets, end, chunks_num)
+
+
+def test_read_prolog(test_filepath):
+    offsets, _ = find_member_offsets(test_filepath, 'hasMember')
+
+    declaration, nsmap = read_prolog(test_filepath, offsets[0])
+
+    assert b'' == declaration
+    assert 'http://www.aixm.aero/schema/5.1.1/message' == nsmap['message']
+    assert 'http://www.opengis.net/gml/3.2' == nsmap['gml']
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 8 * 1024 * 1024])
+def test_find_member_offsets__tags_within_comments_cdata_and_pis__are_ignored(test_filepath,
+                                                                               tmp_path,
+                                                                               block_size):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    expected_offsets, expected_members_end = find_member_offsets(test_filepath, 'hasMember')
+    skipped_markup = b'<!-- <message:hasMember> --><![CDATA[</message:hasMember>]]>' \
+                     b'<?pi <message:hasMember>?>'
+    members_start = content.index(b'<message:hasMember>')
+
+    filepath = tmp_path / 'dataset.xml'
+    filepath.write_bytes(content[:members_start] + skipped_markup + content[members_start:])
+
+    offsets, members_end = find_member_offsets(str(filepath), 'hasMember', block_size=block_size)
+
+    assert [offset + len(skipped_markup) for offset in expected_offsets] == offsets
+    assert expected_members_end + len(skipped_markup) == members_end
+
+
+def test_members_are_delimited(test_filepath):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    offsets, members_end = find_member_offsets(test_filepath, 'hasMember')
+
+    assert members_are_delimited(content, offsets, members_end, 'hasMember')
+    assert not members_are_delimited(content, offsets[:1] + [offsets[1] + 1] + offsets[2:],
+                                     members_end, 'hasMember')
+    assert not members_are_delimited(content, offsets, members_end - 1, 'hasMember')
+    assert not members_are_delimited(content, offsets[:1] + offsets[2:], members_end, 'hasMember')
+
+
+def test_parse_chunk__malformed_chunk__raises_picklable_error(test_filepath, test_config):
+    offsets, members_end = find_member_offsets(test_filepath, 'hasMember')
+    declaration, nsmap = read_prolog(test_filepath, offsets[0])
+
+    with pytest.raises(ChunkParseError) as e:
+        parse_chunk(test_filepath, offsets[0], members_end - 1, declaration, nsmap, 'hasMember')
+
+    error = pickle.loads(pickle.dumps(e.value))
+
+    assert str(e.value) == str(error)
+    assert e.value.line == error.line is not None
+
+
+def test_parse_chunk__features_are_returned_as_plain_records(test_filepath, test_config):
+    offsets, members_end = find_member_offsets(test_filepath, 'hasMember')
+    declaration, nsmap = read_prolog(test_filepath, offsets[0])
+
+    result = parse_chunk(test_filepath, offsets[0], members_end, declaration, nsmap, 'hasMember')
+
+    # no feature, time slice or field objects are pickled back from the workers
+    assert b'aixm_graph' not in pickle.dumps(result.records)
+
+    features = [feature_from_record(record) for record in result.records]
+    expected_features = list(AIXMDataSet(test_filepath).process().features)
+
+    assert [type(f) for f in expected_features] == [type(f) for f in features]
+    assert [feature_to_record(f) for f in expected_features] == result.records
+    assert [ts.version for f in expected_features for ts in f.time_slices] == \
+        [ts.version for f in features for ts in f.time_slices]
+    assert [x.href for f in expected_features for x in f.xlinks] == \
+        [x.href for f in features for x in f.xlinks]
@@ -0,0 +1,71 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+from io import BytesIO
+
+import pytest
+from lxml import etree
+
+from aixm_graph.datasets.skeleton import StreamingTreeWriter
+
+NSMAP = {'message': 'urn:message', 'aixm': 'urn:aixm'}
+
+
+def make_root():
+    return etree.Element('{urn:message}AIXMBasicMessage', nsmap=NSMAP)
+
+
+def make_member(index):
+    member = etree.Element('{urn:message}hasMember', nsmap=NSMAP)
+    feature = etree.SubElement(member, '{urn:aixm}Feature', attrib={'name': f'a > {index}'})
+    field = etree.SubElement(feature, '{urn:aixm}field')
+    field.text = f'text {index}'
+
+    return member
+
+
+@pytest.mark.parametrize('members_num', [0, 1, 3])
+def test_streaming_tree_writer__same_output_as_tostring(members_num):
+    root = make_root()
+    for index in range(members_num):
+        root.append(make_member(index))
+
+    expected = etree.tostring(root, encoding='utf-8', xml_declaration=True, pretty_print=True)
+
+    output = BytesIO()
+    with StreamingTreeWriter(output, make_root()) as writer:
+        for index in range(members_num):
+            writer.write(make_member(index))
+
+    assert expected == output.getvalue()
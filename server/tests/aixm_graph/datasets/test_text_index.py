@@ -0,0 +1,68 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import pytest
+
+from aixm_graph.datasets.text_index import TrigramIndex
+
+
+@pytest.fixture
+def text_index():
+    index = TrigramIndex()
+    index.add(0, ['EADH', 'Donlon'])
+    index.add(1, ['EADD'])
+    index.add(2, [])
+    index.add(3, ['donlon/downtown heliport'])
+    index.add(4, ['ABCAB'])
+
+    return index
+
+
+@pytest.mark.parametrize('query, expected_candidates', [
+    ('EAD', [0, 1]),
+    ('ead', [0, 1]),
+    ('EADH', [0]),
+    ('DONLON', [0, 3]),
+    ('heliport', [3]),
+    ('XYZ', []),
+    # all trigrams match although the query is not contained in any text of the document
+    ('BCABC', [4]),
+])
+def test_trigram_index__candidates(text_index, query, expected_candidates):
+    assert expected_candidates == text_index.candidates(query)
+
+
+@pytest.mark.parametrize('query', ['', 'E', 'EA'])
+def test_trigram_index__candidates__query_too_short__returns_none(text_index, query):
+    assert text_index.candidates(query) is None
@@ -32,18 +32,27 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import bz2
+import gzip
+import io
 import json
 import os
+import shutil
+from concurrent.futures import Future
 from unittest import mock
 from unittest.mock import Mock
 
 import pytest
+from pkg_resources import resource_filename
 from werkzeug.datastructures import FileStorage
 
+from aixm_graph import jobs, cache, utils
+from aixm_graph.datasets.compression import compress_file
 from aixm_graph.datasets.datasets import AIXMDataSet
 from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureTimeSlice
 from aixm_graph.datasets.fields import Field
-from aixm_graph.graph import Graph
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.graph import Graph, Node
 
 
 @mock.patch('aixm_graph.cache.get_datasets')
@@ -141,6 +150,7 @@ def test_get_graph_for_feature_type__dataset_not_found__404(test_client):
 def test_get_graph_for_feature_type__feature_type_not_found__404(mock_get_dataset_by_id, test_client):
     dataset = AIXMDataSet('filepath')
     dataset.id = 'some_id'
+    dataset._compute_feature_type_stats()
     mock_get_dataset_by_id.return_value = dataset
 
     response = test_client.get('/api/datasets/some_id/feature_types/some_type_name/graph')
@@ -155,9 +165,13 @@ def test_get_graph_for_feature_type__no_errors__200(mock_get_dataset_by_id, test
     dataset = AIXMDataSet('filepath')
     graph = Graph()
     dataset.id = 'some_id'
-    dataset._features_per_gml_id = {'1': AIXMFeature('TestFeature1'), '2': AIXMFeature('TestFeature2')}
-    dataset.get_graph = Mock(return_value=graph)
+    for feature_id, feature_name in [('1', 'TestFeature1'), ('2', 'TestFeature2')]:
+        feature = AIXMFeature(feature_name)
+        feature.id = feature_id
+        dataset._index_feature(feature)
+    dataset.iter_graph = Mock(return_value=iter([]))
 
+    dataset._compute_feature_type_stats()
     mock_get_dataset_by_id.return_value = dataset
 
     path = '/api/datasets/some_id/feature_types/TestFeature1/graph?offset=0&limit=5'
@@ -190,12 +204,18 @@ def test_get_graph_for_feature_type__with_filter__200(
     feature1_time_slice1 = AIXMFeatureTimeSlice(name='timeSlice')
     feature1_time_slice1._data_fields.append(Field(name='field', text=field_value))
     feature1.time_slices.append(feature1_time_slice1)
+    feature1.id = 'feature1_id'
+
+    feature2 = AIXMFeature('TestFeature2')
+    feature2.id = 'feature2_id'
 
     dataset = AIXMDataSet('filepath')
     dataset.id = 'some_id'
-    dataset._features_per_gml_id = {'feature1_id': feature1, 'feature2_id': AIXMFeature('TestFeature2')}
-    dataset.get_graph = Mock(return_value=graph)
+    dataset._index_feature(feature1)
+    dataset._index_feature(feature2)
+    dataset.iter_graph = Mock(return_value=iter([]))
 
+    dataset._compute_feature_type_stats()
     mock_get_dataset_by_id.return_value = dataset
 
     path = f'/api/datasets/some_id/feature_types/TestFeature1/graph?offset=0&limit=5&key={query}'
@@ -212,6 +232,166 @@ def test_get_graph_for_feature_type__with_filter__200(
     assert response_data['prev_offset'] is None
 
 
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_graph_for_feature_type__page_is_cached_until_the_dataset_is_processed_again(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'cached_id'
+    dataset.process()
+    dataset.iter_graph = Mock(wraps=dataset.iter_graph)
+    mock_get_dataset_by_id.return_value = dataset
+
+    path = '/api/datasets/cached_id/feature_types/AirportHeliport/graph?offset=0&limit=5'
+    stats = cache.GRAPH_PAGES.stats()
+
+    # the response is streamed, thus it is cached once it is read
+    response = test_client.get(path)
+    assert response.status_code == 200
+    assert 'AirportHeliport' == json.loads(response.data)['data']['graph']['nodes'][0]['name']
+
+    cached_response = test_client.get(path)
+    assert cached_response.status_code == 200
+    assert response.data == cached_response.data
+    assert 1 == dataset.iter_graph.call_count
+
+    cache_stats = json.loads(test_client.get('/api/graph_cache').data)['data']
+    assert stats['hits'] + 1 == cache_stats['hits']
+    assert stats['misses'] + 1 == cache_stats['misses']
+
+    with mock.patch.object(dataset, 'process'):
+        cache.process_dataset(dataset)
+
+    response = test_client.get(path)
+    assert response.status_code == 200
+    assert 2 == dataset.iter_graph.call_count
+
+    cache.GRAPH_PAGES.invalidate('cached_id')
+    jobs.discard('skeleton_cached_id')
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_graph_for_feature_type__client_has_the_page__304_without_generating_it(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'conditional_id'
+    dataset.process()
+    dataset.iter_graph = Mock(wraps=dataset.iter_graph)
+    mock_get_dataset_by_id.return_value = dataset
+
+    path = '/api/datasets/conditional_id/feature_types/AirportHeliport/graph?offset=0&limit=5'
+
+    response = test_client.get(path)
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    etag = response.headers['ETag']
+
+    other_page_response = test_client.get(path.replace('limit=5', 'limit=6'))
+    assert etag != other_page_response.headers['ETag']
+
+    response = test_client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert b'' == response.data
+    assert etag == response.headers['ETag']
+
+    response = test_client.get(
+        path, headers={'If-Modified-Since': other_page_response.headers['Last-Modified']})
+    assert response.status_code == 304
+
+    assert 2 == dataset.iter_graph.call_count
+
+    # the page changes once the dataset is processed again
+    with mock.patch.object(dataset, '_parse'):
+        dataset.process()
+
+    response = test_client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert etag != response.headers['ETag']
+
+    cache.GRAPH_PAGES.invalidate('conditional_id')
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_dataset_feature_types__client_has_them__304(mock_get_dataset_by_id, test_client,
+                                                          test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.process()
+    mock_get_dataset_by_id.return_value = dataset
+
+    response = test_client.get('/api/datasets/some_id/feature_types')
+    assert response.status_code == 200
+    assert 'no-cache' == response.headers['Cache-Control']
+
+    response = test_client.get('/api/datasets/some_id/feature_types',
+                               headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+@mock.patch('aixm_graph.cache.get_datasets')
+def test_get_datasets__client_has_them__304(mock_get_datasets, test_client):
+    dataset = AIXMDataSet('filepath')
+    dataset.id = 'some_id'
+    mock_get_datasets.return_value = [dataset]
+
+    etag = test_client.get('/api/datasets').headers['ETag']
+
+    response = test_client.get('/api/datasets', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    other_dataset = AIXMDataSet('other_filepath')
+    other_dataset.id = 'other_id'
+    mock_get_datasets.return_value = [dataset, other_dataset]
+
+    response = test_client.get('/api/datasets', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 2 == len(json.loads(response.data)['data'])
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_graph_for_feature_type__cursors__same_pages_as_offsets(mock_get_dataset_by_id,
+                                                                    test_client):
+    dataset = AIXMDataSet('filepath')
+    for i in range(7):
+        feature = AIXMFeature('TestFeature')
+        feature.id = str(i)
+        dataset._index_feature(feature)
+    dataset.iter_graph = lambda features: (Node(id=feature.id, name=feature.name, abbrev='TF')
+                                           for feature in features)
+    dataset._compute_feature_type_stats()
+    mock_get_dataset_by_id.return_value = dataset
+
+    path = '/api/datasets/cursor_id/feature_types/TestFeature/graph?limit=3'
+    pages = [json.loads(test_client.get(f'{path}&offset={offset}').data)['data']
+             for offset in (0, 3, 6)]
+
+    cursor_pages = [pages[0]]
+    while cursor_pages[-1]['next_cursor'] is not None:
+        cursor = cursor_pages[-1]['next_cursor']
+        cursor_pages.append(json.loads(test_client.get(f'{path}&cursor={cursor}').data)['data'])
+
+    assert [page['graph'] for page in pages] == [page['graph'] for page in cursor_pages]
+    assert [page['offset'] for page in pages] == [page['offset'] for page in cursor_pages]
+    assert [3, 6, None] == [page['next_offset'] for page in cursor_pages]
+    assert [7] * 3 == [page['size'] for page in cursor_pages]
+
+    cursor = cursor_pages[-1]['prev_cursor']
+    prev_page = json.loads(test_client.get(f'{path}&cursor={cursor}').data)['data']
+    assert pages[1]['graph'] == prev_page['graph']
+
+    # the cursor does not point at a page of another limit or key
+    for query in ('limit=2', 'limit=3&key=1'):
+        response = test_client.get(f'/api/datasets/cursor_id/feature_types/TestFeature/graph?'
+                                   f'{query}&cursor={cursor}')
+        assert response.status_code == 400
+
+    cache.GRAPH_PAGES.invalidate('cursor_id')
+
+
+def test_get_graph_for_feature_type__invalid_cursor__400(test_client):
+    response = test_client.get('/api/datasets/some_id/feature_types/some_type_name/graph?cursor=!')
+    assert response.status_code == 400
+
+
 def test_get_graph_for_feature__dataset_not_found__404(test_client):
     response = test_client.get('/api/datasets/some_id/features/some_id/graph')
     assert response.status_code == 404
@@ -227,6 +407,7 @@ def test_get_graph_for_feature__dataset_not_found__404(test_client):
 def test_get_graph_for_feature__feature_not_found__404(mock_get_dataset_by_id, test_client):
     dataset = AIXMDataSet('filepath')
     dataset.id = 'some_id'
+    dataset._compute_feature_type_stats()
     mock_get_dataset_by_id.return_value = dataset
 
     response = test_client.get('/api/datasets/some_id/features/some_id/graph')
@@ -242,8 +423,9 @@ def test_get_graph_for_feature__no_errors__200(mock_get_dataset_by_id, test_clie
     graph = Graph()
     dataset.id = 'some_id'
     dataset._features_per_gml_id = {'1': AIXMFeature('TestFeature1'), '2': AIXMFeature('TestFeature2')}
-    dataset.get_graph_for_feature = Mock(return_value=graph)
+    dataset.iter_graph_for_feature = Mock(return_value=iter([]))
 
+    dataset._compute_feature_type_stats()
     mock_get_dataset_by_id.return_value = dataset
 
     path = '/api/datasets/some_id/features/1/graph'
@@ -255,6 +437,86 @@ def test_get_graph_for_feature__no_errors__200(mock_get_dataset_by_id, test_clie
     assert response_data['graph'] == graph.to_json()
 
 
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_graph_for_feature__neighbourhood__bounded_by_max_nodes(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.process()
+    mock_get_dataset_by_id.return_value = dataset
+
+    feature = max(dataset.features,
+                  key=lambda f: dataset.get_graph_for_feature(f).nodes_count)
+    path = f'/api/datasets/some_id/features/{feature.id}/graph'
+
+    response_data = json.loads(test_client.get(f'{path}?depth=2').data)['data']
+    assert 2 == response_data['depth']
+    assert not response_data['truncated']
+
+    response_data = json.loads(test_client.get(f'{path}?depth=2&max_nodes=2').data)['data']
+    assert response_data['truncated']
+    assert 2 == len(response_data['graph']['nodes'])
+
+    # the max nodes are bounded by the configuration
+    response_data = json.loads(test_client.get(f'{path}?depth=5&max_nodes=1000').data)['data']
+    assert test_config['MAX_GRAPH_NODES'] >= len(response_data['graph']['nodes'])
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_graph_for_feature__neighbourhood__cached_apart_from_the_feature_graph(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.process()
+    mock_get_dataset_by_id.return_value = dataset
+
+    path = f'/api/datasets/some_id/features/{next(dataset.features).id}/graph'
+
+    response = test_client.get(path)
+    assert response.status_code == 200
+    assert ['graph'] == list(json.loads(response.data)['data'])
+
+    # the default depth must not reuse the validators of the feature graph
+    response = test_client.get(f'{path}?depth=1',
+                               headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert 1 == json.loads(response.data)['data']['depth']
+
+
+@pytest.mark.parametrize('query', ['depth=0', 'depth=a', 'max_nodes=-1'])
+def test_get_graph_for_feature__invalid_neighbourhood_query__400(test_client, query):
+    response = test_client.get(f'/api/datasets/some_id/features/some_id/graph?{query}')
+    assert response.status_code == 400
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_path_graph__path_is_found__200(mock_get_dataset_by_id, test_client, test_config,
+                                            test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.process()
+    mock_get_dataset_by_id.return_value = dataset
+
+    source = dataset.filter_features('DesignatedPoint')[0]
+    target = dataset.filter_features('AngleIndication')[0]
+
+    response = test_client.get(f'/api/datasets/some_id/paths?from={source.id}&to={target.id}')
+    assert response.status_code == 200
+
+    response_data = json.loads(response.data)['data']
+    assert response_data['found']
+    assert 1 == response_data['length']
+    assert not response_data['timed_out']
+    assert [source.id, target.id] == [node['id'] for node in response_data['graph']['nodes']]
+
+
+@pytest.mark.parametrize('query, status_code', [
+    ('from=some_id', 400),
+    ('from=some_id&to=other_id&max_depth=0', 400),
+    ('from=some_id&to=other_id', 404),
+])
+def test_get_path_graph__invalid_query__error(test_client, query, status_code):
+    response = test_client.get(f'/api/datasets/some_id/paths?{query}')
+    assert response.status_code == status_code
+
+
 def test_upload_aixm__no_file_part__returns_400(test_client):
     response = test_client.post('/api/upload', data={})
     assert response.status_code == 400
@@ -282,7 +544,8 @@ def test_upload_aixm__not_allowed_file__returns_400(test_client):
     assert response.status_code == 400
 
     response_data = json.loads(response.data)
-    assert response_data['error'] == 'File not allowed. Allowed files: [.xml]'
+    assert response_data['error'] == \
+        'File not allowed. Allowed files: [.xml, .xml.gz, .xml.bz2, .xml.xz, .zip]'
 
 
 @mock.patch('aixm_graph.cache.get_dataset_by_name')
@@ -315,3 +578,283 @@ def test_upload_aixm__file_is_uploaded__returns_201(mock_validate_file_form, tes
     assert response_data['dataset_name'] == file.filename
 
     file.save.assert_called_once_with(expected_final_filepath)
+
+
+@pytest.mark.parametrize('compression', [None, '.gz'])
+def test_upload_aixm__dataset_is_parsed_while_uploaded(test_app, test_client, test_config, tmp_path,
+                                                        monkeypatch, compression):
+    monkeypatch.setitem(test_app.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    filepath = resource_filename(__name__, '../static/dataset.xml')
+    if compression is not None:
+        filepath = compress_file(shutil.copy(filepath, tmp_path / 'source.xml'), compression)
+
+    with open(filepath, 'rb') as f:
+        content = f.read()
+
+    filename = f'uploaded.xml{compression or ""}'
+
+    # the processing after the upload does not parse the file again
+    with mock.patch.object(AIXMDataSet, '_parse', side_effect=AssertionError):
+        response = test_client.post('/api/upload', data={'file': (io.BytesIO(content), filename)})
+
+    assert response.status_code == 201
+
+    dataset_id = json.loads(response.data)['data']['dataset_id']
+    dataset = cache.get_dataset_by_id(dataset_id)
+
+    with open(tmp_path / filename, 'rb') as f:
+        assert content == f.read()
+
+    assert ProcessingProgress.DONE == dataset.progress.phase
+    assert len(list(dataset.features)) == dataset.progress.features_indexed
+    assert dataset.content_hash == utils.file_content_hash(str(tmp_path / filename))
+    assert [f for f in os.listdir(tmp_path) if f.startswith('.upload_')] == []
+
+    response = test_client.get(f'/api/datasets/{dataset_id}/feature_types')
+    assert response.status_code == 200
+
+    jobs.discard(f'process_{dataset_id}')
+    jobs.discard(f'skeleton_{dataset_id}')
+    del cache.CACHE['datasets'][dataset_id]
+
+
+@mock.patch('aixm_graph.jobs.EXECUTOR')
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_dataset_feature_types__processing_in_progress__202(
+        mock_get_dataset_by_id, mock_executor, test_client):
+    dataset = AIXMDataSet('filepath')
+    dataset.id = 'in_progress_id'
+    dataset.progress = ProcessingProgress(phase=ProcessingProgress.PARSE,
+                                          bytes_total=100,
+                                          bytes_read=10,
+                                          features_indexed=2)
+    mock_get_dataset_by_id.return_value = dataset
+    mock_executor.submit.return_value = Future()
+
+    response = test_client.get('/api/datasets/in_progress_id/feature_types')
+    assert response.status_code == 202
+
+    response_data = json.loads(response.data)['data']
+    assert {
+        'phase': 'parse',
+        'bytes_total': 100,
+        'bytes_read': 10,
+        'features_indexed': 2,
+        'error': None
+    } == response_data['status']
+
+    jobs.discard('process_in_progress_id')
+
+
+def test_get_dataset_status__dataset_not_found__404(test_client):
+    response = test_client.get('/api/datasets/some_id/status')
+    assert response.status_code == 404
+
+    response_data = json.loads(response.data)
+    assert response_data['error'] == 'Dataset with id some_id does not exist'
+
+
+@pytest.fixture
+def test_dataset_filepath(tmp_path):
+    filepath = tmp_path / 'dataset.xml'
+    shutil.copy(resource_filename(__name__, '../static/dataset.xml'), filepath)
+
+    return str(filepath)
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_get_dataset_status__dataset_is_processed__200(mock_get_dataset_by_id, test_client,
+                                                       test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'processed_id'
+    mock_get_dataset_by_id.return_value = dataset
+
+    response = test_client.get('/api/datasets/processed_id/status')
+    assert response.status_code == 200
+
+    response_data = json.loads(response.data)['data']
+    assert 'done' == response_data['status']['phase']
+    assert response_data['status']['bytes_total'] == response_data['status']['bytes_read']
+    assert len(list(dataset.features)) == response_data['status']['features_indexed']
+    assert 'ready' == response_data['skeleton']
+
+    jobs.discard('process_processed_id')
+    jobs.discard('skeleton_processed_id')
+
+
+def test_download_skeleton__dataset_not_found__404(test_client):
+    response = test_client.get('/api/datasets/some_id/download')
+    assert response.status_code == 404
+
+    response_data = json.loads(response.data)
+    assert response_data['error'] == 'Dataset with id some_id does not exist'
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_download_skeleton__skeleton_is_being_generated__202(mock_get_dataset_by_id, test_client,
+                                                             test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'generating_id'
+    dataset.process()
+    mock_get_dataset_by_id.return_value = dataset
+
+    with mock.patch('aixm_graph.jobs.EXECUTOR') as mock_executor:
+        mock_executor.submit.return_value = Future()
+
+        response = test_client.get('/api/datasets/generating_id/download')
+
+    assert response.status_code == 202
+
+    response_data = json.loads(response.data)['data']
+    assert 'done' == response_data['status']['phase']
+    assert 'generating' == response_data['skeleton']
+
+    jobs.discard('skeleton_generating_id')
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_download_skeleton__skeleton_is_generated__served_conditionally_and_partially(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'generated_id'
+    mock_get_dataset_by_id.return_value = dataset
+
+    with open(resource_filename(__name__, '../static/skeleton.xml'), 'rb') as f:
+        expected_skeleton = f.read()
+
+    response = test_client.get('/api/datasets/generated_id/download',
+                               headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert expected_skeleton == response.data
+    assert 'attachment; filename=dataset_skeleton.xml' == response.headers['Content-Disposition']
+    assert 'Content-Encoding' not in response.headers
+
+    etag = response.headers['ETag']
+
+    response = test_client.get('/api/datasets/generated_id/download',
+                               headers={'Accept-Encoding': 'identity', 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = test_client.get('/api/datasets/generated_id/download',
+                               headers={'Accept-Encoding': 'identity', 'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert expected_skeleton[10:20] == response.data
+
+    response = test_client.get('/api/datasets/generated_id/download',
+                               headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'gzip' == response.headers['Content-Encoding']
+    assert expected_skeleton == gzip.decompress(response.data)
+    assert etag != response.headers['ETag']
+
+    jobs.discard('process_generated_id')
+
+
+@mock.patch('aixm_graph.cache.get_dataset_by_id')
+def test_download_skeleton__compression_is_requested__compressed_copy_is_served(
+        mock_get_dataset_by_id, test_client, test_config, test_dataset_filepath):
+    dataset = AIXMDataSet(test_dataset_filepath)
+    dataset.id = 'compressed_id'
+    mock_get_dataset_by_id.return_value = dataset
+
+    with open(resource_filename(__name__, '../static/skeleton.xml'), 'rb') as f:
+        expected_skeleton = f.read()
+
+    response = test_client.get('/api/datasets/compressed_id/download?compression=bz2')
+    assert response.status_code == 200
+    assert 'application/x-bzip2' == response.headers['Content-Type']
+    assert 'attachment; filename=dataset_skeleton.xml.bz2' == \
+        response.headers['Content-Disposition']
+    assert expected_skeleton == bz2.decompress(response.data)
+
+    jobs.discard('process_compressed_id')
+
+
+def test_download_skeleton__compression_is_not_supported__400(test_client):
+    response = test_client.get('/api/datasets/some_id/download?compression=rar')
+    assert response.status_code == 400
+
+    response_data = json.loads(response.data)
+    assert response_data['error'] == \
+        'Compression not supported. Supported compressions: [gz, bz2, xz, zip]'
+
+
+def test_delete_dataset__dataset_not_found__404(test_client):
+    response = test_client.delete('/api/datasets/some_id')
+    assert response.status_code == 404
+
+    response_data = json.loads(response.data)
+    assert response_data['error'] == 'Dataset with id some_id does not exist'
+
+
+def test_delete_dataset__dataset_is_deleted__200(test_client, test_config, test_dataset_filepath):
+    dataset = cache.create_dataset(test_dataset_filepath)
+    cache.process_dataset(dataset)
+
+    response = test_client.delete(f'/api/datasets/{dataset.id}')
+    assert response.status_code == 200
+    assert {'dataset_id': dataset.id} == json.loads(response.data)['data']
+
+    response = test_client.get(f'/api/datasets/{dataset.id}/feature_types')
+    assert response.status_code == 404
+
+    # the file is not in the upload folder
+    assert os.path.exists(test_dataset_filepath)
+
+
+def test_pin_dataset__memory_stats_report_it(test_client, test_config, test_dataset_filepath):
+    dataset = cache.create_dataset(test_dataset_filepath)
+    cache.process_dataset(dataset)
+
+    response = test_client.put(f'/api/datasets/{dataset.id}/pin')
+    assert response.status_code == 200
+    assert {'dataset_id': dataset.id, 'pinned': True} == json.loads(response.data)['data']
+
+    response_data = json.loads(test_client.get('/api/memory').data)['data']
+    assert 0 == response_data['budget']
+    assert response_data['usage'] >= dataset.memory_size
+    assert {
+        'dataset_id': dataset.id,
+        'memory_size': dataset.memory_size,
+        'pinned': True
+    } == response_data['datasets'][-1]
+
+    response = test_client.delete(f'/api/datasets/{dataset.id}/pin')
+    assert response.status_code == 200
+    assert dataset.id not in cache.get_pinned_ids()
+
+    cache.delete_dataset(dataset)
+
+
+@mock.patch('aixm_graph.jobs.EXECUTOR')
+def test_get_graph_for_feature_type__dataset_is_reloading__202(mock_executor, test_client,
+                                                               test_config, test_dataset_filepath):
+    dataset = cache.create_dataset(test_dataset_filepath)
+    dataset.process()
+    cache.evict_dataset(dataset)
+    mock_executor.submit.return_value = Future()
+
+    response = test_client.get(f'/api/datasets/{dataset.id}/feature_types/AirportHeliport/graph')
+    assert response.status_code == 202
+    assert 'queued' == json.loads(response.data)['data']['status']['phase']
+
+    cache.delete_dataset(dataset)
+
+
+@pytest.mark.parametrize('path', [
+    'feature_types/AirportHeliport/graph',
+    'features/some_feature_id/graph',
+    'paths?from=some_feature_id&to=other_feature_id'
+])
+@mock.patch('aixm_graph.jobs.EXECUTOR')
+def test_get_graph__dataset_is_not_processed__processing_is_scheduled__202(
+        mock_executor, test_client, test_config, test_dataset_filepath, path):
+    dataset = cache.create_dataset(test_dataset_filepath)
+
+    response = test_client.get(f'/api/datasets/{dataset.id}/{path}')
+    assert response.status_code == 202
+    assert 'queued' == json.loads(response.data)['data']['status']['phase']
+    assert mock_executor.submit.called
+
+    cache.delete_dataset(dataset)
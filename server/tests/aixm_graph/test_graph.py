@@ -32,12 +32,15 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import json
+
 import pytest
 
 from aixm_graph import XLINK_NS
 from aixm_graph.datasets.features import AIXMFeature, AIXMFeatureTimeSlice
 from aixm_graph.datasets.fields import Field, XLinkField
-from aixm_graph.graph import Node, Edge, Graph
+from aixm_graph.graph import Node, Edge, Graph, SerializedNode, GraphTraversal, chunked, \
+    iter_serialized_graph
 
 
 def test_node__from_feature():
@@ -206,3 +209,113 @@ def test_graph__to_json():
             'is_broken': False
         }]
     } == graph.to_json()
+
+
+def test_graph__add_nodes_and_edges__duplicates_are_ignored_and_order_is_kept():
+    node1 = Node(id='1', name='name1', abbrev='AAA')
+    node2 = Node(id='2', name='name2', abbrev='AAA')
+    duplicate_node1 = Node(id='1', name='other name', abbrev='BBB')
+
+    edge1 = Edge(source='1', target='2', name='name', direction='target')
+    reverse_edge1 = Edge(source='2', target='1', name='name', direction='source')
+    edge2 = Edge(source='1', target='2', name='other name', direction='target')
+
+    graph = Graph()
+    graph.add_nodes([node2, node1])
+    graph.add_nodes(duplicate_node1)
+    graph.add_edges([edge1, reverse_edge1, edge2])
+
+    assert [node2, node1] == graph.nodes
+    assert 'name1' == graph.nodes[1].name
+    assert [edge1, edge2] == graph.edges
+    assert 'target' == graph.edges[0].direction
+
+
+def test_graph__add__merges_graphs_without_duplicates():
+    node1 = Node(id='1', name='name1', abbrev='AAA')
+    node2 = Node(id='2', name='name2', abbrev='AAA')
+    node3 = Node(id='3', name='name3', abbrev='AAA')
+
+    graph1 = Graph(nodes=[node1, node2],
+                   edges=[Edge(source='1', target='2', name='name', direction='target')])
+    graph2 = Graph(nodes=[node2, node3],
+                   edges=[Edge(source='2', target='1', name='name', direction='source'),
+                          Edge(source='2', target='3', name='name', direction='target')])
+
+    graph = graph1 + graph2
+
+    assert ['1', '2', '3'] == [node.id for node in graph.nodes]
+    assert [('1', '2'), ('2', '3')] == [(edge.source, edge.target) for edge in graph.edges]
+
+
+def test_graph__serialize__same_as_to_json():
+    node1 = Node(id='1', name='name1', abbrev='AAA', fields=[{'field': 'text'}])
+    node2 = Node(id='2', name='name2', abbrev='AAA')
+    serialized_node3 = SerializedNode('3', Node(id='3', name='name3', abbrev='BBB').serialize())
+
+    graph = Graph(nodes=[node1, node2, serialized_node3],
+                  edges=[Edge(source='1', target='2', name='name', direction='target'),
+                         Edge(source='1', target='3', name='name', direction='source',
+                              is_broken=True)])
+
+    assert graph.to_json() == json.loads(graph.serialize())
+    assert serialized_node3.to_json() == graph.to_json()['nodes'][2]
+    assert '{"nodes":[],"edges":[]}' == Graph().serialize()
+
+
+def test_graph__iter_serialized__chunked__same_as_serialize():
+    graph = Graph(nodes=[Node(id=str(i), name=f'name{i}', abbrev='AAA') for i in range(100)],
+                  edges=[Edge(source=str(i), target=str(i + 1), name='name', direction='target')
+                         for i in range(99)])
+
+    chunks = list(chunked(graph.iter_serialized(), chunk_size=1000))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 1000 for chunk in chunks[:-1])
+    assert graph.serialize() == ''.join(chunks)
+    assert graph.to_json() == json.loads(''.join(chunks))
+
+
+def test_iter_serialized_graph__same_as_graph_of_the_items():
+    items = []
+    for i in range(300):
+        items += [Node(id=str(i), name=f'name{i}', abbrev='AAA'),
+                  Edge(source=str(i), target=str(i + 1), name='name', direction='target'),
+                  # repeated nodes and edges are serialized once
+                  Node(id=str(max(i - 1, 0)), name='repeated', abbrev='AAA'),
+                  Edge(source=str(i + 1), target=str(i), name='name', direction='source')]
+
+    graph = Graph()
+    graph.add_items(items)
+
+    assert graph.serialize() == ''.join(iter_serialized_graph(items))
+    assert '{"nodes":[],"edges":[]}' == ''.join(iter_serialized_graph([]))
+
+
+def test_iter_serialized_graph__nodes_are_serialized_while_being_produced():
+    produced = []
+
+    def traverse():
+        for i in range(1000):
+            produced.append(i)
+            yield Node(id=str(i), name=f'name{i}', abbrev='AAA')
+
+    first_chunk = next(chunked(iter_serialized_graph(traverse()), chunk_size=1000))
+
+    assert first_chunk.startswith('{"nodes":[{"id":"0"')
+    assert len(produced) < 1000
+
+
+def test_graph_traversal__outcome_is_kept_once_exhausted():
+    def traverse():
+        yield Node(id='1', name='name1', abbrev='AAA')
+        return True
+
+    traversal = GraphTraversal(traverse())
+    assert traversal.outcome is None
+
+    graph = Graph()
+    graph.add_items(traversal)
+
+    assert ['1'] == [node.id for node in graph.nodes]
+    assert traversal.outcome is True
@@ -0,0 +1,82 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import threading
+
+import pytest
+
+from aixm_graph import jobs
+
+
+@pytest.fixture
+def synchronous_executor():
+    jobs.init_executor(0)
+    yield
+
+    jobs.JOBS.clear()
+
+
+def test_submit__same_job_id__job_is_submitted_once(synchronous_executor):
+    calls = []
+
+    job = jobs.submit('job', calls.append, 1)
+
+    assert job is jobs.submit('job', calls.append, 2)
+    assert job is jobs.get_job('job')
+    assert [1] == calls
+    assert job.done()
+
+
+def test_submit__job_fails__exception_is_kept(synchronous_executor):
+    def fail():
+        raise ValueError('failed')
+
+    job = jobs.submit('job', fail)
+
+    assert isinstance(job.exception(), ValueError)
+
+
+def test_submit__synchronous_job__other_threads_access_the_jobs_while_it_runs(
+        synchronous_executor):
+    def access_jobs_from_another_thread():
+        thread = threading.Thread(target=lambda: (jobs.get_job('job'), jobs.discard('other')))
+        thread.start()
+        thread.join(timeout=5)
+
+        return thread.is_alive()
+
+    job = jobs.submit('job', access_jobs_from_another_thread)
+
+    # the job is registered while it runs and the other thread is not blocked
+    assert job.result() is False
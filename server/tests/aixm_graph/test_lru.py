@@ -0,0 +1,105 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+from aixm_graph.lru import LRUCache
+
+
+def test_lru_cache__get__counts_hits_and_misses():
+    lru = LRUCache(max_entries=2, max_bytes=100)
+    lru.put(('dataset', 1), b'page')
+
+    assert b'page' == lru.get(('dataset', 1))
+    assert lru.get(('dataset', 2)) is None
+
+    assert 1 == lru.hits
+    assert 1 == lru.misses
+
+
+def test_lru_cache__max_entries_exceeded__least_recently_used_is_evicted():
+    lru = LRUCache(max_entries=2, max_bytes=100)
+    lru.put(('dataset', 1), b'page1')
+    lru.put(('dataset', 2), b'page2')
+    lru.get(('dataset', 1))
+
+    lru.put(('dataset', 3), b'page3')
+
+    assert 2 == len(lru)
+    assert lru.get(('dataset', 2)) is None
+    assert b'page1' == lru.get(('dataset', 1))
+    assert b'page3' == lru.get(('dataset', 3))
+
+
+def test_lru_cache__max_bytes_exceeded__least_recently_used_are_evicted():
+    lru = LRUCache(max_entries=10, max_bytes=10)
+    lru.put(('dataset', 1), b'1234')
+    lru.put(('dataset', 2), b'1234')
+    lru.put(('dataset', 3), b'12345678')
+
+    assert 1 == len(lru)
+    assert 8 == lru.size
+    assert b'12345678' == lru.get(('dataset', 3))
+
+    lru.put(('dataset', 4), b'12345678901')
+
+    assert lru.get(('dataset', 4)) is None
+    assert b'12345678' == lru.get(('dataset', 3))
+
+
+def test_lru_cache__put_existing_key__value_is_replaced():
+    lru = LRUCache(max_entries=10, max_bytes=10)
+    lru.put(('dataset', 1), b'1234')
+    lru.put(('dataset', 1), b'123')
+
+    assert 1 == len(lru)
+    assert 3 == lru.size
+
+
+def test_lru_cache__invalidate__only_the_entries_of_the_dataset_are_removed():
+    lru = LRUCache(max_entries=10, max_bytes=100)
+    lru.put(('dataset1', 'Type', 0), b'page1')
+    lru.put(('dataset1', 'Type', 5), b'page2')
+    lru.put(('dataset2', 'Type', 0), b'page3')
+
+    lru.invalidate('dataset1')
+
+    assert 1 == len(lru)
+    assert 5 == lru.size
+    assert b'page3' == lru.get(('dataset2', 'Type', 0))
+
+
+def test_lru_cache__disabled__nothing_is_cached():
+    lru = LRUCache(max_entries=0, max_bytes=100)
+    lru.put(('dataset', 1), b'page')
+
+    assert 0 == len(lru)
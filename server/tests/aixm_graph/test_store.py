@@ -0,0 +1,463 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import gzip
+import os
+import shutil
+import stat
+from concurrent.futures import Future
+from unittest import mock
+from multiprocessing import Process
+
+import pytest
+from pkg_resources import resource_filename
+
+from aixm_graph import cache, jobs
+from aixm_graph.datasets.datasets import AIXMDataSet
+from aixm_graph.datasets.progress import ProcessingProgress
+from aixm_graph.store import DatasetStore
+
+
+@pytest.fixture
+def test_filepath(tmp_path):
+    # the skeleton is generated next to the dataset
+    filepath = tmp_path / 'dataset.xml'
+    shutil.copy(resource_filename(__name__, '../static/dataset.xml'), filepath)
+
+    return str(filepath)
+
+
+@pytest.fixture
+def test_store_folder(tmp_path):
+    cache.init_store(str(tmp_path))
+    yield str(tmp_path)
+
+    cache.init_store(None)
+    cache.CACHE['datasets'].clear()
+    jobs.JOBS.clear()
+
+
+def test_store__catalog_entries(tmp_path):
+    store = DatasetStore(str(tmp_path))
+
+    assert [] == store.get_entries()
+    assert store.get_entry('id1') is None
+
+    store.add_entry('id1', '/path/dataset.xml', 'hash1', {'text_index': True})
+
+    assert {
+        'id': 'id1',
+        'filepath': '/path/dataset.xml',
+        'content_hash': 'hash1',
+        'options': {'text_index': True}
+    } == store.get_entry('id1')
+
+    # a new instance on the same folder sees the same catalog
+    assert ['id1'] == [entry['id'] for entry in DatasetStore(str(tmp_path)).get_entries()]
+
+
+def test_store__snapshot_roundtrip(tmp_path, test_filepath, test_config):
+    store = DatasetStore(str(tmp_path))
+    dataset = AIXMDataSet(test_filepath).process()
+
+    assert not store.has_snapshot(dataset.content_hash)
+    assert store.load_snapshot(dataset.content_hash) is None
+
+    store.save_snapshot(dataset.content_hash, dataset.to_snapshot())
+    assert store.has_snapshot(dataset.content_hash)
+
+    loaded_dataset = AIXMDataSet(test_filepath).load_snapshot(
+        store.load_snapshot(dataset.content_hash))
+    precomputed_dataset = AIXMDataSet(test_filepath, precompute_graphs=True).load_snapshot(
+        store.load_snapshot(dataset.content_hash))
+
+    assert dataset.feature_type_stats == loaded_dataset.feature_type_stats
+    assert dataset.version == loaded_dataset.version
+    assert [f.id for f in dataset.features] == [f.id for f in loaded_dataset.features]
+    assert [type(f) for f in dataset.features] == [type(f) for f in loaded_dataset.features]
+
+    for feature in dataset.features:
+        loaded_feature = loaded_dataset.get_feature_by_id(feature.id)
+
+        assert dataset.get_graph_for_feature(feature).to_json() == \
+            loaded_dataset.get_graph_for_feature(loaded_feature).to_json()
+        assert dataset.get_graph_for_feature(feature).to_json() == \
+            precomputed_dataset.get_graph_for_feature(
+                precomputed_dataset.get_feature_by_id(feature.id)).to_json()
+
+
+def test_store__folder_is_accessible_only_by_its_user(tmp_path):
+    folder = os.path.join(tmp_path, 'store')
+    store = DatasetStore(folder)
+
+    store.save_snapshot('hash1', {'attr': 'value'})
+
+    assert 0o700 == stat.S_IMODE(os.stat(folder).st_mode)
+    assert 0o600 == stat.S_IMODE(os.stat(store.snapshot_path('hash1')).st_mode)
+
+
+def test_store__folder_is_writable_by_others__is_refused(tmp_path):
+    folder = os.path.join(tmp_path, 'store')
+    os.makedirs(folder)
+    os.chmod(folder, 0o777)
+
+    with pytest.raises(PermissionError):
+        DatasetStore(folder)
+
+
+def test_store__snapshot_is_writable_by_others__is_not_loaded(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.save_snapshot('hash1', {'attr': 'value'})
+
+    assert {'attr': 'value'} == store.load_snapshot('hash1')
+
+    os.chmod(store.snapshot_path('hash1'), 0o666)
+
+    assert store.load_snapshot('hash1') is None
+
+
+def test_cache__dataset_is_reopened_from_store(test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath, text_index=True)
+    cache.process_dataset(dataset)
+
+    # simulate a restart
+    cache.CACHE['datasets'].clear()
+
+    assert [dataset.id] == [d.id for d in cache.get_datasets()]
+
+    reopened_dataset = cache.get_dataset_by_id(dataset.id)
+
+    assert reopened_dataset is not dataset
+    assert dataset.name == reopened_dataset.name
+    # the responses cached by the clients remain valid
+    assert dataset.version == reopened_dataset.version
+    assert dataset.feature_type_stats == reopened_dataset.feature_type_stats
+    assert reopened_dataset._text_index_enabled is True
+
+
+@mock.patch('aixm_graph.jobs.EXECUTOR')
+def test_cache__dataset_is_reopened_from_store__snapshot_is_loaded_in_the_background(
+        mock_executor, test_store_folder, test_filepath, test_config):
+    mock_executor.submit.return_value = Future()
+    dataset = cache.create_dataset(test_filepath)
+    cache.process_dataset(dataset)
+
+    # simulate a restart
+    cache.CACHE['datasets'].clear()
+
+    reopened_dataset = cache.get_dataset_by_id(dataset.id)
+
+    assert reopened_dataset.feature_type_stats is None
+    assert not cache.ensure_processed(reopened_dataset)
+
+    phases = []
+    load_snapshot = cache.STORE.load_snapshot
+
+    def record_phase(content_hash):
+        phases.append(reopened_dataset.progress.phase)
+        return load_snapshot(content_hash)
+
+    # run the job that has been submitted to the executor
+    _, *job = mock_executor.submit.call_args[0]
+    with mock.patch.object(cache.STORE, 'load_snapshot', side_effect=record_phase):
+        jobs._run(*job)
+
+    assert [ProcessingProgress.LOAD] == phases
+    assert cache.ensure_processed(reopened_dataset)
+    assert dataset.version == reopened_dataset.version
+
+
+def test_cache__process_dataset__snapshot_exists__dataset_is_not_parsed(
+        test_store_folder, test_filepath, test_config):
+    cache.process_dataset(cache.create_dataset(test_filepath))
+
+    dataset = cache.create_dataset(test_filepath)
+    dataset._parse = None
+
+    cache.process_dataset(dataset)
+
+    assert dataset.feature_type_stats
+
+
+def _add_entries(folder, worker):
+    store = DatasetStore(folder)
+    for i in range(10):
+        store.add_entry(f'{worker}_{i}', f'/path/{worker}_{i}.xml', f'hash_{worker}_{i}')
+
+
+def test_store__add_entry__concurrent_processes__no_entries_are_lost(tmp_path):
+    processes = [Process(target=_add_entries, args=(str(tmp_path), worker)) for worker in range(4)]
+
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert 40 == len(DatasetStore(str(tmp_path)).get_entries())
+
+
+def test_cache__dataset_created_by_another_process_is_found(
+        test_store_folder, test_filepath, test_config):
+    # the store entry is added as if the dataset was uploaded to another worker
+    DatasetStore(test_store_folder).add_entry('other_id', test_filepath, 'hash')
+
+    dataset = cache.get_dataset_by_id('other_id')
+
+    assert dataset is not None
+    assert 'other_id' == dataset.id
+    assert 'dataset.xml' == dataset.name
+
+
+def test_cache__processing_progress_is_shared_via_store(
+        test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+    cache.process_dataset(dataset)
+
+    # a worker which has not processed the dataset itself
+    other_dataset = AIXMDataSet(test_filepath)
+    progress = cache.get_processing_progress(other_dataset)
+
+    assert ProcessingProgress.DONE == progress.phase
+    assert len(list(dataset.features)) == progress.features_indexed
+
+
+def test_cache__process_dataset__skeleton_is_generated(
+        test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+    cache.process_dataset(dataset)
+
+    assert cache.ensure_skeleton(dataset) == dataset.make_skeleton_path()
+    assert os.path.exists(f'{dataset.make_skeleton_path()}.gz')
+    assert 'ready' == cache.get_skeleton_status(dataset)
+
+
+def test_cache__skeleton_generated_by_another_worker_is_reused(
+        test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+    cache.process_dataset(dataset)
+
+    # a worker which has not generated the skeleton itself
+    other_dataset = AIXMDataSet(test_filepath)
+    other_dataset.generate_skeleton = None
+
+    assert dataset.skeleton_filepath == cache.generate_skeleton(other_dataset)
+    assert dataset.skeleton_filepath == other_dataset.skeleton_filepath
+
+
+@pytest.fixture
+def memory_budget():
+    yield cache.init_memory_budget
+
+    cache.init_memory_budget(0)
+    cache.CACHE['datasets'].clear()
+    cache.EVICTED.clear()
+    cache.PINNED.clear()
+    cache._LAST_USED.clear()
+    jobs.JOBS.clear()
+
+
+def test_store__update_and_remove_entry(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    store.add_entry('id1', '/path/dataset.xml', 'hash1')
+    store.add_entry('id2', '/path/dataset.xml', 'hash1')
+
+    store.update_entry('id1', pinned=True)
+    store.update_entry('unknown', pinned=True)
+
+    assert store.get_entry('id1')['pinned'] is True
+    assert store.get_entry('unknown') is None
+
+    store.remove_entry('id1')
+
+    assert ['id2'] == [entry['id'] for entry in store.get_entries()]
+
+
+def test_dataset__memory_size_is_estimated_once_processed(test_filepath, test_config):
+    dataset = AIXMDataSet(test_filepath, precompute_graphs=True)
+
+    assert 0 == dataset.memory_size
+
+    dataset.process()
+
+    assert dataset.memory_size > 0
+    assert dataset.memory_size == \
+        AIXMDataSet(test_filepath, precompute_graphs=True).load_snapshot(
+            dataset.to_snapshot()).memory_size
+
+
+def test_cache__memory_budget__least_recently_used_dataset_is_evicted_and_reloaded(
+        test_store_folder, test_filepath, test_config, memory_budget):
+    datasets = [cache.create_dataset(test_filepath) for _ in range(3)]
+    cache.process_dataset(datasets[0])
+
+    memory_budget(int(datasets[0].memory_size * 2.5))
+
+    cache.process_dataset(datasets[1])
+    # the first dataset becomes the most recently used one
+    cache.get_dataset_by_id(datasets[0].id)
+    cache.process_dataset(datasets[2])
+
+    assert datasets[0] is cache.CACHE['datasets'][datasets[0].id]
+    assert datasets[1] is not cache.CACHE['datasets'][datasets[1].id]
+    assert cache.is_reloading(cache.CACHE['datasets'][datasets[1].id])
+    assert cache.get_memory_usage() <= cache.MEMORY_BUDGET
+
+    # it is reloaded from its snapshot upon being requested, evicting the least recently used one
+    reloaded_dataset = cache.get_dataset_by_id(datasets[1].id)
+
+    assert datasets[1].feature_type_stats == reloaded_dataset.feature_type_stats
+    assert not cache.is_reloading(reloaded_dataset)
+    assert datasets[0] is not cache.CACHE['datasets'][datasets[0].id]
+
+
+def test_cache__memory_budget__without_store__evicted_dataset_is_processed_again(
+        test_filepath, test_config, memory_budget):
+    datasets = [cache.create_dataset(test_filepath) for _ in range(2)]
+    cache.process_dataset(datasets[0])
+
+    memory_budget(datasets[0].memory_size)
+    cache.process_dataset(datasets[1])
+
+    assert cache.is_reloading(cache.CACHE['datasets'][datasets[0].id])
+
+    # the processing is run synchronously during the tests
+    reloaded_dataset = cache.get_dataset_by_id(datasets[0].id)
+
+    assert datasets[0].feature_type_stats == reloaded_dataset.feature_type_stats
+    assert datasets[0].skeleton_filepath == reloaded_dataset.skeleton_filepath
+
+
+def test_cache__memory_budget__pinned_dataset_is_not_evicted(
+        test_store_folder, test_filepath, test_config, memory_budget):
+    datasets = [cache.create_dataset(test_filepath) for _ in range(2)]
+    cache.process_dataset(datasets[0])
+    cache.pin_dataset(datasets[0])
+
+    memory_budget(datasets[0].memory_size)
+    cache.process_dataset(datasets[1])
+
+    assert {datasets[0].id} == cache.get_pinned_ids()
+    assert [] == cache.enforce_memory_budget(keep=datasets[1])
+    assert datasets[0] is cache.CACHE['datasets'][datasets[0].id]
+
+    cache.pin_dataset(datasets[0], pinned=False)
+
+    assert [datasets[0]] == cache.enforce_memory_budget(keep=datasets[1])
+
+
+def test_cache__delete_dataset(test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+    other_dataset = cache.create_dataset(test_filepath)
+    cache.process_dataset(dataset)
+    store = cache.STORE
+
+    # the snapshot and the file are shared with the other dataset
+    cache.delete_dataset(dataset, remove_files=True)
+
+    assert cache.get_dataset_by_id(dataset.id) is None
+    assert [other_dataset.id] == [entry['id'] for entry in store.get_entries()]
+    assert store.has_snapshot(dataset.content_hash)
+    assert os.path.exists(test_filepath)
+
+    cache.delete_dataset(other_dataset, remove_files=True)
+
+    assert [] == store.get_entries()
+    assert not store.has_snapshot(dataset.content_hash)
+    assert not os.path.exists(test_filepath)
+    assert not os.path.exists(dataset.make_skeleton_path())
+    assert not os.path.exists(f'{dataset.make_skeleton_path()}.gz')
+
+
+def test_cache__compressed_file_of_the_same_name__has_its_own_skeleton(
+        test_store_folder, test_filepath, test_config):
+    with open(test_filepath, 'rb') as f:
+        content = f.read()
+
+    # another content, i.e. without the last member
+    last_member_start = content.rindex(b'<message:hasMember>')
+    last_member_end = content.rindex(b'</message:hasMember>') + len(b'</message:hasMember>')
+    with gzip.open(f'{test_filepath}.gz', 'wb') as f:
+        f.write(content[:last_member_start] + content[last_member_end:])
+
+    datasets = [cache.create_dataset(test_filepath), cache.create_dataset(f'{test_filepath}.gz')]
+    for dataset in datasets:
+        cache.process_dataset(dataset)
+
+    skeleton_filepaths = [cache.ensure_skeleton(dataset) for dataset in datasets]
+
+    assert skeleton_filepaths[0] != skeleton_filepaths[1]
+    assert datasets[0].skeleton_name == datasets[1].skeleton_name
+
+    for dataset, skeleton_filepath in zip(datasets, skeleton_filepaths):
+        with open(skeleton_filepath, 'rb') as f:
+            assert len(list(dataset.features)) == f.read().count(b'<message:hasMember>')
+
+    # the skeleton of the other dataset is kept
+    cache.delete_dataset(datasets[0], remove_files=True)
+
+    assert not os.path.exists(skeleton_filepaths[0])
+    assert os.path.exists(skeleton_filepaths[1])
+    assert skeleton_filepaths[1] == cache.ensure_skeleton(datasets[1])
+
+    cache.delete_dataset(datasets[1], remove_files=True)
+
+
+def test_cache__dataset_deleted_while_processed__nothing_is_persisted(
+        test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+    store = cache.STORE
+    process = dataset.process
+
+    def process_and_delete():
+        process()
+        cache.delete_dataset(dataset, remove_files=True)
+
+    with mock.patch.object(dataset, 'process', side_effect=process_and_delete):
+        cache.process_dataset(dataset)
+
+    assert not store.has_snapshot(dataset.content_hash)
+    assert not os.path.exists(dataset.make_skeleton_path())
+    assert not os.path.exists(f'{dataset.make_skeleton_path()}.gz')
+    assert [] == list(jobs.JOBS)
+
+
+def test_cache__dataset_deleted_by_another_process_is_forgotten(
+        test_store_folder, test_filepath, test_config):
+    dataset = cache.create_dataset(test_filepath)
+
+    # the store entry is removed as if the dataset was deleted by another worker
+    DatasetStore(test_store_folder).remove_entry(dataset.id)
+
+    assert [] == cache.get_datasets()
+    assert cache.get_dataset_by_id(dataset.id) is None
@@ -32,9 +32,12 @@ Details on EUROCONTROL: http://www.eurocontrol.int
 
 __author__ = "EUROCONTROL (SWIM)"
 
+import sys
+
 import pytest
 
-from aixm_graph.utils import make_attrib, get_next_offset, get_prev_offset, filename_is_valid, get_attrib_value
+from aixm_graph.utils import make_attrib, get_next_offset, get_prev_offset, filename_is_valid, get_attrib_value, \
+    encode_cursor, decode_cursor, deep_getsizeof
 
 
 @pytest.mark.parametrize('name, value, ns, expected_attrib', [
@@ -60,11 +63,35 @@ def test_get_prev_offset(offset, limit, size, expected_prev_offset):
     assert expected_prev_offset == get_prev_offset(offset, limit)
 
 
+@pytest.mark.parametrize('position, offset', [(0, 0), (12, 5), (123456789, 100)])
+def test_encode_cursor__is_decoded(position, offset):
+    assert (position, offset) == decode_cursor(encode_cursor(position, offset, 'key', 10),
+                                               'key', 10)
+
+
+@pytest.mark.parametrize('cursor', ['', 'invalid', '!', encode_cursor(-1, 0, '', 10), 'MTI6'])
+def test_decode_cursor__invalid__raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, '', 10)
+
+
+@pytest.mark.parametrize('key, limit', [('other key', 10), ('key', 20), ('', 10)])
+def test_decode_cursor__of_another_key_or_limit__raises_value_error(key, limit):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(12, 5, 'key', 10), key, limit)
+
+
 @pytest.mark.parametrize('filename, is_valid', [
     ('invalid', False),
     ('nodotxml', False),
     ('invalid.pdf', False),
     ('valid.xml', True),
+    ('valid.XML.gz', True),
+    ('valid.xml.bz2', True),
+    ('valid.xml.xz', True),
+    ('valid.zip', True),
+    ('invalid.pdf.gz', False),
+    ('.zip', False),
 ])
 def test_filename_is_valid(filename, is_valid):
     assert is_valid == filename_is_valid(filename)
@@ -77,3 +104,13 @@ def test_filename_is_valid(filename, is_valid):
 ])
 def test_get_attrib_value(attribs, name, ns, value_prefixes, expected_value):
     assert expected_value == get_attrib_value(attribs, name, ns, value_prefixes)
+
+
+def test_deep_getsizeof__counts_referred_objects_once():
+    text = 'x' * 1000
+    container = [text, text, (text, {'key': text})]
+
+    assert deep_getsizeof(text) == sys.getsizeof(text)
+    assert deep_getsizeof(container) > sys.getsizeof(text)
+    assert deep_getsizeof(container) < 2 * sys.getsizeof(text)
+    assert deep_getsizeof(container, seen={id(text)}) < sys.getsizeof(text)
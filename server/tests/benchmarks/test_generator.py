@@ -0,0 +1,119 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import math
+import os
+
+import pytest
+
+from aixm_graph.datasets.datasets import AIXMDataSet
+from benchmarks.generator import generate_dataset
+
+
+@pytest.fixture
+def generate(test_config, tmp_path):
+    def _generate(filename='dataset.xml', **kwargs):
+        filepath = os.path.join(tmp_path, filename)
+        generated = generate_dataset(filepath, feature_config=test_config['FEATURES'], **kwargs)
+
+        return filepath, generated
+
+    return _generate
+
+
+@pytest.mark.parametrize('features_num, time_slices_num', [
+    (0, 1),
+    (1, 1),
+    (50, 1),
+    (50, 3)
+])
+def test_generate_dataset__size(test_config, generate, features_num, time_slices_num):
+    filepath, generated = generate(features_num=features_num, time_slices_num=time_slices_num)
+
+    dataset = AIXMDataSet(filepath).process()
+    features = list(dataset.features)
+
+    assert features_num == generated.features_num == len(features)
+    assert features_num * time_slices_num == generated.time_slices_num
+    assert all(time_slices_num == len(feature.time_slices) for feature in features)
+    assert set(test_config['FEATURES']) >= set(dataset.feature_type_stats)
+
+
+@pytest.mark.parametrize('fan_out, fan_in', [
+    (1, 1.0),
+    (2, 2.0),
+    (3, 5.0)
+])
+def test_generate_dataset__link_density(generate, fan_out, fan_in):
+    features_num = 200
+    filepath, generated = generate(features_num=features_num, time_slices_num=2, fan_out=fan_out,
+                                   fan_in=fan_in)
+
+    dataset = AIXMDataSet(filepath).process()
+    features = list(dataset.features)
+    referred = [feature for feature in features if dataset.get_referring_features(feature)]
+
+    assert features_num * fan_out * 2 == generated.xlinks_num
+    assert 0 == generated.broken_xlinks_num
+    assert all(fan_out * 2 == len(list(feature.xlinks)) for feature in features)
+    assert all(not xlink.is_broken for feature in features for xlink in feature.xlinks)
+    # the referred features are drawn from a pool sized so that each of them would be referred by
+    # fan_in features on average, although some of it may not be drawn at all
+    assert len(referred) <= math.ceil(features_num * fan_out / fan_in)
+    assert fan_in <= features_num * fan_out / len(referred) < fan_in * 2
+
+
+def test_generate_dataset__broken_ratio(generate):
+    filepath, generated = generate(features_num=500, fan_out=2, broken_ratio=0.2)
+
+    dataset = AIXMDataSet(filepath).process()
+    broken_xlinks_num = sum(1 for feature in dataset.features
+                            for xlink in feature.xlinks if xlink.is_broken)
+
+    assert 1000 == generated.xlinks_num
+    assert broken_xlinks_num == generated.broken_xlinks_num
+    assert broken_xlinks_num / generated.xlinks_num == pytest.approx(0.2, abs=0.05)
+
+
+def test_generate_dataset__same_seed__same_dataset(generate):
+    filepath1, generated1 = generate('dataset1.xml', features_num=100, broken_ratio=0.1, seed=1)
+    filepath2, generated2 = generate('dataset2.xml', features_num=100, broken_ratio=0.1, seed=1)
+    filepath3, generated3 = generate('dataset3.xml', features_num=100, broken_ratio=0.1, seed=2)
+
+    with open(filepath1) as f1, open(filepath2) as f2, open(filepath3) as f3:
+        content1, content2, content3 = f1.read(), f2.read(), f3.read()
+
+    assert generated1 == generated2
+    assert content1 == content2
+    assert content1 != content3
@@ -0,0 +1,132 @@
+"""
+Copyright 2020 EUROCONTROL
+==========================================
+
+Redistribution and use in source and binary forms, with or without modification, are permitted
+provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this list of conditions
+   and the following disclaimer.
+2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+   and the following disclaimer in the documentation and/or other materials provided with the
+   distribution.
+3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+   or promote products derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR
+IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND
+FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF
+THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+==========================================
+
+Editorial note: this license is an instance of the BSD license template as provided by the Open
+Source Initiative: http://opensource.org/licenses/BSD-3-Clause
+
+Details on EUROCONTROL: http://www.eurocontrol.int
+"""
+
+__author__ = "EUROCONTROL (SWIM)"
+
+import os
+
+import pytest
+
+from benchmarks import suite
+from benchmarks.generator import generate_dataset
+
+MIB = 1024 * 1024
+
+
+def make_results(calibration_seconds=None, **phases):
+    results = {
+        'phases': {
+            name: {'seconds': seconds, 'peak_bytes': peak_bytes}
+            for name, (seconds, peak_bytes) in phases.items()
+        }
+    }
+    if calibration_seconds is not None:
+        results['machine'] = {'calibration_seconds': calibration_seconds}
+
+    return results
+
+
+def compare(results, baseline):
+    return suite.compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.1,
+                         min_seconds=0.05, min_bytes=MIB)
+
+
+@pytest.mark.parametrize('results, expected_regressions', [
+    (make_results(parse=(1.0, 10 * MIB)), []),
+    (make_results(parse=(1.2, 10.5 * MIB)), []),
+    (make_results(parse=(0.5, 5 * MIB)), []),
+    (make_results(parse=(1.3, 10 * MIB)), ['parse: 1.300s instead of 1.000s']),
+    (make_results(parse=(1.0, 12 * MIB)), ['parse: 12.0 MiB instead of 10.0 MiB']),
+    (make_results(parse=(1.3, 12 * MIB)), ['parse: 1.300s instead of 1.000s',
+                                           'parse: 12.0 MiB instead of 10.0 MiB']),
+    # the phases missing from the baseline are not compared
+    (make_results(parse=(1.0, 10 * MIB), skeleton=(10.0, 100 * MIB)), []),
+])
+def test_compare(results, expected_regressions):
+    baseline = make_results(parse=(1.0, 10 * MIB))
+
+    assert expected_regressions == compare(results, baseline)
+
+
+def test_compare__fast_phase__small_slowdowns_are_ignored():
+    baseline = make_results(stats=(0.01, 0))
+
+    assert [] == compare(make_results(stats=(0.05, 0)), baseline)
+    assert ['stats: 0.070s instead of 0.010s'] == compare(make_results(stats=(0.07, 0)), baseline)
+
+
+def test_compare__small_phase__small_memory_increases_are_ignored():
+    baseline = make_results(stats=(1.0, 100))
+
+    assert [] == compare(make_results(stats=(1.0, MIB)), baseline)
+    assert ['stats: 2.0 MiB instead of 0.0 MiB'] == compare(make_results(stats=(1.0, 2 * MIB)),
+                                                            baseline)
+
+
+@pytest.mark.parametrize('calibration_seconds, seconds, expected_regressions', [
+    # the machine of the results is twice as slow
+    (0.4, 2.0, []),
+    (0.4, 2.4, []),
+    (0.4, 2.6, ['parse: 2.600s instead of 2.000s']),
+    # the machine of the results is twice as fast
+    (0.1, 0.6, []),
+    (0.1, 0.7, ['parse: 0.700s instead of 0.500s']),
+])
+def test_compare__other_machine__timings_are_scaled(calibration_seconds, seconds,
+                                                    expected_regressions):
+    baseline = make_results(calibration_seconds=0.2, parse=(1.0, 10 * MIB))
+    results = make_results(calibration_seconds=calibration_seconds, parse=(seconds, 10 * MIB))
+
+    assert expected_regressions == compare(results, baseline)
+
+
+@pytest.mark.parametrize('results, baseline, expected_scale', [
+    (make_results(0.4), make_results(0.2), 2.0),
+    (make_results(0.1), make_results(0.2), 0.5),
+    # either of them has not been calibrated
+    (make_results(0.4), make_results(), 1.0),
+    (make_results(), make_results(0.2), 1.0),
+])
+def test_get_time_scale(results, baseline, expected_scale):
+    assert expected_scale == suite.get_time_scale(results, baseline)
+
+
+@pytest.mark.parametrize('trace_memory', [False, True])
+def test_measure_phases(test_config, tmp_path, trace_memory):
+    filepath = os.path.join(tmp_path, 'dataset.xml')
+    generate_dataset(filepath, features_num=50, feature_config=test_config['FEATURES'])
+
+    measurements = suite.measure_phases(filepath, trace_memory=trace_memory)
+
+    assert ['parse', 'reverse_associations', 'text_index', 'stats', 'graph_pages', 'filter',
+            'skeleton'] == list(measurements)
+    assert all(measurement >= 0 for measurement in measurements.values())